@@ -34,6 +34,7 @@ from app.schemas import (
     ModelRuntimeAssetsRequest,
     ModelVersionCreateRequest,
     ModelVersionResponse,
+    RedecodeRequest,
     RegenerateRequest,
     SegmentResponse,
     SegmentsPatchRequest,
@@ -48,7 +49,7 @@ from app.services.exports import render_srt, render_txt, render_vtt
 from app.services.model_routing import select_model_version_id
 from app.services.model_versions import activate_model_version, get_active_model_version, sync_model_version_artifacts
 from app.services.model_artifacts import ensure_model_artifacts, upsert_runtime_assets
-from app.services.jobs import process_job_by_id
+from app.services.jobs import process_job_by_id, redecode_job_segments
 from app.services.queue import enqueue_inference_job
 from app.services.uploads import validate_upload_request
 from app.storage import (
@@ -235,6 +236,7 @@ async def live_predict(
                 framework=normalized_framework,
                 top_k_override=bounded_top_k,
                 runtime_config_overrides={"decoder_mode": normalized_mode},
+                model_version_id=model.id,
             )
     except HTTPException:
         raise
@@ -704,6 +706,30 @@ def regenerate_job_segments(
     return [_segment_to_response(segment) for segment in segments]
 
 
+@router.post("/jobs/{job_id}/redecode", response_model=list[SegmentResponse])
+def redecode_job(
+    job_id: str,
+    payload: RedecodeRequest,
+    request: Request,
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    job = _load_job_or_404(db, job_id)
+    _assert_job_session_active(db, job, principal)
+    if job.status != JobStatus.DONE:
+        raise HTTPException(status_code=409, detail="job_not_done")
+
+    overrides = payload.model_dump(exclude_none=True)
+    try:
+        redecode_job_segments(db, job, runtime_config_overrides=overrides)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    audit_log("job.redecode", request=request, job_id=job.id, overrides=overrides, user_id=principal.user_id)
+
+    stmt = select(TranscriptSegment).where(TranscriptSegment.job_id == job.id).order_by(TranscriptSegment.order_index.asc())
+    return [_segment_to_response(segment) for segment in db.scalars(stmt).all()]
+
+
 @router.post(
     "/jobs/{job_id}/export",
     response_model=ExportResponse,
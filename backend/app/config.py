@@ -29,6 +29,19 @@ class Settings(BaseSettings):
     hf_grammar_enabled: bool = False
     hf_grammar_service_url: str = ""
     hf_grammar_timeout_seconds: float = 8.0
+    runtime_runner_cache_max_models: int = 4
+    runtime_runner_cache_max_bytes: int = 2147483648  # 2 GB of model files kept loaded per process
+    runtime_window_store_enabled: bool = False
+    runtime_stage_metrics_enabled: bool = True
+    runtime_shard_workers: int = 0  # >1 runs long videos as parallel shards in a process pool
+    frame_store_enabled: bool = False
+    frame_store_dir: str = "/tmp/signflow-frame-store"
+    frame_store_max_bytes: int = 8589934592  # 8 GB of decoded uint8 frames on local disk
+    result_cache_enabled: bool = False
+    result_cache_dir: str = "/tmp/signflow-result-cache"
+    result_cache_max_bytes: int = 268435456  # 256 MB of stored predictions
+    result_cache_index: str = "local"  # local | redis
+    result_cache_redis_prefix: str = "signflow:result-cache"
     canary_model_id: str | None = None
     canary_traffic_percent: int = 0
     public_api_base_url: str = "http://localhost:8000"
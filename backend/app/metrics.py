@@ -1,7 +1,11 @@
 import time
+from collections.abc import Iterator
+from contextlib import contextmanager
 
 from fastapi import FastAPI, Request, Response
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from app.config import settings
 
 REQUEST_COUNT = Counter(
     "signflow_http_requests_total",
@@ -23,6 +27,60 @@ JOB_PROCESS_LATENCY = Histogram(
     "Job processing latency in seconds",
     ["outcome"],
 )
+RUNTIME_STAGE_LATENCY = Histogram(
+    "signflow_runtime_stage_seconds",
+    "Per-video time spent in each inference stage",
+    ["stage", "model_version", "framework"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+RUNTIME_FRAMES_DECODED = Counter(
+    "signflow_runtime_frames_decoded_total",
+    "Video frames pulled from the decoder by runtime inference",
+    ["model_version", "framework"],
+)
+RUNTIME_WINDOWS_INFERRED = Counter(
+    "signflow_runtime_windows_inferred_total",
+    "Windows scored by the model (motion-gated windows excluded)",
+    ["model_version", "framework"],
+)
+RUNTIME_RUNNER_CACHE_EVENTS = Counter(
+    "signflow_runtime_runner_cache_events_total",
+    "Runtime model runner cache events (hit/miss/eviction)",
+    ["event"],
+)
+RUNTIME_RESULT_CACHE_EVENTS = Counter(
+    "signflow_runtime_result_cache_events_total",
+    "Inference result cache events (hit/miss/eviction/error)",
+    ["event"],
+)
+RUNTIME_FRAME_STORE_EVENTS = Counter(
+    "signflow_runtime_frame_store_events_total",
+    "Decoded frame store events (hit/miss/eviction/error)",
+    ["event"],
+)
+RUNTIME_RUNNER_CACHE_MODELS = Gauge(
+    "signflow_runtime_runner_cache_models",
+    "Model runners currently held in the process-wide cache",
+)
+RUNTIME_RUNNER_CACHE_BYTES = Gauge(
+    "signflow_runtime_runner_cache_bytes",
+    "Estimated bytes of model files held in the process-wide runner cache",
+)
+RUNTIME_PIPELINE_WAIT = Histogram(
+    "signflow_runtime_pipeline_wait_seconds",
+    "Per-video time a pipelined inference stage spent waiting on its neighbour",
+    ["stage"],
+)
+RUNTIME_PIPELINE_QUEUE_DEPTH = Histogram(
+    "signflow_runtime_pipeline_queue_max_depth",
+    "Per-video maximum depth of the ready-clip queue in pipelined inference",
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64),
+)
+RUNTIME_SKIPPED_WINDOW_RATIO = Histogram(
+    "signflow_runtime_skipped_window_ratio",
+    "Per-video share of windows skipped by the motion gate",
+    buckets=(0.0, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0),
+)
 
 
 def observe_job_processing(outcome: str, elapsed_seconds: float) -> None:
@@ -30,6 +88,58 @@ def observe_job_processing(outcome: str, elapsed_seconds: float) -> None:
     JOB_PROCESS_LATENCY.labels(outcome).observe(max(elapsed_seconds, 0.0))
 
 
+def observe_runtime_stage(stage: str, seconds: float, *, model_version: str | None, framework: str | None) -> None:
+    if not settings.runtime_stage_metrics_enabled:
+        return
+    RUNTIME_STAGE_LATENCY.labels(stage, model_version or "unknown", framework or "unknown").observe(max(seconds, 0.0))
+
+
+def observe_runtime_volume(frames: int, windows: int, *, model_version: str | None, framework: str | None) -> None:
+    if not settings.runtime_stage_metrics_enabled:
+        return
+    labels = (model_version or "unknown", framework or "unknown")
+    RUNTIME_FRAMES_DECODED.labels(*labels).inc(max(frames, 0))
+    RUNTIME_WINDOWS_INFERRED.labels(*labels).inc(max(windows, 0))
+
+
+@contextmanager
+def runtime_stage_timer(stage: str, *, model_version: str | None, framework: str | None) -> Iterator[None]:
+    # Times the block only on success paths; a failing stage is reported by the job metrics.
+    if not settings.runtime_stage_metrics_enabled:
+        yield
+        return
+    started = time.perf_counter()
+    yield
+    observe_runtime_stage(stage, time.perf_counter() - started, model_version=model_version, framework=framework)
+
+
+def observe_runner_cache_event(event: str) -> None:
+    RUNTIME_RUNNER_CACHE_EVENTS.labels(event).inc()
+
+
+def observe_result_cache_event(event: str) -> None:
+    RUNTIME_RESULT_CACHE_EVENTS.labels(event).inc()
+
+
+def observe_frame_store_event(event: str) -> None:
+    RUNTIME_FRAME_STORE_EVENTS.labels(event).inc()
+
+
+def observe_runner_cache_size(models: int, size_bytes: int) -> None:
+    RUNTIME_RUNNER_CACHE_MODELS.set(models)
+    RUNTIME_RUNNER_CACHE_BYTES.set(size_bytes)
+
+
+def observe_pipeline_run(decode_blocked_seconds: float, inference_starved_seconds: float, queue_max_depth: int) -> None:
+    RUNTIME_PIPELINE_WAIT.labels("decode_blocked").observe(max(decode_blocked_seconds, 0.0))
+    RUNTIME_PIPELINE_WAIT.labels("inference_starved").observe(max(inference_starved_seconds, 0.0))
+    RUNTIME_PIPELINE_QUEUE_DEPTH.observe(max(queue_max_depth, 0))
+
+
+def observe_motion_gate_run(skipped_ratio: float) -> None:
+    RUNTIME_SKIPPED_WINDOW_RATIO.observe(min(max(skipped_ratio, 0.0), 1.0))
+
+
 def install_metrics(app: FastAPI) -> None:
     @app.middleware("http")
     async def metrics_middleware(request: Request, call_next):
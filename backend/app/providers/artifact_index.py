@@ -0,0 +1,134 @@
+import json
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from app.providers.runner_cache import normalize_framework
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_INDEX_NAME = "artifact_index.json"
+ARTIFACT_INDEX_VERSION = 1
+
+# Search order per framework; the first pattern with a match wins (sorted within a pattern).
+MODEL_FILE_PATTERNS = {
+    "onnx": ["model.onnx", "*.onnx"],
+    "torchscript": ["model.ts", "model.torchscript", "model.pt", "*.torchscript", "*.jit", "*.pt"],
+}
+
+_memo: dict[str, dict[str, Any]] = {}
+_memo_lock = Lock()
+
+
+def resolve_model_path(root: Path, framework: str) -> Path:
+    # Hot path: one stat() against the indexed model file. The recursive scan only runs when
+    # the index is missing or its entry went stale, and then refreshes the index.
+    normalized = normalize_framework(framework)
+    if normalized not in MODEL_FILE_PATTERNS:
+        raise RuntimeError(f"unsupported_framework:{framework}")
+
+    indexed = indexed_model_path(root, normalized)
+    if indexed is not None:
+        return indexed
+
+    model_file = find_model_file(root, normalized)
+    if not model_file:
+        raise RuntimeError(f"runtime_model_file_not_found:{framework}")
+    build_artifact_index(root)
+    return model_file
+
+
+def find_model_file(root: Path, framework: str) -> Path | None:
+    for pattern in MODEL_FILE_PATTERNS[normalize_framework(framework)]:
+        matches = sorted(path for path in root.rglob(pattern) if path.is_file())
+        if matches:
+            return matches[0]
+    return None
+
+
+def indexed_model_path(root: Path, framework: str) -> Path | None:
+    entry = load_artifact_index(root).get("models", {}).get(normalize_framework(framework))
+    if not isinstance(entry, dict):
+        return None
+    path = root / str(entry.get("path", ""))
+    if not _signature_matches(path, entry):
+        return None
+    return path
+
+
+def has_indexed_model(root: Path) -> bool:
+    return any(indexed_model_path(root, framework) is not None for framework in MODEL_FILE_PATTERNS)
+
+
+def ensure_artifact_index(root: Path) -> dict[str, Any]:
+    # Cheap when every indexed file still matches its recorded signature.
+    index = load_artifact_index(root)
+    if index and all(
+        isinstance(entry, dict) and _signature_matches(root / str(entry.get("path", "")), entry)
+        for entry in index.get("models", {}).values()
+    ):
+        return index
+    return build_artifact_index(root)
+
+
+def build_artifact_index(root: Path) -> dict[str, Any]:
+    models: dict[str, Any] = {}
+    for framework in MODEL_FILE_PATTERNS:
+        model_file = find_model_file(root, framework)
+        if model_file is not None:
+            models[framework] = {"path": model_file.relative_to(root).as_posix(), **_file_signature(model_file)}
+    index = {"version": ARTIFACT_INDEX_VERSION, "models": models}
+
+    with _memo_lock:
+        _memo[_memo_key(root)] = index
+    index_path = root / ARTIFACT_INDEX_NAME
+    tmp_path = index_path.with_suffix(".json.tmp")
+    try:
+        tmp_path.write_text(json.dumps(index, ensure_ascii=True, indent=2), encoding="utf-8")
+        tmp_path.replace(index_path)
+    except OSError as exc:
+        # Read-only artifact caches keep the in-process copy only.
+        logger.warning("artifact index write failed: path=%s error=%s", index_path, exc)
+    return index
+
+
+def load_artifact_index(root: Path) -> dict[str, Any]:
+    key = _memo_key(root)
+    with _memo_lock:
+        cached = _memo.get(key)
+    if cached is not None:
+        return cached
+
+    index_path = root / ARTIFACT_INDEX_NAME
+    try:
+        raw = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(raw, dict) or raw.get("version") != ARTIFACT_INDEX_VERSION:
+        return {}
+    with _memo_lock:
+        _memo[key] = raw
+    return raw
+
+
+def clear_artifact_index_memo() -> None:
+    with _memo_lock:
+        _memo.clear()
+
+
+def _memo_key(root: Path) -> str:
+    return str(root.absolute())
+
+
+def _file_signature(path: Path) -> dict[str, int]:
+    stat = path.stat()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _signature_matches(path: Path, entry: dict[str, Any]) -> bool:
+    try:
+        signature = _file_signature(path)
+    except OSError:
+        return False
+    return all(entry.get(key) == value for key, value in signature.items())
@@ -0,0 +1,150 @@
+import heapq
+import threading
+from typing import Any
+
+
+class ClipPreprocessor:
+    # Turns decoded BGR frames into the model input layout [N, C, T, H, W] float32.
+    # Frames are first resized to uint8 [H, W, 3] (cheap to cache and stack); the
+    # BGR->RGB swap, unit scaling and mean/std normalisation are folded into one
+    # per-channel scale/shift pair applied while writing into the output layout.
+    def __init__(self, *, input_size: int, mean: list[float], std: list[float], normalize_to_unit: bool) -> None:
+        import numpy as np
+
+        unit = 1.0 / 255.0 if normalize_to_unit else 1.0
+        self.input_size = input_size
+        self.scale = np.asarray([unit / value for value in std], dtype=np.float32)
+        self.shift = np.asarray([-m / s for m, s in zip(mean, std, strict=True)], dtype=np.float32)
+
+    def resize_frame(self, frame, dst=None):
+        import cv2  # type: ignore[import-untyped]
+
+        size = (self.input_size, self.input_size)
+        if frame.shape[:2] == size:
+            # Already at input resolution (e.g. a decoded frame store view): nothing to copy.
+            return frame
+        if dst is None:
+            return cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+        return cv2.resize(frame, size, dst=dst, interpolation=cv2.INTER_LINEAR)
+
+    def normalize_block(self, block, out=None):
+        # block: uint8 [T, H, W, 3] in BGR order; out: float32 [C, T, H, W] (may be a batch slot view).
+        import numpy as np
+
+        if out is None:
+            out = np.empty((3, *block.shape[:3]), dtype=np.float32)
+        for channel in range(3):
+            target = out[channel]
+            np.multiply(block[..., 2 - channel], self.scale[channel], out=target)
+            target += self.shift[channel]
+        return out
+
+    def normalize_frame(self, frame, out):
+        # frame: uint8 [H, W, 3] BGR; out: float32 [C, H, W] view (one time step of a clip slot).
+        import numpy as np
+
+        for channel in range(3):
+            target = out[channel]
+            np.multiply(frame[..., 2 - channel], self.scale[channel], out=target)
+            target += self.shift[channel]
+        return out
+
+    def clip_from_resized(self, frames: list[Any]):
+        import numpy as np
+
+        block = np.stack(frames, axis=0)  # [T, H, W, 3] uint8
+        clip = np.empty((1, 3, *block.shape[:3]), dtype=np.float32)
+        self.normalize_block(block, out=clip[0])
+        return clip  # [N, C, T, H, W]
+
+    def clip_from_frames(self, raw_frames: list[Any]):
+        return self.clip_from_resized([self.resize_frame(frame) for frame in raw_frames])
+
+
+class ClipAssembler:
+    # Owns a reusable float32 [slots, C, T, H, W] buffer and writes each window straight into a
+    # slot: frames are resized with cv2 dst= into a per-thread scratch frame (or taken from the
+    # frame cache) and normalised in place into their time step, so a window allocates nothing
+    # in steady state. Slots are handed out lowest-index first; a serial producer that releases
+    # a whole batch at once therefore always fills rows 0..B-1 and rows() can return the buffer
+    # itself instead of gathering. `buffer` may be supplied (e.g. a runner's bound input view).
+    def __init__(self, *, preprocessor: ClipPreprocessor, num_frames: int, slots: int, buffer=None) -> None:
+        import numpy as np
+
+        size = preprocessor.input_size
+        self.preprocessor = preprocessor
+        self.num_frames = num_frames
+        self.clip_shape = (3, num_frames, size, size)
+        if buffer is None:
+            buffer = np.empty((max(slots, 1), *self.clip_shape), dtype=np.float32)
+        self.buffer = buffer
+        self._gather: Any = None
+        # Frames resized outside the frame cache (its misses are counted by the cache itself).
+        self.frames_resized = 0
+        self._free = list(range(self.buffer.shape[0]))
+        self._available = threading.Condition()
+        self._local = threading.local()
+
+    def acquire(self) -> int:
+        with self._available:
+            while not self._free:
+                self._available.wait()
+            return heapq.heappop(self._free)
+
+    def release(self, slots: list[int]) -> None:
+        with self._available:
+            for slot in slots:
+                heapq.heappush(self._free, slot)
+            self._available.notify_all()
+
+    def assemble(self, slot: int, indexed_frames: list[tuple[int, Any]], frame_cache=None):
+        # Returns the [1, C, T, H, W] view of the filled slot; short windows repeat the last frame.
+        import numpy as np
+
+        if not indexed_frames:
+            raise RuntimeError("window_decode_failed")
+        clip = self.buffer[slot]
+        use_cache = frame_cache is not None and frame_cache.max_bytes > 0
+        written = min(len(indexed_frames), self.num_frames)
+        for step in range(written):
+            index, frame = indexed_frames[step]
+            if use_cache:
+                resized = frame_cache.get_or_compute(
+                    index,
+                    lambda frame=frame: self.preprocessor.resize_frame(frame),
+                )
+            else:
+                resized = self.preprocessor.resize_frame(frame, dst=self._scratch())
+            self.preprocessor.normalize_frame(resized, clip[:, step])
+        for step in range(written, self.num_frames):
+            np.copyto(clip[:, step], clip[:, written - 1])
+        if not use_cache:
+            # Pipelined mode assembles on several worker threads.
+            with self._available:
+                self.frames_resized += written
+        return self.buffer[slot : slot + 1]
+
+    def rows(self, slots: list[int]):
+        # Consecutive slots are already a batch; anything else has to be gathered.
+        first = slots[0]
+        if slots != list(range(first, first + len(slots))):
+            return None
+        if first == 0 and len(slots) == self.buffer.shape[0]:
+            return self.buffer
+        return self.buffer[first : first + len(slots)]
+
+    def gather_buffer(self, rows: int):
+        import numpy as np
+
+        if self._gather is None or self._gather.shape[0] < rows:
+            self._gather = np.empty((rows, *self.clip_shape), dtype=np.float32)
+        return self._gather if self._gather.shape[0] == rows else self._gather[:rows]
+
+    def _scratch(self):
+        import numpy as np
+
+        scratch = getattr(self._local, "frame", None)
+        if scratch is None:
+            size = self.preprocessor.input_size
+            scratch = self._local.frame = np.empty((size, size, 3), dtype=np.uint8)
+        return scratch
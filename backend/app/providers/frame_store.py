@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from threading import Lock
+
+from app.config import settings
+from app.metrics import observe_frame_store_event
+from app.providers.result_cache import file_sha256
+
+logger = logging.getLogger(__name__)
+
+FRAME_STORE_FORMAT = 1
+
+
+class StoredFrameCapture:
+    # cv2.VideoCapture stand-in over a decoded frame store, so the sequential/seek decoders and
+    # rewinds work unchanged: grab() and seeks only move the cursor, and retrieve() returns a
+    # zero-copy view of the memory-mapped frame (uint8 [S, S, 3] BGR).
+    def __init__(self, frames, *, fps: float) -> None:
+        self._frames = frames
+        self._fps = fps
+        self._position = 0
+
+    def isOpened(self) -> bool:
+        return self._frames is not None
+
+    def get(self, prop: int) -> float:
+        import cv2  # type: ignore[import-untyped]
+
+        if prop == cv2.CAP_PROP_FPS:
+            return self._fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self._frames))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._position)
+        return 0.0
+
+    def set(self, prop: int, value: float) -> bool:
+        import cv2  # type: ignore[import-untyped]
+
+        if prop != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        self._position = max(int(value), 0)
+        return True
+
+    def grab(self) -> bool:
+        if self._frames is None or self._position >= len(self._frames):
+            return False
+        self._position += 1
+        return True
+
+    def retrieve(self):
+        if self._frames is None or not 0 < self._position <= len(self._frames):
+            return False, None
+        return True, self._frames[self._position - 1]
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self) -> None:
+        self._frames = None
+
+
+class FrameStore:
+    # One uint8 [frames, S, S, 3] .npy per (video content, input size), written by a single
+    # full decode at model input resolution and memory-mapped by every later run. Stores are
+    # evicted least recently opened first (file mtime, refreshed on open) to stay within
+    # max_bytes; an evicted file that is still mapped stays readable until it is closed.
+    def __init__(self, root: Path, *, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+
+    def open(self, video_path: Path, *, input_size: int) -> StoredFrameCapture | None:
+        # None means "decode the video directly" (unknown length, over budget, write failure).
+        key = f"{file_sha256(video_path)}-{input_size}"
+        frames_path = self.root / f"{key}.npy"
+        meta_path = self.root / f"{key}.json"
+        try:
+            opened = self._open_existing(frames_path, meta_path)
+            if opened is not None:
+                observe_frame_store_event("hit")
+                return opened
+            observe_frame_store_event("miss")
+            return self._build(video_path, frames_path, meta_path, input_size=input_size)
+        except Exception as exc:
+            logger.warning("frame store unavailable: video=%s error=%s", video_path, exc)
+            observe_frame_store_event("error")
+            return None
+
+    def _open_existing(self, frames_path: Path, meta_path: Path) -> StoredFrameCapture | None:
+        import numpy as np
+
+        if not meta_path.is_file() or not frames_path.is_file():
+            return None
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("format") != FRAME_STORE_FORMAT:
+            return None
+        frames = np.load(frames_path, mmap_mode="r")
+        # Explicit ns timestamp: the kernel's own utime clock is too coarse to order back-to-back opens.
+        now_ns = time.time_ns()
+        os.utime(frames_path, ns=(now_ns, now_ns))
+        return StoredFrameCapture(frames[: int(meta["frame_count"])], fps=float(meta["fps"]))
+
+    def _build(self, video_path: Path, frames_path: Path, meta_path: Path, *, input_size: int):
+        import cv2  # type: ignore[import-untyped]
+        import numpy as np
+
+        capture = cv2.VideoCapture(str(video_path))
+        if not capture.isOpened():
+            return None
+        try:
+            fps = float(capture.get(cv2.CAP_PROP_FPS) or 0.0)
+            if fps <= 1e-3:
+                fps = 25.0
+            frame_count = max(int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0), 0)
+            size_bytes = frame_count * input_size * input_size * 3
+            if frame_count <= 0 or size_bytes > self.max_bytes:
+                return None
+            self._evict(reserve_bytes=size_bytes, keep=frames_path)
+
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp_path = frames_path.with_name(f"{frames_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                frames = np.lib.format.open_memmap(
+                    tmp_path,
+                    mode="w+",
+                    dtype=np.uint8,
+                    shape=(frame_count, input_size, input_size, 3),
+                )
+                # Same resize as ClipPreprocessor.resize_frame, so stored frames are bit-identical
+                # to the ones a direct decode would feed the model.
+                decoded = 0
+                while decoded < frame_count:
+                    ok, frame = capture.read()
+                    if not ok or frame is None:
+                        break
+                    cv2.resize(frame, (input_size, input_size), dst=frames[decoded], interpolation=cv2.INTER_LINEAR)
+                    decoded += 1
+                frames.flush()
+                del frames
+                if decoded == 0:
+                    return None
+                tmp_path.replace(frames_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+        finally:
+            capture.release()
+
+        meta = {"format": FRAME_STORE_FORMAT, "fps": fps, "frame_count": decoded, "input_size": input_size}
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+        return self._open_existing(frames_path, meta_path)
+
+    def _evict(self, *, reserve_bytes: int, keep: Path) -> None:
+        with self._lock:
+            stores: list[tuple[float, int, Path]] = []
+            for path in self.root.glob("*.npy") if self.root.is_dir() else []:
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if path != keep:
+                    stores.append((stat.st_mtime, stat.st_size, path))
+            stores.sort()
+            total = sum(size for _, size, _ in stores)
+            for _, size, path in stores:
+                if total + reserve_bytes <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                path.with_suffix(".json").unlink(missing_ok=True)
+                total -= size
+                observe_frame_store_event("eviction")
+
+
+_frame_store: FrameStore | None = None
+_frame_store_lock = Lock()
+
+
+def get_frame_store() -> FrameStore | None:
+    global _frame_store
+    if not settings.frame_store_enabled:
+        return None
+    with _frame_store_lock:
+        if _frame_store is None:
+            _frame_store = FrameStore(Path(settings.frame_store_dir), max_bytes=settings.frame_store_max_bytes)
+        return _frame_store
+
+
+def reset_frame_store() -> None:
+    global _frame_store
+    with _frame_store_lock:
+        _frame_store = None
@@ -1,16 +1,46 @@
 import json
 import logging
 from pathlib import Path
+from time import perf_counter
 
 from app.config import settings
+from app.metrics import observe_runtime_stage, runtime_stage_timer
 from app.providers.base import ModelProvider, ProviderSegment
+from app.providers.runner_cache import normalize_framework
 from app.providers.runtime_classifier import infer_gesture_labels
+from app.providers.segment_decoders import RuntimePrediction
 from app.services.model_artifacts import ensure_model_artifacts
 from app.services.grammar import correct_russian_tokens
+from app.storage import make_window_store_object_key
 
 logger = logging.getLogger(__name__)
 
 
+def runtime_predictions_to_segments(predictions: list[RuntimePrediction]) -> list[ProviderSegment]:
+    segments: list[ProviderSegment] = []
+    for idx, prediction in enumerate(predictions):
+        start_sec = round(max(prediction.start_sec, 0.0), 3)
+        end_sec = round(max(prediction.end_sec, start_sec + 0.05), 3)
+        segments.append(
+            ProviderSegment(
+                order_index=idx,
+                start_sec=start_sec,
+                end_sec=end_sec,
+                text=f"Predicted gesture: {prediction.label}",
+                confidence=max(min(prediction.confidence, 1.0), 0.01),
+            )
+        )
+    return segments
+
+
+def _metric_labels(options: dict | None) -> dict[str, str | None]:
+    framework = options.get("framework") if options else None
+    return {
+        "model_version": options.get("model_id") if options else None,
+        "framework": normalize_framework(framework) if isinstance(framework, str) else None,
+    }
+
+
 class HuggingFaceProvider(ModelProvider):
     name = "huggingface"
 
@@ -85,13 +115,15 @@ class HuggingFaceProvider(ModelProvider):
 
         return None
 
-    def _runtime_segments(
+    def _runtime_predictions(
         self,
         *,
         video_object_key: str,
         artifact_path: str | None,
         framework: str | None,
-    ) -> list[ProviderSegment] | None:
+        model_version_id: str | None = None,
+        job_id: str | None = None,
+    ) -> list[RuntimePrediction] | None:
         if not settings.hf_runtime_enabled:
             return None
         if not artifact_path or not framework:
@@ -103,11 +135,15 @@ class HuggingFaceProvider(ModelProvider):
         if normalized_framework not in {"onnx", "torchscript", "torch"}:
             return None
 
+        inference_options = {"model_version_id": model_version_id}
+        if settings.runtime_window_store_enabled and job_id:
+            inference_options["window_store_key"] = make_window_store_object_key(job_id)
         try:
             predictions = infer_gesture_labels(
                 video_object_key=video_object_key,
                 artifact_path=artifact_path,
                 framework=normalized_framework,
+                **inference_options,
             )
         except Exception as exc:
             logger.warning("runtime inference failed: framework=%s error=%s", normalized_framework, exc)
@@ -120,20 +156,13 @@ class HuggingFaceProvider(ModelProvider):
                 raise RuntimeError("runtime_empty_predictions")
             return None
 
-        segments: list[ProviderSegment] = []
-        for idx, prediction in enumerate(predictions):
-            start_sec = round(max(prediction.start_sec, 0.0), 3)
-            end_sec = round(max(prediction.end_sec, start_sec + 0.05), 3)
-            segments.append(
-                ProviderSegment(
-                    order_index=idx,
-                    start_sec=start_sec,
-                    end_sec=end_sec,
-                    text=f"Predicted gesture: {prediction.label}",
-                    confidence=max(min(prediction.confidence, 1.0), 0.01),
-                )
-            )
-        return segments
+        return predictions
+
+    def segments_from_runtime_predictions(
+        self, predictions: list[RuntimePrediction], options: dict | None = None
+    ) -> list[ProviderSegment]:
+        # Shared by transcribe and job redecoding, so both produce the same text.
+        return self._apply_optional_russian_grammar(runtime_predictions_to_segments(predictions), options)
 
     def _apply_optional_russian_grammar(
         self, segments: list[ProviderSegment], options: dict | None = None
@@ -155,7 +184,8 @@ class HuggingFaceProvider(ModelProvider):
                 text = text[len(prefix) :].strip()
             tokens.append(text)
 
-        corrected = correct_russian_tokens(tokens)
+        with runtime_stage_timer("grammar", **_metric_labels(options)):
+            corrected = correct_russian_tokens(tokens)
         if len(corrected) != len(tokens):
             return segments
 
@@ -198,13 +228,18 @@ class HuggingFaceProvider(ModelProvider):
         if not artifact_path and hf_repo:
             artifact_path = ensure_model_artifacts(model_label, hf_repo, hf_revision)
 
-        runtime_segments = self._runtime_segments(
+        started = perf_counter()
+        runtime_predictions = self._runtime_predictions(
             video_object_key=video_object_key,
             artifact_path=artifact_path,
             framework=framework,
+            model_version_id=options.get("model_id") if options else None,
+            job_id=options.get("job_id") if options else None,
         )
-        if runtime_segments:
-            return self._apply_optional_russian_grammar(runtime_segments, options)
+        if runtime_predictions:
+            segments = self.segments_from_runtime_predictions(runtime_predictions, options)
+            observe_runtime_stage("transcribe", perf_counter() - started, **_metric_labels(options))
+            return segments
 
         artifact_segments = self._segments_from_artifacts(artifact_path)
         if artifact_segments:
@@ -0,0 +1,106 @@
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from time import perf_counter
+from typing import Any, TypeVar
+
+ItemT = TypeVar("ItemT")
+ResultT = TypeVar("ResultT")
+
+_DONE = object()
+_FAILED = object()
+
+
+@dataclass
+class PipelineStats:
+    decode_sec: float = 0.0
+    preprocess_sec: float = 0.0
+    decode_blocked_sec: float = 0.0
+    inference_starved_sec: float = 0.0
+    queue_max_depth: int = 0
+    queue_depth_total: int = 0
+    queue_samples: int = 0
+
+    @property
+    def queue_mean_depth(self) -> float:
+        return round(self.queue_depth_total / self.queue_samples, 3) if self.queue_samples else 0.0
+
+
+def iter_pipelined(
+    source: Iterable[ItemT],
+    prepare: Callable[[ItemT], ResultT],
+    *,
+    queue_depth: int,
+    workers: int,
+    stats: PipelineStats,
+) -> Iterator[tuple[ItemT, ResultT]]:
+    # Producer/consumer split: a decode thread drains `source`, a thread pool runs `prepare`
+    # (OpenCV resize and numpy both release the GIL), and the caller consumes results in
+    # source order. The bounded queue caps the number of prepared clips held in memory.
+    ready: Queue = Queue(maxsize=max(queue_depth, 1))
+    stop = Event()
+    stats_lock = Lock()
+    pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="signflow-preprocess")
+
+    def timed_prepare(item: ItemT) -> ResultT:
+        started = perf_counter()
+        try:
+            return prepare(item)
+        finally:
+            with stats_lock:
+                stats.preprocess_sec += perf_counter() - started
+
+    def put(entry: tuple[Any, Any]) -> None:
+        blocked_at = perf_counter()
+        while not stop.is_set():
+            try:
+                ready.put(entry, timeout=0.05)
+                break
+            except Full:
+                continue
+        stats.decode_blocked_sec += perf_counter() - blocked_at
+
+    def produce() -> None:
+        try:
+            iterator = iter(source)
+            while not stop.is_set():
+                started = perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats.decode_sec += perf_counter() - started
+                put((item, pool.submit(timed_prepare, item)))
+        except BaseException as exc:
+            put((_FAILED, exc))
+            return
+        put((_DONE, None))
+
+    producer = Thread(target=produce, name="signflow-decode", daemon=True)
+    producer.start()
+    try:
+        while True:
+            waited_at = perf_counter()
+            depth = ready.qsize()
+            stats.queue_max_depth = max(stats.queue_max_depth, depth)
+            stats.queue_depth_total += depth
+            stats.queue_samples += 1
+            item, payload = ready.get()
+            if item is _DONE:
+                break
+            if item is _FAILED:
+                raise payload
+            result = payload.result()
+            stats.inference_starved_sec += perf_counter() - waited_at
+            yield item, result
+    finally:
+        stop.set()
+        while producer.is_alive():
+            try:
+                ready.get(timeout=0.05)
+            except Empty:
+                pass
+        producer.join()
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,87 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+from app.providers.runner_cache import normalize_framework
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_MANIFEST_NAME = "runtime_layout.json"
+
+# Probe order matches the historical TorchScript fallback chain.
+TORCHSCRIPT_PROBE_LAYOUTS = ["ncthw", "ntchw", "nviews_ncthw", "nviews_ntchw"]
+INPUT_LAYOUTS = {*TORCHSCRIPT_PROBE_LAYOUTS, "center_nchw"}
+
+
+def apply_input_layout(clips, layout: str):
+    # clips: float32 [N, C, T, H, W] -> contiguous model input for the given layout.
+    import numpy as np
+
+    if layout == "ncthw":
+        return clips
+    if layout == "ntchw":
+        return np.ascontiguousarray(clips.transpose(0, 2, 1, 3, 4))
+    if layout == "nviews_ncthw":
+        return clips[:, None]
+    if layout == "nviews_ntchw":
+        return np.ascontiguousarray(clips.transpose(0, 2, 1, 3, 4))[:, None]
+    if layout == "center_nchw":
+        return np.ascontiguousarray(clips[:, :, clips.shape[2] // 2])
+    raise RuntimeError(f"unsupported_input_layout:{layout}")
+
+
+def onnx_input_layout(input_shape: Any) -> str:
+    if not isinstance(input_shape, list):
+        return "ncthw"
+    if len(input_shape) == 5:
+        channel_dim = input_shape[1] if isinstance(input_shape[1], int) else None
+        temporal_dim = input_shape[2] if isinstance(input_shape[2], int) else None
+        if channel_dim != 3 and temporal_dim == 3:
+            return "ntchw"
+        return "ncthw"
+    if len(input_shape) == 4:
+        return "center_nchw"
+    return "ncthw"
+
+
+def _model_signature(model_path: Path) -> dict[str, Any]:
+    stat = model_path.stat()
+    return {"model_file": model_path.name, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def load_layout_manifest(root: Path, model_path: Path, framework: str) -> str | None:
+    manifest_path = root / LAYOUT_MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    try:
+        raw = json.loads(manifest_path.read_text(encoding="utf-8"))
+        entry = raw.get(normalize_framework(framework)) if isinstance(raw, dict) else None
+        if not isinstance(entry, dict):
+            return None
+        signature = _model_signature(model_path)
+        if any(entry.get(key) != value for key, value in signature.items()):
+            return None
+        layout = entry.get("layout")
+    except Exception:
+        return None
+    return layout if layout in INPUT_LAYOUTS else None
+
+
+def save_layout_manifest(root: Path, model_path: Path, framework: str, layout: str) -> None:
+    manifest_path = root / LAYOUT_MANIFEST_NAME
+    try:
+        raw = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    except Exception:
+        raw = {}
+    if not isinstance(raw, dict):
+        raw = {}
+    raw[normalize_framework(framework)] = {**_model_signature(model_path), "layout": layout}
+
+    tmp_path = manifest_path.with_suffix(".json.tmp")
+    try:
+        tmp_path.write_text(json.dumps(raw, ensure_ascii=True, indent=2), encoding="utf-8")
+        tmp_path.replace(manifest_path)
+    except OSError as exc:
+        # Read-only artifact caches still work; the layout is just re-probed per process.
+        logger.warning("layout manifest write failed: path=%s error=%s", manifest_path, exc)
@@ -0,0 +1,55 @@
+from threading import Lock
+from typing import Any
+
+
+class MotionGate:
+    # Cheap activity estimate over the frames a window samples: each frame is reduced once to a
+    # small grayscale thumbnail (cached by frame index, so overlapping windows share the work)
+    # and a window is idle when no consecutive pair of its sampled frames differs by more than
+    # `threshold` mean absolute intensity (0..255). Taking the max pair keeps brief movements
+    # inside an otherwise still window from being skipped.
+    def __init__(self, *, threshold: float, thumbnail_size: int = 32) -> None:
+        self.threshold = threshold
+        self.thumbnail_size = thumbnail_size
+        self.windows_checked = 0
+        self.windows_idle = 0
+        self._thumbnails: dict[int, Any] = {}
+        self._lock = Lock()
+
+    def is_idle(self, indexed_frames: list[tuple[int, Any]]) -> bool:
+        idle = self.activity(indexed_frames) < self.threshold
+        with self._lock:
+            self.windows_checked += 1
+            self.windows_idle += int(idle)
+        return idle
+
+    def activity(self, indexed_frames: list[tuple[int, Any]]) -> float:
+        import cv2  # type: ignore[import-untyped]
+
+        peak = 0.0
+        previous = None
+        for index, frame in indexed_frames:
+            current = self._thumbnail(index, frame)
+            if previous is not None and current is not previous:
+                peak = max(peak, float(cv2.absdiff(current, previous).mean()))
+            previous = current
+        return peak
+
+    def discard_before(self, index: int) -> None:
+        with self._lock:
+            stale = [key for key in self._thumbnails if key < index]
+            for key in stale:
+                del self._thumbnails[key]
+
+    def _thumbnail(self, index: int, frame):
+        import cv2  # type: ignore[import-untyped]
+
+        with self._lock:
+            cached = self._thumbnails.get(index)
+        if cached is not None:
+            return cached
+        size = (self.thumbnail_size, self.thumbnail_size)
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        thumbnail = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        with self._lock:
+            return self._thumbnails.setdefault(index, thumbnail)
@@ -0,0 +1,344 @@
+import logging
+import os
+import re
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+ONNX_EXECUTION_MODES = {"sequential", "parallel"}
+ONNX_GRAPH_OPTIMIZATION_LEVELS = ("disable", "basic", "extended", "all")
+OPTIMIZED_MODEL_DIR = "ort_optimized"
+# Not an .onnx suffix on purpose: the artifact index globs *.onnx for the source model.
+OPTIMIZED_MODEL_SUFFIX = ".optimized"
+# ENABLE_ALL adds layout/kernel choices tied to the CPU that ran them, and artifact directories
+# are shared between hosts, so cached graphs stop at "extended"; "all" passes re-run at load.
+MAX_SERIALIZED_LEVEL = "extended"
+DEFAULT_IO_BINDING_MAX_BYTES = 256 * 1024 * 1024
+# runtime_config.json keys read by onnx_session_options().
+ONNX_SESSION_CONFIG_KEYS = (
+    "onnx_intra_op_threads",
+    "onnx_inter_op_threads",
+    "onnx_execution_mode",
+    "onnx_graph_optimization_level",
+    "onnx_enable_cpu_mem_arena",
+    "onnx_enable_mem_pattern",
+    "onnx_cache_optimized_model",
+    "onnx_io_binding",
+)
+
+
+@dataclass(frozen=True)
+class OnnxSessionOptions:
+    # 0 threads means "let ONNX Runtime decide" (one intra-op thread per physical core).
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0
+    execution_mode: str = "sequential"
+    graph_optimization_level: str = "all"
+    enable_cpu_mem_arena: bool = True
+    enable_mem_pattern: bool = True
+    cache_optimized_model: bool = True
+    io_binding: bool = False
+
+
+def onnx_session_options(config: Mapping[str, Any]) -> OnnxSessionOptions:
+    execution_mode = str(config.get("onnx_execution_mode", "sequential")).strip().lower()
+    level = str(config.get("onnx_graph_optimization_level", "all")).strip().lower()
+    return OnnxSessionOptions(
+        intra_op_threads=_as_threads(config.get("onnx_intra_op_threads")),
+        inter_op_threads=_as_threads(config.get("onnx_inter_op_threads")),
+        execution_mode=execution_mode if execution_mode in ONNX_EXECUTION_MODES else "sequential",
+        graph_optimization_level=level if level in ONNX_GRAPH_OPTIMIZATION_LEVELS else "all",
+        enable_cpu_mem_arena=config.get("onnx_enable_cpu_mem_arena") is not False,
+        enable_mem_pattern=config.get("onnx_enable_mem_pattern") is not False,
+        cache_optimized_model=config.get("onnx_cache_optimized_model") is not False,
+        io_binding=config.get("onnx_io_binding") is True,
+    )
+
+
+def build_session_options(options: OnnxSessionOptions, *, graph_optimization_level: str | None = None):
+    import onnxruntime as ort
+
+    levels = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    session_options = ort.SessionOptions()
+    session_options.intra_op_num_threads = options.intra_op_threads
+    session_options.inter_op_num_threads = options.inter_op_threads
+    session_options.execution_mode = (
+        ort.ExecutionMode.ORT_PARALLEL if options.execution_mode == "parallel" else ort.ExecutionMode.ORT_SEQUENTIAL
+    )
+    session_options.graph_optimization_level = levels[graph_optimization_level or options.graph_optimization_level]
+    session_options.enable_cpu_mem_arena = options.enable_cpu_mem_arena
+    session_options.enable_mem_pattern = options.enable_mem_pattern
+    return session_options
+
+
+def serialized_optimization_level(options: OnnxSessionOptions) -> str:
+    levels = ONNX_GRAPH_OPTIMIZATION_LEVELS
+    return levels[min(levels.index(options.graph_optimization_level), levels.index(MAX_SERIALIZED_LEVEL))]
+
+
+def optimized_model_path(model_path: Path, cache_dir: Path, options: OnnxSessionOptions) -> Path:
+    # Optimized graphs are only valid for the source file, optimization level and ORT build
+    # that produced them, so all three are part of the name.
+    import onnxruntime as ort
+
+    stat = model_path.stat()
+    name = (
+        f"{model_path.stem}-{stat.st_mtime_ns}-{stat.st_size}-{serialized_optimization_level(options)}"
+        f"-ort{ort.__version__}{OPTIMIZED_MODEL_SUFFIX}"
+    )
+    return cache_dir / OPTIMIZED_MODEL_DIR / name
+
+
+def create_onnx_session(
+    model_path: Path,
+    options: OnnxSessionOptions,
+    *,
+    cache_dir: Path | None = None,
+    providers: list[str] | None = None,
+):
+    # Returns (session, source) where source is "cached", "optimized" (graph written to the
+    # cache on this call) or "model" (no caching).
+    import onnxruntime as ort
+
+    providers = providers or ["CPUExecutionProvider"]
+    cacheable = options.cache_optimized_model and options.graph_optimization_level != "disable"
+    if cache_dir is None or not cacheable:
+        return ort.InferenceSession(str(model_path), build_session_options(options), providers=providers), "model"
+
+    cached = optimized_model_path(model_path, cache_dir, options)
+    serialized_level = serialized_optimization_level(options)
+    # Up to the serialized level the cached graph is already optimized and re-running those
+    # passes would only cost time; above it, the host-specific passes run on every load.
+    load_level = "disable" if serialized_level == options.graph_optimization_level else options.graph_optimization_level
+    if cached.is_file():
+        try:
+            session_options = build_session_options(options, graph_optimization_level=load_level)
+            return ort.InferenceSession(str(cached), session_options, providers=providers), "cached"
+        except Exception as exc:
+            logger.warning("optimized onnx model unusable, rebuilding: path=%s error=%s", cached, exc)
+            cached.unlink(missing_ok=True)
+
+    session_options = build_session_options(options, graph_optimization_level=serialized_level)
+    tmp_path = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    try:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+    except OSError as exc:
+        logger.warning("optimized onnx cache unavailable: path=%s error=%s", cached.parent, exc)
+        return ort.InferenceSession(str(model_path), session_options, providers=providers), "model"
+
+    session_options.optimized_model_filepath = str(tmp_path)
+    try:
+        session = ort.InferenceSession(str(model_path), session_options, providers=providers)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    if not tmp_path.is_file():
+        return session, "model"
+    try:
+        tmp_path.replace(cached)
+    except OSError as exc:
+        logger.warning("optimized onnx model write failed: path=%s error=%s", cached, exc)
+        tmp_path.unlink(missing_ok=True)
+        return session, "model"
+    _prune_optimized_models(cached, model_stem=model_path.stem)
+    if load_level != "disable":
+        # The session that wrote the cache stopped at the serialized level; load the cached
+        # graph the way later processes will, so this one gets the host-specific passes too.
+        session = ort.InferenceSession(
+            str(cached),
+            build_session_options(options, graph_optimization_level=load_level),
+            providers=providers,
+        )
+    return session, "optimized"
+
+
+class _BoundBuffers:
+    __slots__ = ("key", "model_input", "clip_view", "output", "binding")
+
+    def __init__(self, key, model_input, clip_view, binding) -> None:
+        self.key = key
+        self.model_input = model_input
+        self.clip_view = clip_view
+        self.output: Any = None
+        self.binding = binding
+
+    @property
+    def nbytes(self) -> int:
+        return self.model_input.nbytes + (self.output.nbytes if self.output is not None else 0)
+
+
+class OnnxIoBinding:
+    # Bound-IO execution: preallocated model-layout input and output buffers per (rows, clip
+    # shape), bound once and reused across calls. clip_buffer() lends out an [N, C, T, H, W]
+    # view of an input buffer so callers can assemble a batch in place; the lent set is taken
+    # back when that view is passed to __call__. With keep=True it stays with the caller across
+    # calls (a serial scan assembles every batch in it) until release_clip_buffer().
+    # An IOBinding must not be shared by concurrent runs, so every call checks a set out of one
+    # pool per session and returns it afterwards. Idle sets are kept up to max_bytes (oldest
+    # dropped first), so retained memory does not grow with the number of calling threads.
+    # Logits are copied out of the bound output before the set goes back to the pool.
+    # A lent view that never reaches __call__ (the caller split or dropped the batch) is
+    # forgotten after max_lent newer loans and left to the garbage collector.
+    def __init__(
+        self,
+        session,
+        *,
+        layout: str,
+        max_bytes: int = DEFAULT_IO_BINDING_MAX_BYTES,
+        max_lent: int = 64,
+    ) -> None:
+        self.session = session
+        self.layout = layout
+        self.max_bytes = max_bytes
+        self.max_lent = max_lent
+        self.input_name = session.get_inputs()[0].name
+        self.output_name = session.get_outputs()[0].name
+        self._lock = threading.Lock()
+        self._idle: list[_BoundBuffers] = []
+        self._idle_bytes = 0
+        self._lent: dict[int, _BoundBuffers] = {}
+        self._kept: dict[int, _BoundBuffers] = {}
+
+    @property
+    def retained_bytes(self) -> int:
+        with self._lock:
+            held = [*self._lent.values(), *self._kept.values()]
+            return self._idle_bytes + sum(buffers.nbytes for buffers in held)
+
+    def clip_buffer(self, rows: int, clip_shape: tuple[int, ...], *, keep: bool = False):
+        if self.layout == "center_nchw":
+            return None
+        buffers = self._checkout((rows, tuple(clip_shape)))
+        with self._lock:
+            if keep:
+                self._kept[id(buffers.clip_view)] = buffers
+            else:
+                self._lent[id(buffers.clip_view)] = buffers
+                while len(self._lent) > self.max_lent:
+                    self._lent.pop(next(iter(self._lent)))
+        return buffers.clip_view
+
+    def release_clip_buffer(self, clips) -> None:
+        with self._lock:
+            buffers = self._kept.pop(id(clips), None)
+        if buffers is not None:
+            self._release(buffers)
+
+    def __call__(self, clips):
+        import numpy as np
+
+        with self._lock:
+            buffers = self._lent.pop(id(clips), None)
+            kept = buffers is None and self._kept.get(id(clips)) is not None
+            if kept:
+                buffers = self._kept[id(clips)]
+        if buffers is None:
+            buffers = self._checkout((int(clips.shape[0]), tuple(clips.shape[1:])))
+            if self.layout == "center_nchw":
+                np.copyto(buffers.model_input, clips[:, :, clips.shape[2] // 2])
+            else:
+                np.copyto(buffers.clip_view, clips)
+        # Not returned to the pool on failure: the caller may retry row by row from the lent view.
+        logits = self._run(buffers).copy()
+        if not kept:
+            self._release(buffers)
+        return logits
+
+    def _run(self, buffers: _BoundBuffers):
+        import numpy as np
+
+        if buffers.output is None:
+            # The output shape is only known after the first run; later runs write in place.
+            buffers.binding.bind_output(self.output_name, "cpu")
+            self.session.run_with_iobinding(buffers.binding)
+            first = buffers.binding.copy_outputs_to_cpu()[0]
+            buffers.output = np.ascontiguousarray(first, dtype=np.float32)
+            buffers.binding.bind_output(
+                self.output_name,
+                "cpu",
+                0,
+                np.float32,
+                list(buffers.output.shape),
+                buffers.output.ctypes.data,
+            )
+            return buffers.output
+
+        self.session.run_with_iobinding(buffers.binding)
+        return buffers.output
+
+    def _checkout(self, key: tuple[int, tuple[int, ...]]) -> _BoundBuffers:
+        with self._lock:
+            for index in range(len(self._idle) - 1, -1, -1):
+                if self._idle[index].key == key:
+                    buffers = self._idle.pop(index)
+                    self._idle_bytes -= buffers.nbytes
+                    return buffers
+
+        import numpy as np
+
+        rows, clip_shape = key
+        model_input, clip_view = _layout_buffers(rows, clip_shape, self.layout, np_module=np)
+        binding = self.session.io_binding()
+        binding.bind_input(
+            self.input_name,
+            "cpu",
+            0,
+            np.float32,
+            list(model_input.shape),
+            model_input.ctypes.data,
+        )
+        return _BoundBuffers(key, model_input, clip_view, binding)
+
+    def _release(self, buffers: _BoundBuffers) -> None:
+        with self._lock:
+            self._idle.append(buffers)
+            self._idle_bytes += buffers.nbytes
+            while self._idle and self._idle_bytes > self.max_bytes:
+                self._idle_bytes -= self._idle.pop(0).nbytes
+
+
+def _layout_buffers(rows: int, clip_shape: tuple[int, ...], layout: str, *, np_module):
+    # Allocates the contiguous model input and returns it with an [N, C, T, H, W] view onto it,
+    # mirroring apply_input_layout without the per-call copy.
+    channels, frames, height, width = clip_shape
+    if layout == "ncthw":
+        model_input = np_module.empty((rows, channels, frames, height, width), dtype=np_module.float32)
+        return model_input, model_input
+    if layout == "ntchw":
+        model_input = np_module.empty((rows, frames, channels, height, width), dtype=np_module.float32)
+        return model_input, model_input.transpose(0, 2, 1, 3, 4)
+    if layout == "nviews_ncthw":
+        model_input = np_module.empty((rows, 1, channels, frames, height, width), dtype=np_module.float32)
+        return model_input, model_input[:, 0]
+    if layout == "nviews_ntchw":
+        model_input = np_module.empty((rows, 1, frames, channels, height, width), dtype=np_module.float32)
+        return model_input, model_input[:, 0].transpose(0, 2, 1, 3, 4)
+    if layout == "center_nchw":
+        model_input = np_module.empty((rows, channels, height, width), dtype=np_module.float32)
+        return model_input, None
+    raise RuntimeError(f"unsupported_input_layout:{layout}")
+
+
+def _prune_optimized_models(current: Path, *, model_stem: str) -> None:
+    # Older optimizations of the same model (replaced file, other level) are never read again.
+    pattern = re.compile(rf"{re.escape(model_stem)}-\d+-\d+-[a-z]+-ort.+{re.escape(OPTIMIZED_MODEL_SUFFIX)}")
+    for path in current.parent.iterdir():
+        if path != current and pattern.fullmatch(path.name):
+            path.unlink(missing_ok=True)
+
+
+def _as_threads(value: Any) -> int:
+    try:
+        resolved = int(value)
+    except (TypeError, ValueError):
+        return 0
+    return max(0, min(resolved, 256))
@@ -0,0 +1,46 @@
+from typing import Any
+
+
+def softmax_rows(logits):
+    # logits: [N, classes] -> float32 probabilities, one vectorised pass for the whole block.
+    # Rows are max-shifted first so large logits cannot overflow exp().
+    import numpy as np
+
+    values = np.asarray(logits, dtype=np.float32)
+    probabilities = values - values.max(axis=1, keepdims=True)
+    np.exp(probabilities, out=probabilities)
+    denominator = probabilities.sum(axis=1, keepdims=True)
+    degenerate = denominator[:, 0] <= 0
+    np.divide(probabilities, denominator, out=probabilities)
+    if degenerate.any():
+        probabilities[degenerate] = 1.0 / max(values.shape[1], 1)
+    return probabilities
+
+
+def log_softmax_rows(logits):
+    # Stable log-probabilities (log-sum-exp); useful when scores are summed across windows.
+    import numpy as np
+
+    values = np.asarray(logits, dtype=np.float32)
+    shifted = values - values.max(axis=1, keepdims=True)
+    shifted -= np.log(np.exp(shifted).sum(axis=1, keepdims=True))
+    return shifted
+
+
+def argmax_rows(probabilities) -> tuple[Any, Any]:
+    import numpy as np
+
+    class_index = np.argmax(probabilities, axis=1)
+    confidence = np.take_along_axis(probabilities, class_index[:, None], axis=1)[:, 0]
+    return class_index, confidence
+
+
+def top_k_rows(probabilities, k: int) -> tuple[Any, Any]:
+    # Returns ([N, k] class indices, [N, k] values), each row sorted by descending value.
+    import numpy as np
+
+    k = max(1, min(k, probabilities.shape[1]))
+    top = np.argpartition(probabilities, -k, axis=1)[:, -k:]
+    values = np.take_along_axis(probabilities, top, axis=1)
+    order = np.argsort(-values, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(values, order, axis=1)
@@ -0,0 +1,304 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from threading import Lock
+from typing import Any, Protocol
+
+from app.config import settings
+from app.metrics import observe_result_cache_event
+from app.providers.artifact_index import resolve_model_path
+from app.providers.runner_cache import normalize_framework
+from app.providers.runtime_spec import RuntimeSpec, load_runtime_spec
+from app.providers.segment_decoders import RuntimePrediction
+
+logger = logging.getLogger(__name__)
+
+# Bump when decoding or the stored payload changes in a way the runtime spec does not capture.
+RESULT_CACHE_FORMAT = 1
+RESULT_CACHE_INDEXES = {"local", "redis"}
+
+
+def spec_fingerprint(spec: RuntimeSpec, *, top_k: int) -> str:
+    # Hashes the compiled spec rather than raw runtime_config.json: keys the runtime ignores
+    # or clamps do not split the cache, while a changed effective value always does.
+    effective: dict[str, Any] = {}
+    for field in fields(spec):
+        if field.name == "config":
+            continue
+        value = getattr(spec, field.name)
+        effective[field.name] = asdict(value) if field.name == "onnx_session" else value
+    effective["top_k"] = top_k
+    encoded = json.dumps(effective, sort_keys=True, default=list).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def model_fingerprint(model_path: Path, framework: str, *, model_version_id: str | None) -> str:
+    stat = model_path.stat()
+    framework = normalize_framework(framework)
+    return f"{model_version_id or '-'}:{framework}:{model_path.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def file_sha256(path: Path, *, chunk_bytes: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(chunk_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def inference_cache_key(
+    *,
+    video_id: str,
+    artifact_path: str,
+    framework: str,
+    model_version_id: str | None = None,
+    top_k_override: int | None = None,
+    runtime_config_overrides: dict[str, Any] | None = None,
+) -> str:
+    # video_id is an S3 ETag (plus size) or a sha256 of the file; either way, equal content
+    # under a new object key or job maps to the same entry.
+    root = Path(artifact_path)
+    spec = load_runtime_spec(root).with_overrides(runtime_config_overrides)
+    model_path = resolve_model_path(root, framework)
+    parts = (
+        f"v{RESULT_CACHE_FORMAT}",
+        video_id,
+        model_fingerprint(model_path, framework, model_version_id=model_version_id),
+        spec_fingerprint(spec, top_k=top_k_override if top_k_override is not None else spec.top_k),
+    )
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class DiskResultStore:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def read(self, key: str) -> bytes | None:
+        try:
+            return self.path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def write(self, key: str, payload: bytes) -> int:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(payload)
+        tmp_path.replace(path)
+        return len(payload)
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+    def scan(self) -> list[tuple[str, int, float]]:
+        # (key, size, mtime) of every stored entry, oldest first.
+        if not self.root.is_dir():
+            return []
+        entries = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path.stem, stat.st_size, stat.st_mtime))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+
+class ResultIndex(Protocol):
+    def touch(self, key: str, size: int | None = None) -> None:
+        ...
+
+    def discard(self, key: str) -> None:
+        ...
+
+    def evict(self, max_bytes: int) -> list[str]:
+        ...
+
+
+class LocalResultIndex:
+    # In-process LRU over the store, rebuilt from file mtimes on first use. Fine for a single
+    # worker; processes sharing one cache directory should use the Redis index instead.
+    def __init__(self, store: DiskResultStore) -> None:
+        self._store = store
+        self._entries: OrderedDict[str, int] | None = None
+        self._total_bytes = 0
+        self._lock = Lock()
+
+    def touch(self, key: str, size: int | None = None) -> None:
+        with self._lock:
+            entries = self._loaded_locked()
+            previous = entries.get(key)
+            if size is None:
+                if previous is not None:
+                    entries.move_to_end(key)
+                return
+            entries[key] = size
+            entries.move_to_end(key)
+            self._total_bytes += size - (previous or 0)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._total_bytes -= self._loaded_locked().pop(key, 0)
+
+    def evict(self, max_bytes: int) -> list[str]:
+        victims: list[str] = []
+        with self._lock:
+            entries = self._loaded_locked()
+            while entries and self._total_bytes > max_bytes:
+                key, size = entries.popitem(last=False)
+                self._total_bytes -= size
+                victims.append(key)
+        return victims
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._loaded_locked()
+            return self._total_bytes
+
+    def _loaded_locked(self) -> OrderedDict[str, int]:
+        if self._entries is None:
+            self._entries = OrderedDict((key, size) for key, size, _ in self._store.scan())
+            self._total_bytes = sum(self._entries.values())
+        return self._entries
+
+
+class RedisResultIndex:
+    # Shared LRU for workers on one cache volume: a sorted set of last-use times, a hash of
+    # entry sizes and a running byte total. Concurrent evictions may both pick the same key;
+    # discard() only subtracts sizes it actually removed, so the total stays consistent.
+    def __init__(self, client, *, prefix: str) -> None:
+        self._client = client
+        self._lru = f"{prefix}:lru"
+        self._sizes = f"{prefix}:sizes"
+        self._bytes = f"{prefix}:bytes"
+
+    def touch(self, key: str, size: int | None = None) -> None:
+        if size is None:
+            self._client.zadd(self._lru, {key: time.time()}, xx=True)
+            return
+        previous = self._client.hget(self._sizes, key)
+        pipe = self._client.pipeline()
+        pipe.hset(self._sizes, key, size)
+        pipe.zadd(self._lru, {key: time.time()})
+        pipe.incrby(self._bytes, size - int(previous or 0))
+        pipe.execute()
+
+    def discard(self, key: str) -> None:
+        removed = self._client.hget(self._sizes, key)
+        pipe = self._client.pipeline()
+        pipe.zrem(self._lru, key)
+        pipe.hdel(self._sizes, key)
+        _, deleted = pipe.execute()
+        if removed is not None and deleted:
+            self._client.decrby(self._bytes, int(removed))
+
+    def evict(self, max_bytes: int) -> list[str]:
+        victims: list[str] = []
+        while int(self._client.get(self._bytes) or 0) > max_bytes:
+            oldest = self._client.zrange(self._lru, 0, 0)
+            if not oldest:
+                self._client.set(self._bytes, 0)
+                break
+            key = oldest[0].decode("utf-8") if isinstance(oldest[0], bytes) else str(oldest[0])
+            self.discard(key)
+            victims.append(key)
+        return victims
+
+
+@dataclass
+class CachedResult:
+    predictions: list[RuntimePrediction]
+    # Persisted window store of the job that produced the entry, if any.
+    windows_object_key: str | None = None
+
+
+class ResultCache:
+    # Stores final RuntimePredictions by inference_cache_key(). Cache failures never fail
+    # inference: reads degrade to a miss and writes are dropped, both with a warning.
+    def __init__(self, *, store: DiskResultStore, index: ResultIndex, max_bytes: int) -> None:
+        self.store = store
+        self.index = index
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> CachedResult | None:
+        try:
+            payload = self.store.read(key)
+            if payload is None:
+                self.index.discard(key)
+                observe_result_cache_event("miss")
+                return None
+            decoded = json.loads(payload)
+            if decoded.get("format") != RESULT_CACHE_FORMAT:
+                raise ValueError("result_cache_format_mismatch")
+            cached = CachedResult(
+                predictions=[RuntimePrediction(**item) for item in decoded["predictions"]],
+                windows_object_key=decoded.get("windows_object_key"),
+            )
+            self.index.touch(key)
+        except Exception as exc:
+            logger.warning("result cache read failed: key=%s error=%s", key, exc)
+            observe_result_cache_event("error")
+            return None
+        observe_result_cache_event("hit")
+        return cached
+
+    def put(self, key: str, predictions: list[RuntimePrediction], *, windows_object_key: str | None = None) -> None:
+        payload = json.dumps(
+            {
+                "format": RESULT_CACHE_FORMAT,
+                "predictions": [asdict(item) for item in predictions],
+                "windows_object_key": windows_object_key,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        if self.max_bytes <= 0 or len(payload) > self.max_bytes:
+            return
+        try:
+            self.index.touch(key, self.store.write(key, payload))
+            for victim in self.index.evict(self.max_bytes):
+                self.store.delete(victim)
+                observe_result_cache_event("eviction")
+        except Exception as exc:
+            logger.warning("result cache write failed: key=%s error=%s", key, exc)
+            observe_result_cache_event("error")
+
+
+_result_cache: ResultCache | None = None
+_result_cache_lock = Lock()
+
+
+def get_result_cache() -> ResultCache | None:
+    global _result_cache
+    if not settings.result_cache_enabled:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            store = DiskResultStore(Path(settings.result_cache_dir))
+            index: ResultIndex
+            kind = settings.result_cache_index.strip().lower()
+            if kind not in RESULT_CACHE_INDEXES:
+                raise RuntimeError(f"unsupported_result_cache_index:{kind}")
+            if kind == "redis":
+                from app.services.queue import redis_client
+
+                index = RedisResultIndex(redis_client(), prefix=settings.result_cache_redis_prefix)
+            else:
+                index = LocalResultIndex(store)
+            _result_cache = ResultCache(store=store, index=index, max_bytes=settings.result_cache_max_bytes)
+        return _result_cache
+
+
+def reset_result_cache() -> None:
+    global _result_cache
+    with _result_cache_lock:
+        _result_cache = None
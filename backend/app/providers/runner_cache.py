@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Event, Lock
+from typing import Any
+
+from app.config import settings
+from app.metrics import observe_runner_cache_event, observe_runner_cache_size
+
+RunnerCacheKey = tuple[str, str, int, int, str]
+
+
+@dataclass
+class _CachedRunner:
+    runner: Any
+    size_bytes: int
+
+
+class _PendingLoad:
+    def __init__(self) -> None:
+        self.done = Event()
+        self.runner: Any = None
+        self.error: BaseException | None = None
+
+
+def normalize_framework(framework: str) -> str:
+    normalized = framework.strip().lower()
+    if normalized == "torch":
+        return "torchscript"
+    return normalized
+
+
+def runner_cache_key(model_path: Path, framework: str, variant: str = "") -> RunnerCacheKey:
+    # variant covers load-time settings that are not in the model file (e.g. ONNX session
+    # options), so changing them in runtime_config.json builds a new runner.
+    resolved = model_path.resolve()
+    stat = resolved.stat()
+    return (str(resolved), normalize_framework(framework), stat.st_mtime_ns, stat.st_size, variant)
+
+
+class ModelRunnerCache:
+    def __init__(self, max_models: int, max_bytes: int) -> None:
+        self._max_models = max_models
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[RunnerCacheKey, _CachedRunner] = OrderedDict()
+        self._pending: dict[RunnerCacheKey, _PendingLoad] = {}
+        self._total_bytes = 0
+        self._lock = Lock()
+
+    def configure(self, *, max_models: int | None = None, max_bytes: int | None = None) -> None:
+        with self._lock:
+            if max_models is not None:
+                self._max_models = max_models
+            if max_bytes is not None:
+                self._max_bytes = max_bytes
+            self._evict_locked(keep=None)
+
+    def get_or_load(self, model_path: Path, framework: str, loader: Callable[[], Any], *, variant: str = "") -> Any:
+        if self._max_models <= 0:
+            observe_runner_cache_event("miss")
+            return loader()
+
+        key = runner_cache_key(model_path, framework, variant)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                observe_runner_cache_event("hit")
+                return cached.runner
+
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = _PendingLoad()
+                self._pending[key] = pending
+                self._drop_stale_locked(key)
+
+        if not owner:
+            # Another request is already loading the same model file; wait for its result.
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            observe_runner_cache_event("hit")
+            return pending.runner
+
+        observe_runner_cache_event("miss")
+        try:
+            runner = loader()
+        except BaseException as exc:
+            pending.error = exc
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.done.set()
+            raise
+
+        pending.runner = runner
+        with self._lock:
+            self._pending.pop(key, None)
+            self._entries[key] = _CachedRunner(runner=runner, size_bytes=key[3])
+            self._total_bytes += key[3]
+            self._evict_locked(keep=key)
+        pending.done.set()
+        return runner
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "models": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_models": self._max_models,
+                "max_bytes": self._max_bytes,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            observe_runner_cache_size(0, 0)
+
+    def _drop_stale_locked(self, key: RunnerCacheKey) -> None:
+        # Same file path and framework but different mtime/size/variant means the artifact or its
+        # load settings were replaced.
+        stale = [existing for existing in self._entries if existing[:2] == key[:2] and existing != key]
+        for existing in stale:
+            self._remove_locked(existing)
+            observe_runner_cache_event("eviction")
+        if stale:
+            observe_runner_cache_size(len(self._entries), self._total_bytes)
+
+    def _evict_locked(self, keep: RunnerCacheKey | None) -> None:
+        while self._entries and (
+            len(self._entries) > max(self._max_models, 0)
+            or (self._max_bytes > 0 and self._total_bytes > self._max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(oldest)
+                continue
+            self._remove_locked(oldest)
+            observe_runner_cache_event("eviction")
+        observe_runner_cache_size(len(self._entries), self._total_bytes)
+
+    def _remove_locked(self, key: RunnerCacheKey) -> None:
+        removed = self._entries.pop(key, None)
+        if removed is not None:
+            self._total_bytes -= removed.size_bytes
+
+
+runner_cache = ModelRunnerCache(
+    max_models=settings.runtime_runner_cache_max_models,
+    max_bytes=settings.runtime_runner_cache_max_bytes,
+)
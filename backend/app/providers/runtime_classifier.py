@@ -1,30 +1,65 @@
-import json
-from dataclasses import dataclass
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, replace
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Any, Callable
-
-from app.storage import download_object_file
-
-DEFAULT_MEAN = [0.485, 0.456, 0.406]
-DEFAULT_STD = [0.229, 0.224, 0.225]
-
-
-@dataclass
-class RuntimePrediction:
-    label: str
-    confidence: float
-    start_sec: float
-    end_sec: float
-
-
-@dataclass
-class WindowPrediction:
-    start_sec: float
-    end_sec: float
-    class_index: int
-    confidence: float
-    probabilities: Any
+from time import perf_counter
+from typing import Any, Callable, Iterator
+
+from app.config import settings
+from app.metrics import (
+    observe_motion_gate_run,
+    observe_pipeline_run,
+    observe_runtime_stage,
+    observe_runtime_volume,
+    runtime_stage_timer,
+)
+from app.providers.artifact_index import resolve_model_path
+from app.providers.clip_preprocess import ClipAssembler, ClipPreprocessor
+from app.providers.frame_store import get_frame_store
+from app.providers.inference_pipeline import PipelineStats, iter_pipelined
+from app.providers.input_layout import (
+    TORCHSCRIPT_PROBE_LAYOUTS,
+    apply_input_layout,
+    load_layout_manifest,
+    onnx_input_layout,
+    save_layout_manifest,
+)
+from app.providers.motion_gate import MotionGate
+from app.providers.onnx_session import OnnxIoBinding, OnnxSessionOptions, create_onnx_session
+from app.providers.probabilities import argmax_rows, softmax_rows
+from app.providers.result_cache import ResultCache, file_sha256, get_result_cache, inference_cache_key
+from app.providers.runner_cache import normalize_framework, runner_cache
+from app.providers.shard_pool import (
+    discard_shard_pool,
+    get_shard_pool,
+    shard_ranges,
+    windows_per_shard,
+    worker_thread_limit,
+)
+from app.providers.segment_decoders import (
+    CtcTokenDecoder,
+    RealtimeSegmentDecoder,
+    RuntimePrediction,
+    TopWindowTracker,
+    WindowPrediction,
+    top_window_predictions,
+)
+from app.providers.runtime_spec import RuntimeSpec, load_runtime_spec
+from app.providers.window_batch import WindowBatch
+from app.providers.video_frames import (
+    FrameDecodeStats,
+    PreprocessedFrameCache,
+    WindowPlan,
+    iter_window_frames,
+    plan_windows,
+    resolve_frame_decode_mode,
+    timeline_frame_step,
+)
+from app.storage import copy_object, download_object_file, object_etag, upload_object_file
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -34,253 +69,735 @@ class VideoMetadata:
     duration_sec: float
 
 
+@dataclass
+class InferenceReport:
+    windows: int = 0
+    frame_cache_hits: int = 0
+    frame_cache_misses: int = 0
+    frames_preprocessed: int = 0
+    frame_cache_bytes: int = 0
+    frame_cache_peak_bytes: int = 0
+    pipelined: bool = False
+    decode_sec: float = 0.0
+    preprocess_sec: float = 0.0
+    inference_sec: float = 0.0
+    decode_blocked_sec: float = 0.0
+    inference_starved_sec: float = 0.0
+    pipeline_queue_max_depth: int = 0
+    pipeline_queue_mean_depth: float = 0.0
+    windows_skipped: int = 0
+    windows_gated: int = 0
+    scan_mode: str = "dense"
+    windows_refined: int = 0
+    frames_grabbed: int = 0
+    frames_retrieved: int = 0
+    segment_decode_sec: float = 0.0
+    shards: int = 0
+
+    @property
+    def frame_cache_reuse_ratio(self) -> float:
+        total = self.frame_cache_hits + self.frame_cache_misses
+        return round(self.frame_cache_hits / total, 4) if total else 0.0
+
+    @property
+    def skipped_window_ratio(self) -> float:
+        return round(self.windows_skipped / self.windows, 4) if self.windows else 0.0
+
+
 def infer_gesture_labels(
     video_object_key: str,
     artifact_path: str,
     framework: str,
     top_k_override: int | None = None,
     runtime_config_overrides: dict[str, Any] | None = None,
+    report: InferenceReport | None = None,
+    model_version_id: str | None = None,
+    window_store_key: str | None = None,
 ) -> list[RuntimePrediction]:
+    # With the result cache enabled, a video already inferred with the same model and
+    # effective spec is answered from the cache: by ETag before downloading, or by content
+    # hash right after when the object store reports no ETag. window_store_key additionally
+    # persists the per-window store there for later re-decoding; a cache hit only counts if
+    # the producing job's store can be copied over.
+    result_cache = get_result_cache()
+    key_options = {
+        "artifact_path": artifact_path,
+        "framework": framework,
+        "model_version_id": model_version_id,
+        "top_k_override": top_k_override,
+        "runtime_config_overrides": runtime_config_overrides,
+    }
+    if report is None:
+        report = InferenceReport()
+    metric_labels = {"model_version": model_version_id, "framework": normalize_framework(framework)}
+    cache_key: str | None = None
+    if result_cache is not None:
+        etag = object_etag(video_object_key)
+        if etag:
+            cache_key = inference_cache_key(video_id=etag, **key_options)
+            cached = _usable_cached_result(result_cache, cache_key, window_store_key=window_store_key)
+            if cached is not None:
+                return cached
+
     with TemporaryDirectory(prefix="signflow-runtime-") as tmp_dir:
         local_video_path = Path(tmp_dir) / "input.mp4"
-        download_object_file(video_object_key, str(local_video_path))
-        return infer_gesture_labels_from_file(
-            video_path=str(local_video_path),
+        with runtime_stage_timer("download", **metric_labels):
+            download_object_file(video_object_key, str(local_video_path))
+        if result_cache is not None and cache_key is None:
+            cache_key = inference_cache_key(video_id=f"sha256:{file_sha256(local_video_path)}", **key_options)
+            cached = _usable_cached_result(result_cache, cache_key, window_store_key=window_store_key)
+            if cached is not None:
+                return cached
+        if window_store_key is None:
+            predictions = infer_gesture_labels_from_file(
+                video_path=str(local_video_path),
+                artifact_path=artifact_path,
+                framework=framework,
+                top_k_override=top_k_override,
+                runtime_config_overrides=runtime_config_overrides,
+                report=report,
+                model_version_id=model_version_id,
+                use_frame_store=True,
+            )
+        else:
+            predictions, stored = _infer_and_store_windows(
+                video_path=local_video_path,
+                artifact_path=artifact_path,
+                framework=framework,
+                top_k_override=top_k_override,
+                runtime_config_overrides=runtime_config_overrides,
+                report=report,
+                window_store_key=window_store_key,
+                model_version_id=model_version_id,
+                use_frame_store=True,
+            )
+            window_store_key = window_store_key if stored else None
+
+    # Empty results fail strict jobs; caching them would only make retries fail faster.
+    if result_cache is not None and cache_key is not None and predictions:
+        result_cache.put(cache_key, predictions, windows_object_key=window_store_key)
+    return predictions
+
+
+def _usable_cached_result(
+    result_cache: ResultCache,
+    cache_key: str,
+    *,
+    window_store_key: str | None,
+) -> list[RuntimePrediction] | None:
+    cached = result_cache.get(cache_key)
+    if cached is None:
+        return None
+    if window_store_key is None or cached.windows_object_key == window_store_key:
+        return cached.predictions
+    if cached.windows_object_key and copy_object(cached.windows_object_key, window_store_key):
+        return cached.predictions
+    return None
+
+
+def _infer_and_store_windows(
+    *,
+    video_path: Path,
+    artifact_path: str,
+    framework: str,
+    top_k_override: int | None,
+    runtime_config_overrides: dict[str, Any] | None,
+    report: InferenceReport | None,
+    window_store_key: str,
+    model_version_id: str | None = None,
+    use_frame_store: bool = False,
+) -> tuple[list[RuntimePrediction], bool]:
+    # Same segments as the streaming path (decode_window_batch runs the same decoders over
+    # the same rows), but every window is kept as float16 and uploaded next to the job.
+    if report is None:
+        report = InferenceReport()
+    batch, metadata = collect_window_batch(
+        video_path=str(video_path),
+        artifact_path=artifact_path,
+        framework=framework,
+        runtime_config_overrides=runtime_config_overrides,
+        report=report,
+        dtype="float16",
+        use_frame_store=use_frame_store,
+    )
+    started = perf_counter()
+    predictions = decode_window_batch(
+        batch,
+        artifact_path=artifact_path,
+        duration_sec=metadata.duration_sec,
+        top_k_override=top_k_override,
+        runtime_config_overrides=runtime_config_overrides,
+    )
+    report.segment_decode_sec = round(report.segment_decode_sec + perf_counter() - started, 4)
+    _log_inference_report(report, model_version=model_version_id, framework=framework)
+    store_path = video_path.with_name("windows.npz")
+    try:
+        batch.save(store_path, duration_sec=metadata.duration_sec)
+        upload_object_file(window_store_key, str(store_path))
+    except Exception as exc:
+        # The job result does not depend on the store; only re-decoding it later does.
+        logger.warning("window store upload failed: key=%s error=%s", window_store_key, exc)
+        return predictions, False
+    return predictions, True
+
+
+def infer_gesture_labels_from_file(
+    video_path: str,
+    artifact_path: str,
+    framework: str,
+    top_k_override: int | None = None,
+    runtime_config_overrides: dict[str, Any] | None = None,
+    report: InferenceReport | None = None,
+    model_version_id: str | None = None,
+    use_frame_store: bool = False,
+) -> list[RuntimePrediction]:
+    return list(
+        iter_gesture_labels_from_file(
+            video_path=video_path,
             artifact_path=artifact_path,
             framework=framework,
             top_k_override=top_k_override,
             runtime_config_overrides=runtime_config_overrides,
+            report=report,
+            model_version_id=model_version_id,
+            use_frame_store=use_frame_store,
         )
+    )
 
 
-def infer_gesture_labels_from_file(
+def iter_gesture_labels_from_file(
+    video_path: str,
+    artifact_path: str,
+    framework: str,
+    top_k_override: int | None = None,
+    runtime_config_overrides: dict[str, Any] | None = None,
+    report: InferenceReport | None = None,
+    model_version_id: str | None = None,
+    use_frame_store: bool = False,
+) -> Iterator[RuntimePrediction]:
+    # Yields each prediction as soon as its segment closes. The top-k fallback can only be
+    # decided once the stream ends, so it is emitted last and only if nothing else was.
+    context = _prepare_runtime(
+        artifact_path=artifact_path,
+        framework=framework,
+        runtime_config_overrides=runtime_config_overrides,
+        top_k_override=top_k_override,
+        use_frame_store=use_frame_store,
+    )
+    if report is None:
+        report = InferenceReport()
+    capture, metadata = _open_frames(Path(video_path), context.spec, use_frame_store=context.use_frame_store)
+    decoder = _segment_decoder(context.spec, duration_sec=metadata.duration_sec)
+    fallback = TopWindowTracker(labels=context.spec.labels, top_k=context.top_k)
+    windows = _iter_capture_windows(
+        capture,
+        metadata,
+        runner=context.runner,
+        report=report,
+        video_path=Path(video_path),
+        **context.window_options,
+    )
+    emitted = False
+    segment_decode_sec = 0.0
+    try:
+        for window in windows:
+            started = perf_counter()
+            fallback.push(window)
+            decoded = decoder.push(window)
+            segment_decode_sec += perf_counter() - started
+            for prediction in decoded:
+                emitted = True
+                yield prediction
+        for prediction in decoder.flush():
+            emitted = True
+            yield prediction
+    finally:
+        windows.close()
+        capture.release()
+        report.segment_decode_sec = round(report.segment_decode_sec + segment_decode_sec, 4)
+    _log_inference_report(report, model_version=model_version_id, framework=framework)
+
+    if not emitted:
+        yield from fallback.results()
+
+
+def iter_window_predictions(
+    video_path: str,
+    artifact_path: str,
+    framework: str,
+    runtime_config_overrides: dict[str, Any] | None = None,
+    report: InferenceReport | None = None,
+    use_frame_store: bool = False,
+) -> Iterator[WindowPrediction]:
+    context = _prepare_runtime(
+        artifact_path=artifact_path,
+        framework=framework,
+        runtime_config_overrides=runtime_config_overrides,
+        use_frame_store=use_frame_store,
+    )
+    capture, metadata = _open_frames(Path(video_path), context.spec, use_frame_store=context.use_frame_store)
+    windows = _iter_capture_windows(
+        capture,
+        metadata,
+        runner=context.runner,
+        report=report,
+        video_path=Path(video_path),
+        **context.window_options,
+    )
+    try:
+        yield from windows
+    finally:
+        windows.close()
+        capture.release()
+
+
+def collect_window_batch(
     video_path: str,
     artifact_path: str,
     framework: str,
+    runtime_config_overrides: dict[str, Any] | None = None,
+    report: InferenceReport | None = None,
+    dtype: str | None = None,
+    use_frame_store: bool = False,
+) -> tuple[WindowBatch, VideoMetadata]:
+    # Keeps every window of the video in one columnar store (for re-decoding or persisting);
+    # window_store_dtype (or dtype) / window_store_top_k trade probability precision for memory.
+    context = _prepare_runtime(
+        artifact_path=artifact_path,
+        framework=framework,
+        runtime_config_overrides=runtime_config_overrides,
+        use_frame_store=use_frame_store,
+    )
+    batch = WindowBatch(dtype=dtype or context.spec.window_store_dtype, top_k=context.spec.window_store_top_k)
+    capture, metadata = _open_frames(Path(video_path), context.spec, use_frame_store=context.use_frame_store)
+    blocks = _iter_capture_blocks(
+        capture,
+        metadata,
+        runner=context.runner,
+        report=report,
+        video_path=Path(video_path),
+        **context.window_options,
+    )
+    try:
+        for block in blocks:
+            batch.append(
+                start_sec=block.start_sec,
+                end_sec=block.end_sec,
+                probabilities=block.probabilities,
+                class_index=block.class_index,
+                confidence=block.confidence,
+            )
+    finally:
+        blocks.close()
+        capture.release()
+    return batch, metadata
+
+
+def decode_window_batch(
+    batch: WindowBatch,
+    *,
+    artifact_path: str,
+    duration_sec: float,
     top_k_override: int | None = None,
     runtime_config_overrides: dict[str, Any] | None = None,
 ) -> list[RuntimePrediction]:
     root = Path(artifact_path)
     if not root.exists():
         raise RuntimeError("artifact_path_not_found")
+    spec = load_runtime_spec(root).with_overrides(runtime_config_overrides)
+    if not len(batch):
+        return []
 
-    config = _load_runtime_config(root)
-    if runtime_config_overrides:
-        config = {**config, **runtime_config_overrides}
-    model_path = _resolve_model_path(root, framework)
-    labels = _load_labels(root)
-
-    num_frames = _as_int(config.get("num_frames"), fallback=32, minimum=4, maximum=128)
-    window_size_frames = _as_int(config.get("window_size_frames"), fallback=num_frames, minimum=4, maximum=256)
-    stride_frames = _as_int(
-        config.get("stride_frames"),
-        fallback=max(1, window_size_frames // 4),
-        minimum=1,
-        maximum=window_size_frames,
-    )
-    input_size = _as_int(config.get("input_size"), fallback=224, minimum=112, maximum=512)
-    mean = _as_float_list(config.get("mean"), fallback=DEFAULT_MEAN)
-    std = _as_float_list(config.get("std"), fallback=DEFAULT_STD)
-    normalize_to_unit = _resolve_normalize_to_unit(config=config, mean=mean, std=std)
-    top_k = top_k_override if top_k_override is not None else _as_int(config.get("top_k"), fallback=3, minimum=1, maximum=10)
-
-    runner = _create_model_runner(model_path=model_path, framework=framework)
-    windows, metadata = _collect_window_predictions(
-        video_path=Path(video_path),
+    arrays = batch.arrays()
+    predictions = _segment_decoder(spec, duration_sec=duration_sec).decode_arrays(*arrays)
+    if predictions:
+        return predictions
+    top_k = top_k_override if top_k_override is not None else spec.top_k
+    return top_window_predictions(*arrays, labels=spec.labels, top_k=top_k)
+
+
+@dataclass(frozen=True)
+class _ShardSource:
+    # What a shard worker needs to rebuild the runner and spec in its own process.
+    artifact_path: str
+    framework: str
+    runtime_config_overrides: dict[str, Any] | None
+    shard_seconds: float
+    workers: int
+    use_frame_store: bool = False
+
+
+@dataclass
+class _RuntimeContext:
+    spec: RuntimeSpec
+    runner: "ModelRunner"
+    top_k: int
+    window_options: dict[str, Any]
+    use_frame_store: bool = False
+
+
+def _prepare_runtime(
+    *,
+    artifact_path: str,
+    framework: str,
+    runtime_config_overrides: dict[str, Any] | None,
+    top_k_override: int | None = None,
+    use_frame_store: bool = False,
+) -> _RuntimeContext:
+    root = Path(artifact_path)
+    if not root.exists():
+        raise RuntimeError("artifact_path_not_found")
+
+    spec = load_runtime_spec(root).with_overrides(runtime_config_overrides)
+    model_path = resolve_model_path(root, framework)
+    runner = _get_model_runner(model_path=model_path, framework=framework, artifact_root=root)
+    sharding = None
+    if settings.runtime_shard_workers > 1 and spec.shard_seconds > 0:
+        sharding = _ShardSource(
+            artifact_path=artifact_path,
+            framework=framework,
+            runtime_config_overrides=dict(runtime_config_overrides) if runtime_config_overrides else None,
+            shard_seconds=spec.shard_seconds,
+            workers=settings.runtime_shard_workers,
+            use_frame_store=use_frame_store,
+        )
+    return _RuntimeContext(
+        spec=spec,
         runner=runner,
-        num_frames=num_frames,
-        window_size_frames=window_size_frames,
-        stride_frames=stride_frames,
-        input_size=input_size,
-        mean=mean,
-        std=std,
-        normalize_to_unit=normalize_to_unit,
+        top_k=top_k_override if top_k_override is not None else spec.top_k,
+        use_frame_store=use_frame_store,
+        window_options={
+            "num_frames": spec.num_frames,
+            "window_size_frames": spec.window_size_frames,
+            "stride_frames": spec.stride_frames,
+            "preprocessor": ClipPreprocessor(
+                input_size=spec.input_size,
+                mean=list(spec.mean),
+                std=list(spec.std),
+                normalize_to_unit=spec.normalize_to_unit,
+            ),
+            "inference_batch_size": spec.inference_batch_size,
+            "frame_decode_mode": spec.frame_decode_mode,
+            "sequential_max_gap_frames": spec.sequential_max_gap_frames,
+            "align_sampling_to_stride": spec.align_sampling_to_stride,
+            "target_fps": spec.target_fps,
+            "frame_cache_max_bytes": spec.frame_cache_max_bytes,
+            "pipelined": spec.pipelined_inference,
+            "pipeline_queue_depth": spec.pipeline_queue_depth,
+            "preprocess_workers": spec.preprocess_workers,
+            "motion_gate_threshold": spec.motion_gate_threshold if spec.motion_gate_enabled else None,
+            "motion_gate_thumbnail_size": spec.motion_gate_thumbnail_size,
+            "num_classes_hint": len(spec.labels),
+            "scan_mode": spec.scan_mode,
+            "adaptive_stride_factor": spec.adaptive_stride_factor,
+            "adaptive_confidence_margin": spec.adaptive_confidence_margin,
+            "adaptive_thresholds": (spec.realtime_min_confidence, spec.ctc_blank_threshold),
+            "sharding": sharding,
+        },
     )
 
-    if not windows:
-        return []
 
-    mode = str(config.get("decoder_mode", "auto")).strip().lower()
-    long_video_threshold_sec = _as_float(config.get("long_video_threshold_sec"), fallback=18.0, minimum=1.0, maximum=3600.0)
-
-    use_ctc = mode == "ctc" or (mode == "auto" and metadata.duration_sec >= long_video_threshold_sec)
+def _segment_decoder(spec: RuntimeSpec, *, duration_sec: float) -> RealtimeSegmentDecoder | CtcTokenDecoder:
+    mode = spec.decoder_mode
+    use_ctc = mode == "ctc" or (mode == "auto" and duration_sec >= spec.long_video_threshold_sec)
     if use_ctc:
-        predictions = _decode_ctc_windows(windows=windows, labels=labels, config=config)
-    else:
-        predictions = _decode_realtime_windows(windows=windows, labels=labels, config=config)
+        return CtcTokenDecoder(
+            labels=spec.labels,
+            blank_index=spec.ctc_blank_index,
+            blank_threshold=spec.ctc_blank_threshold,
+            min_token_confidence=spec.ctc_min_token_confidence,
+            min_duration_sec=spec.ctc_min_duration_sec,
+        )
+    return RealtimeSegmentDecoder(
+        labels=spec.labels,
+        min_confidence=spec.realtime_min_confidence,
+        min_duration_sec=spec.realtime_min_duration_sec,
+        max_gap_sec=spec.realtime_max_gap_sec,
+    )
+
+
+def _log_inference_report(report: InferenceReport, *, model_version: str | None, framework: str) -> None:
+    # Shared by the job and live entry points, so both feed the same stage metrics.
+    _observe_inference_report(report, model_version=model_version, framework=normalize_framework(framework))
+    logger.info(
+        "runtime windows=%s frame_cache_reuse=%.3f frame_cache_peak_bytes=%s pipelined=%s "
+        "decode_sec=%.3f preprocess_sec=%.3f inference_sec=%.3f decode_blocked_sec=%.3f "
+        "inference_starved_sec=%.3f queue_max_depth=%s queue_mean_depth=%.2f windows_skipped=%s "
+        "skipped_window_ratio=%.3f scan_mode=%s windows_refined=%s frames_grabbed=%s frames_retrieved=%s "
+        "segment_decode_sec=%.3f shards=%s",
+        report.windows,
+        report.frame_cache_reuse_ratio,
+        report.frame_cache_peak_bytes,
+        report.pipelined,
+        report.decode_sec,
+        report.preprocess_sec,
+        report.inference_sec,
+        report.decode_blocked_sec,
+        report.inference_starved_sec,
+        report.pipeline_queue_max_depth,
+        report.pipeline_queue_mean_depth,
+        report.windows_skipped,
+        report.skipped_window_ratio,
+        report.scan_mode,
+        report.windows_refined,
+        report.frames_grabbed,
+        report.frames_retrieved,
+        report.segment_decode_sec,
+        report.shards,
+    )
 
-    if predictions:
-        return predictions
-    return _fallback_top_windows(windows=windows, labels=labels, top_k=top_k)
 
+def _observe_inference_report(report: InferenceReport, *, model_version: str | None, framework: str) -> None:
+    # One observation per stage per video, from totals the report already keeps, so the
+    # per-window hot loop carries no Prometheus calls. decode/preprocess are busy time and
+    # overlap when pipelined.
+    labels = {"model_version": model_version, "framework": framework}
+    observe_runtime_stage("decode", report.decode_sec, **labels)
+    observe_runtime_stage("preprocess", report.preprocess_sec, **labels)
+    observe_runtime_stage("inference", report.inference_sec, **labels)
+    observe_runtime_stage("segment_decode", report.segment_decode_sec, **labels)
+    observe_runtime_volume(report.frames_grabbed, report.windows - report.windows_skipped, **labels)
 
-def _load_runtime_config(root: Path) -> dict[str, Any]:
-    cfg_path = root / "runtime_config.json"
-    if not cfg_path.exists():
-        return {}
+
+def ensure_input_layout_manifest(artifact_path: str, framework: str) -> str | None:
+    normalized = framework.strip().lower()
+    if normalized not in {"onnx", "torchscript", "torch"}:
+        return None
+    root = Path(artifact_path)
     try:
-        raw = json.loads(cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
-    return raw if isinstance(raw, dict) else {}
+        model_path = resolve_model_path(root, normalized)
+    except RuntimeError:
+        return None
 
+    layout = load_layout_manifest(root, model_path, normalized)
+    if layout is not None:
+        return layout
 
-def _resolve_model_path(root: Path, framework: str) -> Path:
-    normalized = framework.lower()
-    if normalized == "onnx":
-        model_file = _find_first(root, ["model.onnx", "*.onnx"])
-    elif normalized in {"torchscript", "torch"}:
-        model_file = _find_first(root, ["model.ts", "model.torchscript", "model.pt", "*.torchscript", "*.jit", "*.pt"])
-    else:
-        raise RuntimeError(f"unsupported_framework:{framework}")
+    import numpy as np
 
-    if not model_file:
-        raise RuntimeError(f"runtime_model_file_not_found:{framework}")
-    return model_file
+    spec = load_runtime_spec(root)
+    runner = _get_model_runner(model_path=model_path, framework=normalized, artifact_root=root)
+    if runner.input_layout is None:
+        runner(np.zeros((1, 3, spec.num_frames, spec.input_size, spec.input_size), dtype=np.float32))
+    return runner.input_layout
+
+
+def _get_model_runner(model_path: Path, framework: str, artifact_root: Path | None = None) -> "ModelRunner":
+    variant = ""
+    if normalize_framework(framework) == "onnx":
+        variant = repr(_onnx_session_options(artifact_root))
+    return runner_cache.get_or_load(
+        model_path,
+        framework,
+        lambda: _create_model_runner(model_path=model_path, framework=framework, artifact_root=artifact_root),
+        variant=variant,
+    )
 
 
-def _find_first(root: Path, patterns: list[str]) -> Path | None:
-    for pattern in patterns:
-        matches = sorted(path for path in root.rglob(pattern) if path.is_file())
-        if matches:
-            return matches[0]
-    return None
+class ModelRunner:
+    # Runs a stack of clips [N, C, T, H, W] and returns logits [N, classes].
+    # max_batch_size=None means a dynamic batch dimension. A batched pass rejected for its
+    # shape (a model exported with a fixed batch of 1) pins the runner to batch size 1 for the
+    # rest of its (cached) lifetime; any other error is raised and the batch size is kept.
+    def __init__(
+        self,
+        run: Callable[[Any], Any],
+        *,
+        max_batch_size: int | None = None,
+        input_layout: str | None = None,
+        clip_buffer: Callable[..., Any] | None = None,
+        release_clip_buffer: Callable[[Any], None] | None = None,
+    ) -> None:
+        self._run = run
+        self.max_batch_size = max_batch_size
+        self.input_layout = input_layout
+        self._clip_buffer = clip_buffer
+        self._release_clip_buffer = release_clip_buffer
+
+    def clip_buffer(self, rows: int, clip_shape: tuple[int, ...], *, keep: bool = False):
+        # Writable [rows, C, T, H, W] buffer the runner consumes without copying, or None.
+        # keep=True holds it across calls until release_clip_buffer().
+        if self._clip_buffer is None or (self.max_batch_size is not None and rows > self.max_batch_size):
+            return None
+        return self._clip_buffer(rows, clip_shape, keep=keep)
+
+    def release_clip_buffer(self, clips) -> None:
+        if self._release_clip_buffer is not None:
+            self._release_clip_buffer(clips)
+
+    def __call__(self, clips):
+        import numpy as np
+
+        total = int(clips.shape[0])
+        limit = self.max_batch_size or total
+        if total <= limit:
+            return self._run_chunk(clips)
+        chunks = [self._run_chunk(clips[offset : offset + limit]) for offset in range(0, total, limit)]
+        return np.concatenate(chunks, axis=0)
 
+    def _run_chunk(self, clips):
+        import numpy as np
 
-def _load_labels(root: Path) -> list[str]:
-    labels_json = root / "labels.json"
-    if labels_json.exists():
+        rows = int(clips.shape[0])
+        if rows == 1:
+            return self._run(clips)
         try:
-            raw = json.loads(labels_json.read_text(encoding="utf-8"))
-            if isinstance(raw, list):
-                values = [str(item).strip() for item in raw if str(item).strip()]
-                if values:
-                    return values
-            if isinstance(raw, dict):
-                entries: list[tuple[str, str]] = []
-                for key, value in raw.items():
-                    label = str(value).strip()
-                    if label:
-                        entries.append((str(key), label))
-                if entries:
-                    entries.sort(key=lambda item: _sortable_key(item[0]))
-                    return [value for _, value in entries]
-        except Exception:
-            pass
-
-    labels_txt = root / "labels.txt"
-    if labels_txt.exists():
-        values = [line.strip() for line in labels_txt.read_text(encoding="utf-8").splitlines() if line.strip()]
-        if values:
-            return values
-    return []
-
-
-def _sortable_key(raw: str) -> tuple[int, str]:
-    try:
-        return (0, f"{int(raw):09d}")
-    except ValueError:
-        return (1, raw)
+            return self._run(clips)
+        except Exception as exc:
+            if self.max_batch_size == 1 or not _is_batch_shape_error(exc):
+                raise
+            logger.warning("model rejected batch of %s, falling back to batch size 1: %s", rows, exc)
+            self.max_batch_size = 1
+        return np.concatenate([self._run(clips[index : index + 1]) for index in range(rows)], axis=0)
 
 
-def _create_model_runner(model_path: Path, framework: str) -> Callable[[Any], Any]:
+def _is_batch_shape_error(exc: Exception) -> bool:
+    # ONNX Runtime raises InvalidArgument for input dimensions that do not match the graph;
+    # TorchScript models surface shape mismatches as RuntimeErrors that name the size or shape.
+    if type(exc).__name__ == "InvalidArgument":
+        return True
+    message = str(exc).lower()
+    return any(marker in message for marker in ("batch", "dimension", "shape", "size"))
+
+
+def _create_model_runner(model_path: Path, framework: str, artifact_root: Path | None = None) -> ModelRunner:
     normalized = framework.lower()
     if normalized == "onnx":
-        return _create_onnx_runner(model_path)
+        return _create_onnx_runner(model_path, artifact_root=artifact_root)
     if normalized in {"torchscript", "torch"}:
-        return _create_torchscript_runner(model_path)
+        return _create_torchscript_runner(model_path, artifact_root=artifact_root)
     raise RuntimeError(f"unsupported_framework:{framework}")
 
 
-def _create_onnx_runner(model_path: Path) -> Callable[[Any], Any]:
+def _create_onnx_runner(model_path: Path, artifact_root: Path | None = None) -> ModelRunner:
     try:
         import numpy as np
-        import onnxruntime as ort
+        import onnxruntime  # noqa: F401
     except ImportError as exc:
         raise RuntimeError("onnxruntime_not_installed") from exc
 
-    session = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+    session_options = _onnx_session_options(artifact_root)
+    session, source = create_onnx_session(model_path, session_options, cache_dir=artifact_root)
+    logger.info("onnx session ready: model=%s source=%s options=%s", model_path, source, session_options)
     inputs = session.get_inputs()
     if not inputs:
         raise RuntimeError("onnx_input_not_found")
     input_meta = inputs[0]
 
-    def run(clip):
-        prepared = _prepare_tensor_for_shape(clip, input_meta.shape)
-        outputs = session.run(None, {input_meta.name: prepared})
+    layout = load_layout_manifest(artifact_root, model_path, "onnx") if artifact_root is not None else None
+    if layout is None:
+        layout = onnx_input_layout(input_meta.shape)
+        if artifact_root is not None:
+            save_layout_manifest(artifact_root, model_path, "onnx", layout)
+
+    max_batch_size = _fixed_batch_dim(input_meta.shape)
+    if session_options.io_binding:
+        if not session.get_outputs():
+            raise RuntimeError("onnx_empty_outputs")
+        bound = OnnxIoBinding(session, layout=layout)
+
+        def run_bound(clips):
+            return _to_logits_2d(bound(clips), rows=int(clips.shape[0]), np_module=np)
+
+        return ModelRunner(
+            run_bound,
+            max_batch_size=max_batch_size,
+            input_layout=layout,
+            clip_buffer=bound.clip_buffer,
+            release_clip_buffer=bound.release_clip_buffer,
+        )
+
+    def run(clips):
+        outputs = session.run(None, {input_meta.name: apply_input_layout(clips, layout)})
         if not outputs:
             raise RuntimeError("onnx_empty_outputs")
-        return _to_logits_1d(outputs[0], np_module=np)
+        return _to_logits_2d(outputs[0], rows=int(clips.shape[0]), np_module=np)
+
+    return ModelRunner(run, max_batch_size=max_batch_size, input_layout=layout)
 
-    return run
 
+def _onnx_session_options(artifact_root: Path | None) -> OnnxSessionOptions:
+    options = load_runtime_spec(artifact_root).onnx_session if artifact_root is not None else OnnxSessionOptions()
+    limit = worker_thread_limit()
+    if limit > 0:
+        # Shard workers split the cores between them; 0 (all cores) would oversubscribe.
+        intra = min(options.intra_op_threads, limit) if options.intra_op_threads else limit
+        options = replace(options, intra_op_threads=intra, inter_op_threads=1)
+    return options
 
-def _create_torchscript_runner(model_path: Path) -> Callable[[Any], Any]:
+
+def _create_torchscript_runner(model_path: Path, artifact_root: Path | None = None) -> ModelRunner:
     try:
         import numpy as np
         import torch
     except ImportError as exc:
         raise RuntimeError("torch_not_installed") from exc
+    if worker_thread_limit() > 0:
+        torch.set_num_threads(worker_thread_limit())
 
     model = torch.jit.load(str(model_path), map_location="cpu")
     model.eval()
 
-    def run(clip):
-        tensor = torch.from_numpy(clip).float()
-        attempts: list[tuple[str, Any]] = [
-            ("ncthw", tensor),
-            ("ntchw", tensor.permute(0, 2, 1, 3, 4).contiguous()),
-            ("nviews_ncthw", tensor.unsqueeze(1)),
-            ("nviews_ntchw", tensor.permute(0, 2, 1, 3, 4).contiguous().unsqueeze(1)),
-            ("nviews_ntchw_alt", tensor.unsqueeze(1).permute(0, 1, 3, 2, 4, 5).contiguous()),
-        ]
-
-        outputs = None
-        last_error: Exception | None = None
-        tried_shapes: set[tuple[int, ...]] = set()
+    def forward(inputs):
         with torch.inference_mode():
-            for _, candidate in attempts:
-                candidate_shape = tuple(int(dim) for dim in candidate.shape)
-                if candidate_shape in tried_shapes:
-                    continue
-                tried_shapes.add(candidate_shape)
-                try:
-                    outputs = model(candidate)
-                    break
-                except Exception as exc:
-                    last_error = exc
-
-        if outputs is None:
-            if last_error is None:
-                raise RuntimeError("torchscript_inference_failed")
-            raise RuntimeError(f"torchscript_inference_failed:{last_error}") from last_error
-
+            outputs = model(torch.from_numpy(inputs))
         if isinstance(outputs, (list, tuple)) and outputs:
             outputs = outputs[0]
         if isinstance(outputs, dict) and outputs:
             outputs = next(iter(outputs.values()))
         if hasattr(outputs, "detach"):
             outputs = outputs.detach().cpu().numpy()
-        return _to_logits_1d(outputs, np_module=np)
-
-    return run
+        return outputs
 
-
-def _collect_window_predictions(
-    *,
-    video_path: Path,
-    runner: Callable[[Any], Any],
-    num_frames: int,
-    window_size_frames: int,
-    stride_frames: int,
-    input_size: int,
-    mean: list[float],
-    std: list[float],
-    normalize_to_unit: bool,
-) -> tuple[list[WindowPrediction], VideoMetadata]:
+    def probe(clips) -> tuple[str, Any]:
+        last_error: Exception | None = None
+        tried_shapes: set[tuple[int, ...]] = set()
+        for layout in TORCHSCRIPT_PROBE_LAYOUTS:
+            candidate = apply_input_layout(clips, layout)
+            if candidate.shape in tried_shapes:
+                continue
+            tried_shapes.add(candidate.shape)
+            try:
+                return layout, forward(candidate)
+            except Exception as exc:
+                last_error = exc
+        if last_error is None:
+            raise RuntimeError("torchscript_inference_failed")
+        raise RuntimeError(f"torchscript_inference_failed:{last_error}") from last_error
+
+    def run(clips):
+        clips = clips.astype(np.float32, copy=False)
+        if runner.input_layout is not None:
+            outputs = forward(apply_input_layout(clips, runner.input_layout))
+        else:
+            # Unknown layout: probe once, then persist it so cold processes skip failed passes.
+            layout, outputs = probe(clips)
+            runner.input_layout = layout
+            if artifact_root is not None:
+                save_layout_manifest(artifact_root, model_path, "torchscript", layout)
+        return _to_logits_2d(outputs, rows=int(clips.shape[0]), np_module=np)
+
+    layout = load_layout_manifest(artifact_root, model_path, "torchscript") if artifact_root is not None else None
+    runner = ModelRunner(run, input_layout=layout)
+    return runner
+
+
+def _open_frames(video_path: Path, spec: RuntimeSpec, *, use_frame_store: bool) -> tuple[Any, VideoMetadata]:
+    # Job videos prefer the decoded frame store (frames already at input_size) when it is
+    # enabled; the first run of a video builds it, later runs never touch the codec. Live
+    # chunks are seen once, so hashing and storing them would only evict job entries.
+    frame_store = get_frame_store() if use_frame_store else None
+    if frame_store is not None:
+        capture = frame_store.open(video_path, input_size=spec.input_size)
+        if capture is not None:
+            return capture, _capture_metadata(capture, num_frames=spec.num_frames)
+    return _open_video(video_path, num_frames=spec.num_frames)
+
+
+def _open_video(video_path: Path, *, num_frames: int) -> tuple[Any, VideoMetadata]:
     try:
         import cv2  # type: ignore[import-untyped]
-        import numpy as np
+        import numpy  # noqa: F401
     except ImportError as exc:
         raise RuntimeError("opencv_or_numpy_not_installed") from exc
 
@@ -289,444 +806,621 @@ def _collect_window_predictions(
         raise RuntimeError("video_open_failed")
 
     try:
-        fps = float(capture.get(cv2.CAP_PROP_FPS) or 0.0)
-        if fps <= 1e-3:
-            fps = 25.0
-
-        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
-        if frame_count <= 0:
-            clip = _read_single_clip_unknown(
-                capture=capture,
-                num_frames=num_frames,
-                input_size=input_size,
-                mean=mean,
-                std=std,
-                normalize_to_unit=normalize_to_unit,
-            )
-            logits = runner(clip)
-            probabilities = _softmax(logits)
-            class_index = int(np.argmax(probabilities))
-            confidence = float(probabilities[class_index])
-            duration_sec = round(num_frames / fps, 3)
-            window = WindowPrediction(
-                start_sec=0.0,
-                end_sec=max(duration_sec, 0.1),
-                class_index=class_index,
-                confidence=confidence,
-                probabilities=probabilities,
-            )
-            return [window], VideoMetadata(fps=fps, frame_count=0, duration_sec=window.end_sec)
-
-        starts = list(range(0, max(frame_count - window_size_frames + 1, 1), stride_frames))
-        tail_start = max(frame_count - window_size_frames, 0)
-        if not starts:
-            starts = [0]
-        elif starts[-1] != tail_start:
-            starts.append(tail_start)
-
-        windows: list[WindowPrediction] = []
-        for start in starts:
-            end = min(start + window_size_frames, frame_count)
-            clip = _read_clip_for_window(
-                capture=capture,
-                start_frame=start,
-                end_frame=end,
-                num_frames=num_frames,
-                input_size=input_size,
-                mean=mean,
-                std=std,
-                normalize_to_unit=normalize_to_unit,
-            )
-            logits = runner(clip)
-            probabilities = _softmax(logits)
-            class_index = int(np.argmax(probabilities))
-            confidence = float(probabilities[class_index])
-            start_sec = round(start / fps, 3)
-            end_sec = round(max(end / fps, start_sec + (1.0 / fps)), 3)
-            windows.append(
-                WindowPrediction(
-                    start_sec=start_sec,
-                    end_sec=end_sec,
-                    class_index=class_index,
-                    confidence=confidence,
-                    probabilities=probabilities,
-                )
-            )
+        return capture, _capture_metadata(capture, num_frames=num_frames)
+    except Exception:
+        capture.release()
+        raise
+
 
+def _capture_metadata(capture, *, num_frames: int) -> VideoMetadata:
+    import cv2  # type: ignore[import-untyped]
+
+    fps = float(capture.get(cv2.CAP_PROP_FPS) or 0.0)
+    if fps <= 1e-3:
+        fps = 25.0
+    frame_count = max(int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0), 0)
+    if frame_count > 0:
         duration_sec = round(frame_count / fps, 3)
-        return windows, VideoMetadata(fps=fps, frame_count=frame_count, duration_sec=duration_sec)
+    else:
+        # Unknown length: a single clip is read from the head of the stream.
+        duration_sec = max(round(num_frames / fps, 3), 0.1)
+    return VideoMetadata(fps=fps, frame_count=frame_count, duration_sec=duration_sec)
+
+
+@dataclass
+class _WindowBlock:
+    start_sec: list[float]
+    end_sec: list[float]
+    probabilities: Any  # float32 [B, classes]; all-zero rows for skipped windows
+    class_index: Any  # [B], -1 for windows the motion gate skipped
+    confidence: Any  # [B]
+
+
+def _iter_capture_windows(capture, metadata: VideoMetadata, **options: Any) -> Iterator[WindowPrediction]:
+    blocks = _iter_capture_blocks(capture, metadata, **options)
+    try:
+        for block in blocks:
+            for row, (index, score) in enumerate(zip(block.class_index.tolist(), block.confidence.tolist())):
+                yield WindowPrediction(
+                    start_sec=block.start_sec[row],
+                    end_sec=block.end_sec[row],
+                    class_index=index,
+                    confidence=score,
+                    probabilities=block.probabilities[row],
+                )
     finally:
-        capture.release()
+        blocks.close()
 
 
-def _read_single_clip_unknown(
-    *,
+def _iter_capture_blocks(
     capture,
+    metadata: VideoMetadata,
+    *,
+    runner: ModelRunner,
     num_frames: int,
-    input_size: int,
-    mean: list[float],
-    std: list[float],
-    normalize_to_unit: bool,
-):
-    raw_frames = []
-    while len(raw_frames) < num_frames:
-        ok, frame = capture.read()
-        if not ok or frame is None:
-            break
-        raw_frames.append(frame)
+    window_size_frames: int,
+    stride_frames: int,
+    preprocessor: ClipPreprocessor,
+    inference_batch_size: int = 1,
+    frame_decode_mode: str = "auto",
+    sequential_max_gap_frames: int = 24,
+    align_sampling_to_stride: bool = False,
+    target_fps: float = 0.0,
+    frame_cache_max_bytes: int = 0,
+    pipelined: bool = False,
+    pipeline_queue_depth: int = 4,
+    preprocess_workers: int = 2,
+    motion_gate_threshold: float | None = None,
+    motion_gate_thumbnail_size: int = 32,
+    num_classes_hint: int = 0,
+    scan_mode: str = "dense",
+    adaptive_stride_factor: int = 4,
+    adaptive_confidence_margin: float = 0.1,
+    adaptive_thresholds: tuple[float, ...] = (),
+    sharding: _ShardSource | None = None,
+    video_path: Path | None = None,
+    report: InferenceReport | None = None,
+) -> Iterator[_WindowBlock]:
+    fps = metadata.fps
+    if metadata.frame_count <= 0:
+        clip = _read_single_clip_unknown(capture=capture, num_frames=num_frames, preprocessor=preprocessor)
+        probabilities = softmax_rows(runner(clip)[:1])
+        if report is not None:
+            report.windows = 1
+        class_index, confidence = argmax_rows(probabilities)
+        yield _WindowBlock(
+            start_sec=[0.0],
+            end_sec=[metadata.duration_sec],
+            probabilities=probabilities,
+            class_index=class_index,
+            confidence=confidence,
+        )
+        return
 
-    if not raw_frames:
-        raise RuntimeError("video_decode_failed")
-    while len(raw_frames) < num_frames:
-        raw_frames.append(raw_frames[-1])
-    return _frames_to_clip(
-        raw_frames=raw_frames[:num_frames],
-        input_size=input_size,
-        mean=mean,
-        std=std,
-        normalize_to_unit=normalize_to_unit,
+    plans = plan_windows(
+        frame_count=metadata.frame_count,
+        window_size_frames=window_size_frames,
+        stride_frames=stride_frames,
+        num_frames=num_frames,
+        align_to_stride=align_sampling_to_stride,
+        frame_step=timeline_frame_step(fps, target_fps),
+    )
+    pass_options = {
+        "fps": fps,
+        "runner": runner,
+        "num_frames": num_frames,
+        "preprocessor": preprocessor,
+        "inference_batch_size": inference_batch_size,
+        "frame_decode_mode": frame_decode_mode,
+        "sequential_max_gap_frames": sequential_max_gap_frames,
+        "frame_cache_max_bytes": frame_cache_max_bytes,
+        "pipelined": pipelined,
+        "pipeline_queue_depth": pipeline_queue_depth,
+        "preprocess_workers": preprocess_workers,
+        "motion_gate_threshold": motion_gate_threshold,
+        "motion_gate_thumbnail_size": motion_gate_thumbnail_size,
+        "num_classes_hint": num_classes_hint,
+        "report": report,
+    }
+    shard_job = None
+    if sharding is not None and video_path is not None:
+        shard_job = _ShardJob(
+            source=sharding,
+            video_path=str(video_path),
+            windows_per_shard=windows_per_shard(
+                shard_seconds=sharding.shard_seconds,
+                fps=fps,
+                stride_frames=stride_frames,
+                frame_step=timeline_frame_step(fps, target_fps),
+                batch_size=inference_batch_size,
+            ),
+        )
+    # Coarse windows must still overlap, or the realtime decoder would see gaps between them.
+    factor = min(adaptive_stride_factor, max(window_size_frames // stride_frames, 1))
+    if report is not None:
+        report.scan_mode = scan_mode if scan_mode == "adaptive" and factor > 1 else "dense"
+    if scan_mode != "adaptive" or factor <= 1 or len(plans) <= 2:
+        yield from _iter_pass_blocks(capture, plans, shard_job=shard_job, pass_options=pass_options)
+        return
+    yield from _iter_adaptive_blocks(
+        capture,
+        plans,
+        factor=factor,
+        confidence_margin=adaptive_confidence_margin,
+        thresholds=adaptive_thresholds,
+        shard_job=shard_job,
+        pass_options=pass_options,
     )
 
 
-def _read_clip_for_window(
-    *,
-    capture,
-    start_frame: int,
-    end_frame: int,
-    num_frames: int,
-    input_size: int,
-    mean: list[float],
-    std: list[float],
-    normalize_to_unit: bool,
-):
-    import cv2  # type: ignore[import-untyped]
-    import numpy as np
-
-    if end_frame <= start_frame:
-        end_frame = start_frame + 1
+@dataclass(frozen=True)
+class _ShardJob:
+    source: _ShardSource
+    video_path: str
+    windows_per_shard: int
 
-    if end_frame - start_frame == 1:
-        indices = [start_frame] * num_frames
-    else:
-        indices = np.linspace(start_frame, end_frame - 1, num_frames).round().astype(int).tolist()
 
-    raw_frames = []
-    for index in indices:
-        capture.set(cv2.CAP_PROP_POS_FRAMES, float(index))
-        ok, frame = capture.read()
-        if ok and frame is not None:
-            raw_frames.append(frame)
+@dataclass
+class _ShardTask:
+    job: _ShardJob
+    plans: list[WindowPlan]
+    pass_options: dict[str, Any]
 
-    if not raw_frames:
-        raise RuntimeError("window_decode_failed")
-    while len(raw_frames) < num_frames:
-        raw_frames.append(raw_frames[-1])
-    return _frames_to_clip(
-        raw_frames=raw_frames[:num_frames],
-        input_size=input_size,
-        mean=mean,
-        std=std,
-        normalize_to_unit=normalize_to_unit,
-    )
 
+def _iter_pass_blocks(
+    capture,
+    plans: list[WindowPlan],
+    *,
+    shard_job: _ShardJob | None,
+    pass_options: dict[str, Any],
+) -> Iterator[_WindowBlock]:
+    ranges = shard_ranges(len(plans), shard_size=shard_job.windows_per_shard) if shard_job is not None else []
+    pool = get_shard_pool(shard_job.source.workers) if len(ranges) > 1 else None
+    if pool is None:
+        yield from _iter_plan_blocks(capture, plans, **pass_options)
+        return
+    yield from _iter_sharded_blocks(pool, plans, ranges, shard_job=shard_job, pass_options=pass_options)
+
+
+def _iter_sharded_blocks(
+    pool: ProcessPoolExecutor,
+    plans: list[WindowPlan],
+    ranges: list[tuple[int, int]],
+    *,
+    shard_job: _ShardJob,
+    pass_options: dict[str, Any],
+) -> Iterator[_WindowBlock]:
+    # Each window belongs to exactly one shard; a shard re-decodes the frames its first windows
+    # share with the previous shard, so shard time ranges overlap but window ranges do not.
+    # Shards are merged in window order, which makes the stream identical to a single-process
+    # scan (motion-gated windows can regroup batches at a boundary, within float tolerance).
+    worker_options = {key: value for key, value in pass_options.items() if key not in {"runner", "report"}}
+    futures = [
+        pool.submit(_infer_shard, _ShardTask(job=shard_job, plans=plans[start:end], pass_options=worker_options))
+        for start, end in ranges
+    ]
+    report = pass_options["report"]
+    try:
+        for future in futures:
+            try:
+                blocks, shard_report = future.result()
+            except BrokenProcessPool as exc:
+                discard_shard_pool(pool)
+                raise RuntimeError("shard_worker_crashed") from exc
+            _observe_shard_run(shard_report)
+            if report is not None:
+                _merge_shard_report(report, shard_report)
+            yield from blocks
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _infer_shard(task: _ShardTask) -> tuple[list[_WindowBlock], InferenceReport]:
+    # Runs in a pool process: the runner comes from that process's own runner cache.
+    source = task.job.source
+    root = Path(source.artifact_path)
+    spec = load_runtime_spec(root).with_overrides(source.runtime_config_overrides)
+    model_path = resolve_model_path(root, source.framework)
+    runner = _get_model_runner(model_path=model_path, framework=source.framework, artifact_root=root)
+    report = InferenceReport()
+    capture, _ = _open_frames(Path(task.job.video_path), spec, use_frame_store=source.use_frame_store)
+    try:
+        blocks = list(
+            _iter_plan_blocks(
+                capture,
+                task.plans,
+                runner=runner,
+                report=report,
+                start_frame=min(index for plan in task.plans for index in plan.indices),
+                observe_metrics=False,
+                **task.pass_options,
+            )
+        )
+    finally:
+        capture.release()
+    return blocks, report
+
+
+def _observe_shard_run(shard: InferenceReport) -> None:
+    # One shard is one plan pass, so its report holds exactly what that pass would have observed.
+    if shard.pipelined:
+        observe_pipeline_run(shard.decode_blocked_sec, shard.inference_starved_sec, shard.pipeline_queue_max_depth)
+    if shard.windows_gated:
+        observe_motion_gate_run(shard.windows_skipped / shard.windows_gated)
+
+
+def _merge_shard_report(report: InferenceReport, shard: InferenceReport) -> None:
+    report.shards += 1
+    report.windows += shard.windows
+    report.frame_cache_hits += shard.frame_cache_hits
+    report.frame_cache_misses += shard.frame_cache_misses
+    report.frames_preprocessed += shard.frames_preprocessed
+    report.frame_cache_peak_bytes = max(report.frame_cache_peak_bytes, shard.frame_cache_peak_bytes)
+    report.pipelined = shard.pipelined
+    # Busy time summed over workers, so it can exceed wall time.
+    report.decode_sec = round(report.decode_sec + shard.decode_sec, 4)
+    report.preprocess_sec = round(report.preprocess_sec + shard.preprocess_sec, 4)
+    report.inference_sec = round(report.inference_sec + shard.inference_sec, 4)
+    report.decode_blocked_sec = round(report.decode_blocked_sec + shard.decode_blocked_sec, 4)
+    report.inference_starved_sec = round(report.inference_starved_sec + shard.inference_starved_sec, 4)
+    report.pipeline_queue_max_depth = max(report.pipeline_queue_max_depth, shard.pipeline_queue_max_depth)
+    report.windows_skipped += shard.windows_skipped
+    report.windows_gated += shard.windows_gated
+    report.frames_grabbed += shard.frames_grabbed
+    report.frames_retrieved += shard.frames_retrieved
+
+
+def _iter_adaptive_blocks(
+    capture,
+    plans: list[WindowPlan],
+    *,
+    factor: int,
+    confidence_margin: float,
+    thresholds: tuple[float, ...],
+    shard_job: _ShardJob | None,
+    pass_options: dict[str, Any],
+) -> Iterator[_WindowBlock]:
+    # Coarse-to-fine scan: every `factor`-th window of the dense grid (plus the tail window) runs
+    # first; the dense windows between two coarse neighbours only run when those neighbours
+    # disagree on the class or either confidence sits within `confidence_margin` of a decoder
+    # threshold. Both passes stay on the dense grid, so refined spans match a dense scan exactly.
+    # The merged windows are only known after the second pass, so this mode does not stream.
+    import numpy as np
 
-def _frames_to_clip(
+    coarse_ids = list(range(0, len(plans), factor))
+    if coarse_ids[-1] != len(plans) - 1:
+        coarse_ids.append(len(plans) - 1)
+    coarse_plans = [plans[index] for index in coarse_ids]
+    blocks = list(_iter_pass_blocks(capture, coarse_plans, shard_job=shard_job, pass_options=pass_options))
+    refine_ids = _refine_window_ids(
+        coarse_ids,
+        np.concatenate([block.class_index for block in blocks]),
+        np.concatenate([block.confidence for block in blocks]),
+        confidence_margin=confidence_margin,
+        thresholds=thresholds,
+    )
+    window_ids = list(coarse_ids)
+    if refine_ids:
+        _rewind_capture(capture)
+        refine_plans = [plans[index] for index in refine_ids]
+        blocks.extend(_iter_pass_blocks(capture, refine_plans, shard_job=shard_job, pass_options=pass_options))
+        window_ids.extend(refine_ids)
+    report = pass_options["report"]
+    if report is not None:
+        report.windows_refined += len(refine_ids)
+    yield _merge_window_blocks(blocks, window_ids)
+
+
+def _refine_window_ids(
+    coarse_ids: list[int],
+    class_index,
+    confidence,
     *,
-    raw_frames: list[Any],
-    input_size: int,
-    mean: list[float],
-    std: list[float],
-    normalize_to_unit: bool,
-):
+    confidence_margin: float,
+    thresholds: tuple[float, ...],
+) -> list[int]:
     import numpy as np
 
-    frames = [
-        _preprocess_frame(
-            frame,
-            input_size=input_size,
-            mean=mean,
-            std=std,
-            normalize_to_unit=normalize_to_unit,
-        )
-        for frame in raw_frames
-    ]
-    clip = np.stack(frames, axis=0)  # [T, H, W, C]
-    clip = np.transpose(clip, (3, 0, 1, 2))  # [C, T, H, W]
-    return np.expand_dims(clip, axis=0).astype(np.float32)  # [N, C, T, H, W]
+    uncertain = np.zeros(len(coarse_ids), dtype=bool)
+    for threshold in thresholds:
+        uncertain |= np.abs(confidence - threshold) <= confidence_margin
+    refine = (class_index[1:] != class_index[:-1]) | uncertain[1:] | uncertain[:-1]
+    refined: list[int] = []
+    for pair in np.flatnonzero(refine).tolist():
+        refined.extend(range(coarse_ids[pair] + 1, coarse_ids[pair + 1]))
+    return refined
 
 
-def _preprocess_frame(
-    frame,
-    *,
-    input_size: int,
-    mean: list[float],
-    std: list[float],
-    normalize_to_unit: bool,
-):
-    import cv2  # type: ignore[import-untyped]
+def _merge_window_blocks(blocks: list[_WindowBlock], window_ids: list[int]) -> _WindowBlock:
     import numpy as np
 
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    resized = cv2.resize(rgb, (input_size, input_size), interpolation=cv2.INTER_LINEAR)
-    normalized = resized.astype(np.float32)
-    if normalize_to_unit:
-        normalized = normalized / 255.0
-    mean_arr = np.asarray(mean, dtype=np.float32).reshape(1, 1, 3)
-    std_arr = np.asarray(std, dtype=np.float32).reshape(1, 1, 3)
-    return (normalized - mean_arr) / std_arr
-
+    # A pass whose windows were all motion-skipped only knows the class-count hint; its rows
+    # are all zero, so padding them to the real width is exact.
+    width = max(block.probabilities.shape[1] for block in blocks)
+    probabilities = np.concatenate(
+        [np.pad(block.probabilities, ((0, 0), (0, width - block.probabilities.shape[1]))) for block in blocks],
+        axis=0,
+    )
+    order = np.argsort(np.asarray(window_ids), kind="stable")
+    start_sec = [value for block in blocks for value in block.start_sec]
+    end_sec = [value for block in blocks for value in block.end_sec]
+    return _WindowBlock(
+        start_sec=[start_sec[row] for row in order.tolist()],
+        end_sec=[end_sec[row] for row in order.tolist()],
+        probabilities=probabilities[order],
+        class_index=np.concatenate([block.class_index for block in blocks])[order],
+        confidence=np.concatenate([block.confidence for block in blocks])[order],
+    )
 
-def _resolve_normalize_to_unit(*, config: dict[str, Any], mean: list[float], std: list[float]) -> bool:
-    explicit = config.get("normalize_to_unit")
-    if isinstance(explicit, bool):
-        return explicit
-    if _max_abs(mean) > 3.0 or _max_abs(std) > 3.0:
-        return False
-    return True
 
+def _rewind_capture(capture) -> None:
+    import cv2  # type: ignore[import-untyped]
 
-def _max_abs(values: list[float]) -> float:
-    if not values:
-        return 0.0
-    return max(abs(item) for item in values)
+    if not capture.set(cv2.CAP_PROP_POS_FRAMES, 0.0):
+        raise RuntimeError("video_rewind_failed")
 
 
-def _decode_realtime_windows(
+def _iter_plan_blocks(
+    capture,
+    plans: list[WindowPlan],
     *,
-    windows: list[WindowPrediction],
-    labels: list[str],
-    config: dict[str, Any],
-) -> list[RuntimePrediction]:
-    min_confidence = _as_float(config.get("realtime_min_confidence"), fallback=0.2, minimum=0.01, maximum=1.0)
-    min_duration_sec = _as_float(config.get("realtime_min_duration_sec"), fallback=0.15, minimum=0.0, maximum=30.0)
-    max_gap_sec = _as_float(config.get("realtime_max_gap_sec"), fallback=0.35, minimum=0.0, maximum=5.0)
-
-    segments: list[RuntimePrediction] = []
-    current_idx: int | None = None
-    current_start = 0.0
-    current_end = 0.0
-    current_confidences: list[float] = []
-
-    def close_current():
-        nonlocal current_idx, current_start, current_end, current_confidences
-        if current_idx is None or not current_confidences:
-            current_idx = None
-            current_confidences = []
-            return
-        duration = current_end - current_start
-        avg_confidence = sum(current_confidences) / len(current_confidences)
-        if duration >= min_duration_sec:
-            label = _label_for_index(current_idx, labels)
-            segments.append(
-                RuntimePrediction(
-                    label=label,
-                    confidence=round(avg_confidence, 4),
-                    start_sec=round(current_start, 3),
-                    end_sec=round(current_end, 3),
-                )
-            )
-        current_idx = None
-        current_confidences = []
-
-    for window in windows:
-        if window.confidence < min_confidence:
-            close_current()
-            continue
-
-        if current_idx is not None:
-            gap = max(0.0, window.start_sec - current_end)
-            if window.class_index == current_idx and gap <= max_gap_sec:
-                current_end = window.end_sec
-                current_confidences.append(window.confidence)
-                continue
-
-        close_current()
-        current_idx = window.class_index
-        current_start = window.start_sec
-        current_end = window.end_sec
-        current_confidences = [window.confidence]
+    fps: float,
+    runner: ModelRunner,
+    num_frames: int,
+    preprocessor: ClipPreprocessor,
+    inference_batch_size: int,
+    frame_decode_mode: str,
+    sequential_max_gap_frames: int,
+    frame_cache_max_bytes: int,
+    pipelined: bool,
+    pipeline_queue_depth: int,
+    preprocess_workers: int,
+    motion_gate_threshold: float | None,
+    motion_gate_thumbnail_size: int,
+    num_classes_hint: int,
+    report: InferenceReport | None,
+    start_frame: int = 0,
+    observe_metrics: bool = True,
+) -> Iterator[_WindowBlock]:
+    decode_mode = resolve_frame_decode_mode(frame_decode_mode, plans, max_gap_frames=sequential_max_gap_frames)
+    frame_cache = PreprocessedFrameCache(max_bytes=frame_cache_max_bytes)
+    decode_stats = FrameDecodeStats()
+    frame_source = iter_window_frames(capture, plans, mode=decode_mode, stats=decode_stats, start_frame=start_frame)
+    batch_size = max(inference_batch_size, 1)
+    bound_input = None
+    if pipelined:
+        # Clips queued or being prepared ahead of inference each hold a slot, on top of the
+        # batch being filled, so acquire() never waits on a slot the consumer cannot free.
+        assembler = ClipAssembler(
+            preprocessor=preprocessor,
+            num_frames=num_frames,
+            slots=batch_size + pipeline_queue_depth + 2,
+        )
+    else:
+        # Serial batches fill rows 0..B-1 in order, so a full batch is the buffer itself; when
+        # the runner has a bound input it is kept as that buffer for the whole scan and full
+        # batches run without a copy. The runner's pool is shared, so resuming this generator
+        # on another thread is fine.
+        size = preprocessor.input_size
+        bound_input = runner.clip_buffer(batch_size, (3, num_frames, size, size), keep=True)
+        assembler = ClipAssembler(
+            preprocessor=preprocessor,
+            num_frames=num_frames,
+            slots=batch_size,
+            buffer=bound_input,
+        )
 
-    close_current()
-    return segments
+    motion_gate = (
+        MotionGate(threshold=motion_gate_threshold, thumbnail_size=motion_gate_thumbnail_size)
+        if motion_gate_threshold is not None
+        else None
+    )
 
+    def build_clip(entry):
+        if motion_gate is not None and motion_gate.is_idle(entry[1]):
+            return None, None
+        slot = assembler.acquire()
+        try:
+            return slot, assembler.assemble(slot, entry[1], frame_cache)
+        except BaseException:
+            assembler.release([slot])
+            raise
+
+    pipeline_stats = PipelineStats()
+    if pipelined:
+        # Decode and preprocessing run on background threads; this thread only does inference.
+        clip_stream = iter_pipelined(
+            frame_source,
+            build_clip,
+            queue_depth=pipeline_queue_depth,
+            workers=preprocess_workers,
+            stats=pipeline_stats,
+        )
+    else:
+        clip_stream = _iter_serial_clips(frame_source, build_clip, pipeline_stats)
 
-def _decode_ctc_windows(
-    *,
-    windows: list[WindowPrediction],
-    labels: list[str],
-    config: dict[str, Any],
-) -> list[RuntimePrediction]:
-    blank_index = _resolve_ctc_blank_index(labels=labels, config=config)
-    blank_threshold = _as_float(config.get("ctc_blank_threshold"), fallback=0.12, minimum=0.0, maximum=1.0)
-    min_token_confidence = _as_float(config.get("ctc_min_token_confidence"), fallback=0.16, minimum=0.01, maximum=1.0)
-    min_duration_sec = _as_float(config.get("ctc_min_duration_sec"), fallback=0.12, minimum=0.0, maximum=30.0)
-
-    tokens: list[RuntimePrediction] = []
-    prev_symbol = -1
-    current_idx: int | None = None
-    current_start = 0.0
-    current_end = 0.0
-    current_confidences: list[float] = []
-
-    def close_current():
-        nonlocal current_idx, current_start, current_end, current_confidences
-        if current_idx is None or not current_confidences:
-            current_idx = None
-            current_confidences = []
-            return
-        avg_confidence = sum(current_confidences) / len(current_confidences)
-        duration = current_end - current_start
-        if avg_confidence >= min_token_confidence and duration >= min_duration_sec:
-            tokens.append(
-                RuntimePrediction(
-                    label=_label_for_index(current_idx, labels),
-                    confidence=round(avg_confidence, 4),
-                    start_sec=round(current_start, 3),
-                    end_sec=round(current_end, 3),
-                )
+    window_count = 0
+    pending: list[tuple[int, int, int | None]] = []
+    active = 0
+    num_classes: int | None = None
+    inference_sec = 0.0
+    try:
+        for (plan, _), (slot, _) in clip_stream:
+            # Later windows never sample frames before the current start.
+            frame_cache.discard_before(plan.start_frame)
+            if motion_gate is not None:
+                motion_gate.discard_before(plan.start_frame)
+            pending.append((plan.start_frame, plan.end_frame, slot))
+            active += slot is not None
+            # Skipped windows ride along with the next batch so blocks stay in window order; on
+            # their own they can only be emitted once the class count is known.
+            if active < batch_size and (active or num_classes is None):
+                continue
+            started = perf_counter()
+            block = _infer_window_block(
+                runner=runner,
+                assembler=assembler,
+                pending=pending,
+                fps=fps,
+                num_classes=num_classes or max(num_classes_hint, 1),
             )
-        current_idx = None
-        current_confidences = []
-
-    for window in windows:
-        is_pseudo_blank = window.confidence < blank_threshold
-        is_blank_class = blank_index is not None and window.class_index == blank_index
-        symbol = -1 if (is_pseudo_blank or is_blank_class) else window.class_index
-
-        if symbol != prev_symbol:
-            close_current()
-            if symbol != -1:
-                current_idx = symbol
-                current_start = window.start_sec
-                current_end = window.end_sec
-                current_confidences = [window.confidence]
-            prev_symbol = symbol
-            continue
-
-        if symbol != -1 and current_idx is not None:
-            current_end = window.end_sec
-            current_confidences.append(window.confidence)
-
-    close_current()
-    return tokens
-
-
-def _resolve_ctc_blank_index(labels: list[str], config: dict[str, Any]) -> int | None:
-    explicit = config.get("ctc_blank_index")
-    if explicit is not None:
-        try:
-            value = int(explicit)
-            if value >= 0:
-                return value
-        except (TypeError, ValueError):
-            pass
-
-    blank_aliases = {"<blank>", "blank", "[blank]", "ctc_blank", "_"}
-    for idx, label in enumerate(labels):
-        if label.strip().lower() in blank_aliases:
-            return idx
-    return None
+            inference_sec += perf_counter() - started
+            num_classes = int(block.probabilities.shape[1])
+            pending = []
+            active = 0
+            window_count += len(block.start_sec)
+            yield block
+        if pending:
+            started = perf_counter()
+            block = _infer_window_block(
+                runner=runner,
+                assembler=assembler,
+                pending=pending,
+                fps=fps,
+                num_classes=num_classes or max(num_classes_hint, 1),
+            )
+            inference_sec += perf_counter() - started
+            window_count += len(block.start_sec)
+            yield block
+    finally:
+        # Stops the decode thread before the caller releases the capture.
+        clip_stream.close()
+        if bound_input is not None:
+            runner.release_clip_buffer(bound_input)
+        # Shard workers have their own Prometheus registry; the parent observes their reports.
+        if observe_metrics and pipelined:
+            observe_pipeline_run(
+                pipeline_stats.decode_blocked_sec,
+                pipeline_stats.inference_starved_sec,
+                pipeline_stats.queue_max_depth,
+            )
+        if observe_metrics and motion_gate is not None and motion_gate.windows_checked:
+            observe_motion_gate_run(motion_gate.windows_idle / motion_gate.windows_checked)
+        if report is not None:
+            # Accumulated, since an adaptive scan runs more than one pass over the video.
+            report.windows += window_count
+            report.frame_cache_hits += frame_cache.hits
+            report.frame_cache_misses += frame_cache.misses
+            report.frames_preprocessed += frame_cache.misses + assembler.frames_resized
+            report.frame_cache_bytes = frame_cache.bytes_held
+            report.frame_cache_peak_bytes = max(report.frame_cache_peak_bytes, frame_cache.peak_bytes)
+            report.pipelined = pipelined
+            report.decode_sec = round(report.decode_sec + pipeline_stats.decode_sec, 4)
+            report.preprocess_sec = round(report.preprocess_sec + pipeline_stats.preprocess_sec, 4)
+            report.inference_sec = round(report.inference_sec + inference_sec, 4)
+            report.decode_blocked_sec = round(report.decode_blocked_sec + pipeline_stats.decode_blocked_sec, 4)
+            report.inference_starved_sec = round(report.inference_starved_sec + pipeline_stats.inference_starved_sec, 4)
+            report.pipeline_queue_max_depth = max(report.pipeline_queue_max_depth, pipeline_stats.queue_max_depth)
+            report.pipeline_queue_mean_depth = pipeline_stats.queue_mean_depth
+            report.windows_skipped += motion_gate.windows_idle if motion_gate is not None else 0
+            report.windows_gated += motion_gate.windows_checked if motion_gate is not None else 0
+            report.frames_grabbed += decode_stats.grabbed
+            report.frames_retrieved += decode_stats.retrieved
+
+
+def _iter_serial_clips(frame_source, build_clip, stats: PipelineStats):
+    iterator = iter(frame_source)
+    while True:
+        started = perf_counter()
+        entry = next(iterator, None)
+        stats.decode_sec += perf_counter() - started
+        if entry is None:
+            return
+        started = perf_counter()
+        clip = build_clip(entry)
+        stats.preprocess_sec += perf_counter() - started
+        yield entry, clip
 
 
-def _fallback_top_windows(
+def _infer_window_block(
     *,
-    windows: list[WindowPrediction],
-    labels: list[str],
-    top_k: int,
-) -> list[RuntimePrediction]:
-    resolved_top_k = max(1, min(top_k, 10))
-    result: list[RuntimePrediction] = []
-    seen_indices: set[int] = set()
-    for window in sorted(windows, key=lambda item: item.confidence, reverse=True):
-        if window.class_index in seen_indices:
-            continue
-        seen_indices.add(window.class_index)
-        result.append(
-            RuntimePrediction(
-                label=_label_for_index(window.class_index, labels),
-                confidence=round(window.confidence, 4),
-                start_sec=round(window.start_sec, 3),
-                end_sec=round(window.end_sec, 3),
-            )
-        )
-        if len(result) >= resolved_top_k:
-            break
-    return result
-
+    runner: ModelRunner,
+    assembler: ClipAssembler,
+    pending: list[tuple[int, int, int | None]],
+    fps: float,
+    num_classes: int,
+) -> _WindowBlock:
+    import numpy as np
 
-def _label_for_index(index: int, labels: list[str]) -> str:
-    if 0 <= index < len(labels):
-        return labels[index]
-    return f"class_{index}"
+    slots = [slot for _, _, slot in pending if slot is not None]
+    probabilities = None
+    if slots:
+        clips = assembler.rows(slots)
+        if clips is None:
+            # Out-of-order slots (pipelined mode): gather into the runner's bound input if it has one.
+            clips = runner.clip_buffer(len(slots), assembler.clip_shape)
+            if clips is None:
+                clips = assembler.gather_buffer(len(slots))
+            for row, slot in enumerate(slots):
+                clips[row] = assembler.buffer[slot]
+        try:
+            probabilities = softmax_rows(runner(clips))
+        finally:
+            assembler.release(slots)
+
+    skipped = [row for row, (_, _, slot) in enumerate(pending) if slot is None]
+    if skipped:
+        active = probabilities
+        width = active.shape[1] if active is not None else num_classes
+        probabilities = np.zeros((len(pending), width), dtype=np.float32)
+        if active is not None:
+            probabilities[[row for row, (_, _, slot) in enumerate(pending) if slot is not None]] = active
+    class_index, confidence = argmax_rows(probabilities)
+    if skipped:
+        class_index[skipped] = -1
+        confidence[skipped] = 0.0
+
+    start_secs: list[float] = []
+    end_secs: list[float] = []
+    for start, end, _ in pending:
+        start_sec = round(start / fps, 3)
+        start_secs.append(start_sec)
+        end_secs.append(round(max(end / fps, start_sec + (1.0 / fps)), 3))
+    return _WindowBlock(
+        start_sec=start_secs,
+        end_sec=end_secs,
+        probabilities=probabilities,
+        class_index=class_index,
+        confidence=confidence,
+    )
 
 
-def _prepare_tensor_for_shape(clip, input_shape):
-    import numpy as np
+def _read_single_clip_unknown(*, capture, num_frames: int, preprocessor: ClipPreprocessor):
+    raw_frames = []
+    while len(raw_frames) < num_frames:
+        ok, frame = capture.read()
+        if not ok or frame is None:
+            break
+        raw_frames.append(frame)
 
-    if not isinstance(input_shape, list):
-        return clip
-    if len(input_shape) == 5:
-        channel_dim = _shape_dim(input_shape[1])
-        temporal_dim = _shape_dim(input_shape[2])
-        if channel_dim == 3:
-            return clip
-        if temporal_dim == 3:
-            return np.transpose(clip, (0, 2, 1, 3, 4))
-        return clip
-    if len(input_shape) == 4:
-        center_index = clip.shape[2] // 2
-        return clip[:, :, center_index, :, :]
-    return clip
+    if not raw_frames:
+        raise RuntimeError("video_decode_failed")
+    while len(raw_frames) < num_frames:
+        raw_frames.append(raw_frames[-1])
+    return preprocessor.clip_from_frames(raw_frames[:num_frames])
 
 
 def _shape_dim(value: Any) -> int | None:
     return value if isinstance(value, int) else None
 
 
-def _to_logits_1d(value, *, np_module):
+def _fixed_batch_dim(input_shape: Any) -> int | None:
+    if not isinstance(input_shape, list) or not input_shape:
+        return None
+    batch_dim = _shape_dim(input_shape[0])
+    if batch_dim is None or batch_dim <= 0:
+        return None
+    return batch_dim
+
+
+def _to_logits_2d(value, *, rows: int, np_module):
     arr = np_module.asarray(value, dtype=np_module.float32)
     if arr.ndim == 0:
         raise RuntimeError("invalid_model_output")
     if arr.ndim == 1:
-        return arr
+        arr = arr.reshape(1, -1)
     flattened = arr.reshape(arr.shape[0], -1)
-    return flattened[0]
-
-
-def _softmax(logits):
-    import numpy as np
-
-    shifted = logits - np.max(logits)
-    exponent = np.exp(shifted)
-    denominator = float(np.sum(exponent))
-    if denominator <= 0:
-        return np.ones_like(logits, dtype=np.float32) / max(len(logits), 1)
-    return exponent / denominator
-
-
-def _as_int(value: Any, *, fallback: int, minimum: int, maximum: int) -> int:
-    try:
-        resolved = int(value)
-    except (TypeError, ValueError):
-        return fallback
-    return max(minimum, min(resolved, maximum))
-
-
-def _as_float(value: Any, *, fallback: float, minimum: float, maximum: float) -> float:
-    try:
-        resolved = float(value)
-    except (TypeError, ValueError):
-        return fallback
-    return max(minimum, min(resolved, maximum))
-
-
-def _as_float_list(value: Any, *, fallback: list[float]) -> list[float]:
-    if not isinstance(value, list) or len(value) != 3:
-        return fallback
-    parsed: list[float] = []
-    for item in value:
-        try:
-            parsed.append(float(item))
-        except (TypeError, ValueError):
-            return fallback
-    return parsed
+    if flattened.shape[0] != rows:
+        raise RuntimeError(f"model_output_batch_mismatch:{flattened.shape[0]}!={rows}")
+    return flattened
@@ -0,0 +1,393 @@
+import json
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from pathlib import Path
+from threading import Lock
+from types import MappingProxyType
+from typing import Any, Callable
+
+from app.providers.onnx_session import ONNX_SESSION_CONFIG_KEYS, OnnxSessionOptions, onnx_session_options
+from app.providers.window_batch import WINDOW_STORE_DTYPES
+
+DEFAULT_MEAN = [0.485, 0.456, 0.406]
+DEFAULT_STD = [0.229, 0.224, 0.225]
+
+SPEC_SOURCE_FILES = ("runtime_config.json", "labels.json", "labels.txt")
+SCAN_MODES = {"dense", "adaptive"}
+
+
+@dataclass(frozen=True)
+class RuntimeSpec:
+    # Validated view of runtime_config.json + labels for one artifact directory. Built once per
+    # file signature; request overrides produce a new spec without touching the filesystem.
+    config: Mapping[str, Any]
+    labels: tuple[str, ...]
+    num_frames: int
+    window_size_frames: int
+    stride_frames: int
+    input_size: int
+    inference_batch_size: int
+    frame_decode_mode: str
+    sequential_max_gap_frames: int
+    align_sampling_to_stride: bool
+    target_fps: float
+    frame_cache_max_bytes: int
+    pipelined_inference: bool
+    pipeline_queue_depth: int
+    preprocess_workers: int
+    mean: tuple[float, ...]
+    std: tuple[float, ...]
+    normalize_to_unit: bool
+    top_k: int
+    decoder_mode: str
+    long_video_threshold_sec: float
+    realtime_min_confidence: float
+    realtime_min_duration_sec: float
+    realtime_max_gap_sec: float
+    ctc_blank_index: int | None
+    ctc_blank_threshold: float
+    ctc_min_token_confidence: float
+    ctc_min_duration_sec: float
+    window_store_dtype: str
+    window_store_top_k: int
+    onnx_session: OnnxSessionOptions
+    motion_gate_enabled: bool
+    motion_gate_threshold: float
+    motion_gate_thumbnail_size: int
+    scan_mode: str
+    adaptive_stride_factor: int
+    adaptive_confidence_margin: float
+    shard_seconds: float
+
+    def with_overrides(self, overrides: Mapping[str, Any] | None) -> "RuntimeSpec":
+        # Cheap overlay (live predict applies one per request): only the fields the overridden
+        # keys feed are re-parsed; labels, ONNX options and the blank index are reused otherwise.
+        if not overrides:
+            return self
+        config = {**self.config, **overrides}
+        fields = {field for key in overrides for field in _FIELDS_BY_KEY.get(key, ())}
+        changes = {field: _FIELD_PARSERS[field][1](config, self.labels) for field in fields}
+        return replace(self, config=MappingProxyType(config), **changes)
+
+
+def compile_runtime_spec(config: Mapping[str, Any], labels: tuple[str, ...]) -> RuntimeSpec:
+    return RuntimeSpec(
+        config=MappingProxyType(dict(config)),
+        labels=labels,
+        **{field: parse(config, labels) for field, (_, parse) in _FIELD_PARSERS.items()},
+    )
+
+
+def _window_size_frames(config: Mapping[str, Any]) -> int:
+    num_frames = _as_int(config.get("num_frames"), fallback=32, minimum=4, maximum=128)
+    return _as_int(config.get("window_size_frames"), fallback=num_frames, minimum=4, maximum=256)
+
+
+def _stride_frames(config: Mapping[str, Any]) -> int:
+    window_size_frames = _window_size_frames(config)
+    return _as_int(
+        config.get("stride_frames"),
+        fallback=max(1, window_size_frames // 4),
+        minimum=1,
+        maximum=window_size_frames,
+    )
+
+
+def _normalize_to_unit(config: Mapping[str, Any]) -> bool:
+    return _resolve_normalize_to_unit(
+        config=config,
+        mean=_as_float_list(config.get("mean"), fallback=DEFAULT_MEAN),
+        std=_as_float_list(config.get("std"), fallback=DEFAULT_STD),
+    )
+
+
+def _choice(config: Mapping[str, Any], key: str, *, fallback: str, allowed) -> str:
+    value = str(config.get(key, fallback)).strip().lower()
+    return value if value in allowed else fallback
+
+
+# RuntimeSpec field -> (config keys it is derived from, parser(config, labels)). Both the full
+# compile and the override overlay go through this table, so they cannot disagree.
+_FIELD_PARSERS: dict[str, tuple[tuple[str, ...], Callable[[Mapping[str, Any], tuple[str, ...]], Any]]] = {
+    "num_frames": (
+        ("num_frames",),
+        lambda c, _: _as_int(c.get("num_frames"), fallback=32, minimum=4, maximum=128),
+    ),
+    "window_size_frames": (("num_frames", "window_size_frames"), lambda c, _: _window_size_frames(c)),
+    "stride_frames": (("num_frames", "window_size_frames", "stride_frames"), lambda c, _: _stride_frames(c)),
+    "input_size": (
+        ("input_size",),
+        lambda c, _: _as_int(c.get("input_size"), fallback=224, minimum=112, maximum=512),
+    ),
+    "inference_batch_size": (
+        ("inference_batch_size",),
+        lambda c, _: _as_int(c.get("inference_batch_size"), fallback=4, minimum=1, maximum=64),
+    ),
+    "frame_decode_mode": (
+        ("frame_decode_mode",),
+        lambda c, _: str(c.get("frame_decode_mode", "auto")).strip().lower(),
+    ),
+    "sequential_max_gap_frames": (
+        ("sequential_max_gap_frames",),
+        lambda c, _: _as_int(c.get("sequential_max_gap_frames"), fallback=24, minimum=1, maximum=100000),
+    ),
+    "align_sampling_to_stride": (
+        ("align_sampling_to_stride",),
+        lambda c, _: c.get("align_sampling_to_stride") is True,
+    ),
+    # 0 keeps the source frame rate; window sizes are in frames of the resampled timeline.
+    "target_fps": (
+        ("target_fps",),
+        lambda c, _: _as_float(c.get("target_fps"), fallback=0.0, minimum=0.0, maximum=240.0),
+    ),
+    "frame_cache_max_bytes": (
+        ("preprocessed_frame_cache_mb",),
+        lambda c, _: _as_int(c.get("preprocessed_frame_cache_mb"), fallback=256, minimum=0, maximum=8192)
+        * 1024
+        * 1024,
+    ),
+    "pipelined_inference": (("pipelined_inference",), lambda c, _: c.get("pipelined_inference") is True),
+    "pipeline_queue_depth": (
+        ("pipeline_queue_depth",),
+        lambda c, _: _as_int(c.get("pipeline_queue_depth"), fallback=4, minimum=1, maximum=64),
+    ),
+    "preprocess_workers": (
+        ("preprocess_workers",),
+        lambda c, _: _as_int(c.get("preprocess_workers"), fallback=2, minimum=1, maximum=16),
+    ),
+    "mean": (("mean",), lambda c, _: tuple(_as_float_list(c.get("mean"), fallback=DEFAULT_MEAN))),
+    "std": (("std",), lambda c, _: tuple(_as_float_list(c.get("std"), fallback=DEFAULT_STD))),
+    "normalize_to_unit": (("normalize_to_unit", "mean", "std"), lambda c, _: _normalize_to_unit(c)),
+    "top_k": (("top_k",), lambda c, _: _as_int(c.get("top_k"), fallback=3, minimum=1, maximum=10)),
+    "decoder_mode": (("decoder_mode",), lambda c, _: str(c.get("decoder_mode", "auto")).strip().lower()),
+    "long_video_threshold_sec": (
+        ("long_video_threshold_sec",),
+        lambda c, _: _as_float(c.get("long_video_threshold_sec"), fallback=18.0, minimum=1.0, maximum=3600.0),
+    ),
+    "realtime_min_confidence": (
+        ("realtime_min_confidence",),
+        lambda c, _: _as_float(c.get("realtime_min_confidence"), fallback=0.2, minimum=0.01, maximum=1.0),
+    ),
+    "realtime_min_duration_sec": (
+        ("realtime_min_duration_sec",),
+        lambda c, _: _as_float(c.get("realtime_min_duration_sec"), fallback=0.15, minimum=0.0, maximum=30.0),
+    ),
+    "realtime_max_gap_sec": (
+        ("realtime_max_gap_sec",),
+        lambda c, _: _as_float(c.get("realtime_max_gap_sec"), fallback=0.35, minimum=0.0, maximum=5.0),
+    ),
+    "ctc_blank_index": (("ctc_blank_index",), lambda c, labels: _resolve_ctc_blank_index(labels=labels, config=c)),
+    "ctc_blank_threshold": (
+        ("ctc_blank_threshold",),
+        lambda c, _: _as_float(c.get("ctc_blank_threshold"), fallback=0.12, minimum=0.0, maximum=1.0),
+    ),
+    "ctc_min_token_confidence": (
+        ("ctc_min_token_confidence",),
+        lambda c, _: _as_float(c.get("ctc_min_token_confidence"), fallback=0.16, minimum=0.01, maximum=1.0),
+    ),
+    "ctc_min_duration_sec": (
+        ("ctc_min_duration_sec",),
+        lambda c, _: _as_float(c.get("ctc_min_duration_sec"), fallback=0.12, minimum=0.0, maximum=30.0),
+    ),
+    "window_store_dtype": (
+        ("window_store_dtype",),
+        lambda c, _: _choice(c, "window_store_dtype", fallback="float32", allowed=WINDOW_STORE_DTYPES),
+    ),
+    "window_store_top_k": (
+        ("window_store_top_k",),
+        lambda c, _: _as_int(c.get("window_store_top_k"), fallback=0, minimum=0, maximum=1000),
+    ),
+    "onnx_session": (ONNX_SESSION_CONFIG_KEYS, lambda c, _: onnx_session_options(c)),
+    "motion_gate_enabled": (("motion_gate_enabled",), lambda c, _: c.get("motion_gate_enabled") is True),
+    "motion_gate_threshold": (
+        ("motion_gate_threshold",),
+        lambda c, _: _as_float(c.get("motion_gate_threshold"), fallback=3.0, minimum=0.0, maximum=255.0),
+    ),
+    "motion_gate_thumbnail_size": (
+        ("motion_gate_thumbnail_size",),
+        lambda c, _: _as_int(c.get("motion_gate_thumbnail_size"), fallback=32, minimum=8, maximum=128),
+    ),
+    "scan_mode": (("scan_mode",), lambda c, _: _choice(c, "scan_mode", fallback="dense", allowed=SCAN_MODES)),
+    "adaptive_stride_factor": (
+        ("adaptive_stride_factor",),
+        lambda c, _: _as_int(c.get("adaptive_stride_factor"), fallback=4, minimum=1, maximum=16),
+    ),
+    "adaptive_confidence_margin": (
+        ("adaptive_confidence_margin",),
+        lambda c, _: _as_float(c.get("adaptive_confidence_margin"), fallback=0.1, minimum=0.0, maximum=1.0),
+    ),
+    # Length of one shard when RUNTIME_SHARD_WORKERS > 1; 0 keeps this model single-process.
+    "shard_seconds": (
+        ("shard_seconds",),
+        lambda c, _: _as_float(c.get("shard_seconds"), fallback=120.0, minimum=0.0, maximum=3600.0),
+    ),
+}
+_FIELDS_BY_KEY: dict[str, tuple[str, ...]] = {}
+for _field, (_keys, _) in _FIELD_PARSERS.items():
+    for _key in _keys:
+        _FIELDS_BY_KEY[_key] = (*_FIELDS_BY_KEY.get(_key, ()), _field)
+
+
+class RuntimeSpecCache:
+    # Keyed by artifact directory; an entry is reused while the (mtime_ns, size) signature of
+    # runtime_config.json / labels.* is unchanged, so a hit costs three stat() calls.
+    def __init__(self, max_entries: int = 64) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[tuple, RuntimeSpec]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, root: Path) -> RuntimeSpec:
+        key = str(root.resolve())
+        signature = _source_signature(root)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        spec = compile_runtime_spec(load_runtime_config(root), tuple(load_labels(root)))
+        with self._lock:
+            self._entries[key] = (signature, spec)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return spec
+
+    def invalidate(self, root: Path) -> None:
+        with self._lock:
+            self._entries.pop(str(root.resolve()), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+runtime_spec_cache = RuntimeSpecCache()
+
+
+def load_runtime_spec(root: Path) -> RuntimeSpec:
+    return runtime_spec_cache.get(root)
+
+
+def invalidate_runtime_spec(root: Path) -> None:
+    runtime_spec_cache.invalidate(root)
+
+
+def _source_signature(root: Path) -> tuple:
+    signature = []
+    for name in SPEC_SOURCE_FILES:
+        try:
+            stat = (root / name).stat()
+        except OSError:
+            signature.append(None)
+            continue
+        signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def load_runtime_config(root: Path) -> dict[str, Any]:
+    cfg_path = root / "runtime_config.json"
+    if not cfg_path.exists():
+        return {}
+    try:
+        raw = json.loads(cfg_path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def load_labels(root: Path) -> list[str]:
+    labels_json = root / "labels.json"
+    if labels_json.exists():
+        try:
+            raw = json.loads(labels_json.read_text(encoding="utf-8"))
+            if isinstance(raw, list):
+                values = [str(item).strip() for item in raw if str(item).strip()]
+                if values:
+                    return values
+            if isinstance(raw, dict):
+                entries: list[tuple[str, str]] = []
+                for key, value in raw.items():
+                    label = str(value).strip()
+                    if label:
+                        entries.append((str(key), label))
+                if entries:
+                    entries.sort(key=lambda item: _sortable_key(item[0]))
+                    return [value for _, value in entries]
+        except Exception:
+            pass
+
+    labels_txt = root / "labels.txt"
+    if labels_txt.exists():
+        values = [line.strip() for line in labels_txt.read_text(encoding="utf-8").splitlines() if line.strip()]
+        if values:
+            return values
+    return []
+
+
+def _sortable_key(raw: str) -> tuple[int, str]:
+    try:
+        return (0, f"{int(raw):09d}")
+    except ValueError:
+        return (1, raw)
+
+
+def _resolve_ctc_blank_index(labels: tuple[str, ...], config: Mapping[str, Any]) -> int | None:
+    explicit = config.get("ctc_blank_index")
+    if explicit is not None:
+        try:
+            value = int(explicit)
+            if value >= 0:
+                return value
+        except (TypeError, ValueError):
+            pass
+
+    blank_aliases = {"<blank>", "blank", "[blank]", "ctc_blank", "_"}
+    for idx, label in enumerate(labels):
+        if label.strip().lower() in blank_aliases:
+            return idx
+    return None
+
+
+def _resolve_normalize_to_unit(*, config: Mapping[str, Any], mean: list[float], std: list[float]) -> bool:
+    explicit = config.get("normalize_to_unit")
+    if isinstance(explicit, bool):
+        return explicit
+    if _max_abs(mean) > 3.0 or _max_abs(std) > 3.0:
+        return False
+    return True
+
+
+def _max_abs(values: list[float]) -> float:
+    if not values:
+        return 0.0
+    return max(abs(item) for item in values)
+
+
+def _as_int(value: Any, *, fallback: int, minimum: int, maximum: int) -> int:
+    try:
+        resolved = int(value)
+    except (TypeError, ValueError):
+        return fallback
+    return max(minimum, min(resolved, maximum))
+
+
+def _as_float(value: Any, *, fallback: float, minimum: float, maximum: float) -> float:
+    try:
+        resolved = float(value)
+    except (TypeError, ValueError):
+        return fallback
+    return max(minimum, min(resolved, maximum))
+
+
+def _as_float_list(value: Any, *, fallback: list[float]) -> list[float]:
+    if not isinstance(value, list) or len(value) != 3:
+        return fallback
+    parsed: list[float] = []
+    for item in value:
+        try:
+            parsed.append(float(item))
+        except (TypeError, ValueError):
+            return fallback
+    return parsed
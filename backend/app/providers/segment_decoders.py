@@ -0,0 +1,296 @@
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class RuntimePrediction:
+    label: str
+    confidence: float
+    start_sec: float
+    end_sec: float
+
+
+@dataclass
+class WindowPrediction:
+    start_sec: float
+    end_sec: float
+    class_index: int
+    confidence: float
+    probabilities: Any
+
+
+def label_for_index(index: int, labels: list[str]) -> str:
+    if 0 <= index < len(labels):
+        return labels[index]
+    return f"class_{index}"
+
+
+def _segment_prediction(
+    class_index: int,
+    confidence: float,
+    start_sec: float,
+    end_sec: float,
+    labels: list[str],
+) -> RuntimePrediction:
+    return RuntimePrediction(
+        label=label_for_index(class_index, labels),
+        confidence=round(confidence, 4),
+        start_sec=round(start_sec, 3),
+        end_sec=round(end_sec, 3),
+    )
+
+
+def _run_predictions(runs, keep, *, class_index, start_sec, end_sec, labels: list[str]) -> list[RuntimePrediction]:
+    starts, last, average, _ = runs
+    return [
+        _segment_prediction(
+            int(class_index[first]),
+            float(average[row]),
+            float(start_sec[first]),
+            float(end_sec[final]),
+            labels,
+        )
+        for row, (first, final) in enumerate(zip(starts.tolist(), last.tolist()))
+        if keep[row]
+    ]
+
+
+def _summarize_runs(boundaries, confidence, start_sec, end_sec):
+    # boundaries[i] is True where a new run begins; returns first/last index, mean confidence
+    # and duration per run. Sums run left to right in Python floats, exactly like
+    # _OpenSegment: np.add.reduceat sums pairwise and can land on the other side of round(, 4).
+    import numpy as np
+
+    boundaries[0] = True
+    starts = np.flatnonzero(boundaries)
+    last = np.append(starts[1:], confidence.shape[0]) - 1
+    values = confidence.tolist()
+    average = []
+    for first, final in zip(starts.tolist(), last.tolist()):
+        total = values[first]
+        for value in values[first + 1 : final + 1]:
+            total += value
+        average.append(total / (final - first + 1))
+    duration = end_sec[last] - start_sec[starts]
+    return starts, last, np.asarray(average, dtype=np.float64), duration
+
+
+def top_window_predictions(
+    class_index,
+    confidence,
+    start_sec,
+    end_sec,
+    *,
+    labels: list[str],
+    top_k: int,
+) -> list[RuntimePrediction]:
+    # Array form of TopWindowTracker: the most confident window per class (earliest wins ties),
+    # ranked by confidence. Skipped windows (negative class index) are ignored.
+    import numpy as np
+
+    if class_index.shape[0] == 0:
+        return []
+    order = np.lexsort((np.arange(class_index.shape[0]), -confidence))
+    order = order[class_index[order] >= 0]
+    if order.shape[0] == 0:
+        return []
+    _, first = np.unique(class_index[order], return_index=True)
+    best = order[np.sort(first)][: max(1, min(top_k, 10))]
+    return [
+        _segment_prediction(
+            int(class_index[row]),
+            float(confidence[row]),
+            float(start_sec[row]),
+            float(end_sec[row]),
+            labels,
+        )
+        for row in best.tolist()
+    ]
+
+
+class _OpenSegment:
+    __slots__ = ("class_index", "start_sec", "end_sec", "confidence_sum", "count")
+
+    def __init__(self, window: WindowPrediction) -> None:
+        self.class_index = window.class_index
+        self.start_sec = window.start_sec
+        self.end_sec = window.end_sec
+        self.confidence_sum = window.confidence
+        self.count = 1
+
+    def extend(self, window: WindowPrediction) -> None:
+        self.end_sec = window.end_sec
+        self.confidence_sum += window.confidence
+        self.count += 1
+
+    def to_prediction(self, labels: list[str]) -> RuntimePrediction:
+        average = self.confidence_sum / self.count
+        return _segment_prediction(self.class_index, average, self.start_sec, self.end_sec, labels)
+
+
+class RealtimeSegmentDecoder:
+    # Merges consecutive confident windows of one class into a segment. Windows are pushed in
+    # time order and a segment is emitted as soon as it closes; only the open segment is held.
+    def __init__(
+        self,
+        *,
+        labels: list[str],
+        min_confidence: float,
+        min_duration_sec: float,
+        max_gap_sec: float,
+    ) -> None:
+        self.labels = labels
+        self.min_confidence = min_confidence
+        self.min_duration_sec = min_duration_sec
+        self.max_gap_sec = max_gap_sec
+        self._current: _OpenSegment | None = None
+
+    def push(self, window: WindowPrediction) -> list[RuntimePrediction]:
+        current = self._current
+        # Negative class indices mark windows the motion gate skipped; they never join a segment.
+        if window.confidence < self.min_confidence or window.class_index < 0:
+            return self.flush()
+        if current is not None:
+            gap = max(0.0, window.start_sec - current.end_sec)
+            if window.class_index == current.class_index and gap <= self.max_gap_sec:
+                current.extend(window)
+                return []
+        closed = self.flush()
+        self._current = _OpenSegment(window)
+        return closed
+
+    def flush(self) -> list[RuntimePrediction]:
+        current, self._current = self._current, None
+        if current is None or current.end_sec - current.start_sec < self.min_duration_sec:
+            return []
+        return [current.to_prediction(self.labels)]
+
+    def decode_arrays(self, class_index, confidence, start_sec, end_sec) -> list[RuntimePrediction]:
+        # Same result as push() over every window followed by flush(), computed with run-length
+        # encoding: a run breaks on a class change, a gap above max_gap_sec, or a low-confidence
+        # window (which forms its own run and is dropped).
+        import numpy as np
+
+        if class_index.shape[0] == 0:
+            return []
+        valid = (confidence >= self.min_confidence) & (class_index >= 0)
+        boundaries = ~valid
+        boundaries[1:] |= (
+            (class_index[1:] != class_index[:-1])
+            | ~valid[:-1]
+            | (np.maximum(start_sec[1:] - end_sec[:-1], 0.0) > self.max_gap_sec)
+        )
+        runs = _summarize_runs(boundaries, confidence, start_sec, end_sec)
+        keep = valid[runs[0]] & (runs[3] >= self.min_duration_sec)
+        return _run_predictions(
+            runs,
+            keep,
+            class_index=class_index,
+            start_sec=start_sec,
+            end_sec=end_sec,
+            labels=self.labels,
+        )
+
+
+class CtcTokenDecoder:
+    # Greedy CTC collapse over window argmaxes: low-confidence windows and the blank class act
+    # as separators, repeated symbols merge into one token.
+    def __init__(
+        self,
+        *,
+        labels: list[str],
+        blank_index: int | None,
+        blank_threshold: float,
+        min_token_confidence: float,
+        min_duration_sec: float,
+    ) -> None:
+        self.labels = labels
+        self.blank_index = blank_index
+        self.blank_threshold = blank_threshold
+        self.min_token_confidence = min_token_confidence
+        self.min_duration_sec = min_duration_sec
+        self._prev_symbol = -1
+        self._current: _OpenSegment | None = None
+
+    def push(self, window: WindowPrediction) -> list[RuntimePrediction]:
+        is_pseudo_blank = window.confidence < self.blank_threshold
+        is_blank_class = window.class_index < 0 or (
+            self.blank_index is not None and window.class_index == self.blank_index
+        )
+        symbol = -1 if (is_pseudo_blank or is_blank_class) else window.class_index
+
+        if symbol != self._prev_symbol:
+            closed = self.flush()
+            if symbol != -1:
+                self._current = _OpenSegment(window)
+            self._prev_symbol = symbol
+            return closed
+
+        if symbol != -1 and self._current is not None:
+            self._current.extend(window)
+        return []
+
+    def flush(self) -> list[RuntimePrediction]:
+        current, self._current = self._current, None
+        if current is None:
+            return []
+        if current.confidence_sum / current.count < self.min_token_confidence:
+            return []
+        if current.end_sec - current.start_sec < self.min_duration_sec:
+            return []
+        return [current.to_prediction(self.labels)]
+
+    def decode_arrays(self, class_index, confidence, start_sec, end_sec) -> list[RuntimePrediction]:
+        # Vectorised greedy collapse: runs of equal symbols become tokens, blank runs are masked.
+        import numpy as np
+
+        if class_index.shape[0] == 0:
+            return []
+        blank = (confidence < self.blank_threshold) | (class_index < 0)
+        if self.blank_index is not None:
+            blank |= class_index == self.blank_index
+        symbol = class_index.copy()
+        symbol[blank] = -1
+        boundaries = np.ones(symbol.shape[0], dtype=bool)
+        boundaries[1:] = symbol[1:] != symbol[:-1]
+        runs = _summarize_runs(boundaries, confidence, start_sec, end_sec)
+        keep = (symbol[runs[0]] != -1) & (runs[2] >= self.min_token_confidence) & (runs[3] >= self.min_duration_sec)
+        return _run_predictions(
+            runs,
+            keep,
+            class_index=class_index,
+            start_sec=start_sec,
+            end_sec=end_sec,
+            labels=self.labels,
+        )
+
+
+class TopWindowTracker:
+    # Keeps the most confident window per class (first one wins ties), which is all the
+    # top-k fallback needs, instead of every window of the video.
+    def __init__(self, *, labels: list[str], top_k: int) -> None:
+        self.labels = labels
+        self.top_k = max(1, min(top_k, 10))
+        self._best: dict[int, tuple[float, int, WindowPrediction]] = {}
+        self._seen = 0
+
+    def push(self, window: WindowPrediction) -> None:
+        if window.class_index < 0:
+            self._seen += 1
+            return
+        best = self._best.get(window.class_index)
+        if best is None or window.confidence > best[0]:
+            self._best[window.class_index] = (window.confidence, self._seen, window)
+        self._seen += 1
+
+    def results(self) -> list[RuntimePrediction]:
+        ranked = sorted(self._best.values(), key=lambda item: (-item[0], item[1]))
+        return [
+            RuntimePrediction(
+                label=label_for_index(window.class_index, self.labels),
+                confidence=round(window.confidence, 4),
+                start_sec=round(window.start_sec, 3),
+                end_sec=round(window.end_sec, 3),
+            )
+            for _, _, window in ranked[: self.top_k]
+        ]
@@ -0,0 +1,91 @@
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = Lock()
+# Set in pool workers only: the per-process thread budget for torch and onnxruntime.
+_worker_threads = 0
+
+
+def shard_ranges(count: int, *, shard_size: int) -> list[tuple[int, int]]:
+    # Contiguous [start, end) ranges over `count` window plans; the last one may be short.
+    size = max(shard_size, 1)
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+def windows_per_shard(*, shard_seconds: float, fps: float, stride_frames: int, frame_step: float, batch_size: int) -> int:
+    # Shards start on a multiple of the inference batch size, so every shard forms the same
+    # batches a single-process scan would and the merged windows match it exactly.
+    stride_sec = max(stride_frames * frame_step / max(fps, 1e-3), 1e-3)
+    windows = max(int(shard_seconds / stride_sec), 1)
+    batch = max(batch_size, 1)
+    return -(-windows // batch) * batch
+
+
+def threads_per_worker(workers: int) -> int:
+    return max((os.cpu_count() or 1) // max(workers, 1), 1)
+
+
+def worker_thread_limit() -> int:
+    # 0 outside a shard worker: the runtime keeps its configured thread counts.
+    return _worker_threads
+
+
+def _init_worker(threads: int) -> None:
+    # Runs before the worker imports torch/onnxruntime. Each of the N workers otherwise starts a
+    # thread per core, oversubscribing the CPU N times over; OMP_NUM_THREADS covers torch's pool
+    # at import and onnxruntime sessions read worker_thread_limit().
+    global _worker_threads
+    _worker_threads = threads
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+
+
+def get_shard_pool(workers: int) -> ProcessPoolExecutor | None:
+    # One long-lived pool per process, so each worker keeps its own model runner cache warm
+    # across jobs. Spawned rather than forked: torch and onnxruntime thread pools do not
+    # survive fork.
+    global _pool, _pool_workers
+    if workers <= 1:
+        return None
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            threads = threads_per_worker(workers)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(threads,),
+            )
+            _pool_workers = workers
+            logger.info("runtime shard pool started: workers=%s threads_per_worker=%s", workers, threads)
+        return _pool
+
+
+def discard_shard_pool(pool: ProcessPoolExecutor) -> None:
+    # Called after a worker died (BrokenProcessPool): the next job starts a fresh pool.
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_shard_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,243 @@
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any
+
+FRAME_DECODE_MODES = {"auto", "sequential", "seek"}
+
+
+@dataclass
+class WindowPlan:
+    start_frame: int
+    end_frame: int
+    indices: list[int]
+
+
+@dataclass
+class FrameDecodeStats:
+    grabbed: int = 0
+    retrieved: int = 0
+
+
+def window_sample_indices(start_frame: int, end_frame: int, num_frames: int) -> list[int]:
+    import numpy as np
+
+    if end_frame <= start_frame:
+        end_frame = start_frame + 1
+    if end_frame - start_frame == 1:
+        return [start_frame] * num_frames
+    return np.linspace(start_frame, end_frame - 1, num_frames).round().astype(int).tolist()
+
+
+def aligned_sample_indices(start_frame: int, end_frame: int, num_frames: int, *, step: int) -> list[int]:
+    # Samples on a global grid (multiples of step) so overlapping windows pick the exact
+    # same frame indices instead of slightly shifted linspace positions.
+    last = max(end_frame - 1, start_frame)
+    first = -(-start_frame // step) * step
+    return [min(first + offset * step, last) for offset in range(num_frames)]
+
+
+def aligned_sample_step(window_size_frames: int, num_frames: int) -> int:
+    if num_frames <= 1:
+        return 1
+    return max(1, (window_size_frames - 1) // (num_frames - 1))
+
+
+def timeline_frame_step(source_fps: float, target_fps: float) -> float:
+    # Source frames per timeline frame. Only downsampling is supported: resampling a slower
+    # source up would just sample the same frames more than once.
+    if target_fps <= 0 or source_fps <= target_fps:
+        return 1.0
+    return source_fps / target_fps
+
+
+def plan_windows(
+    *,
+    frame_count: int,
+    window_size_frames: int,
+    stride_frames: int,
+    num_frames: int,
+    align_to_stride: bool = False,
+    frame_step: float = 1.0,
+) -> list[WindowPlan]:
+    # Window sizes, strides and sampling are in timeline frames; with frame_step > 1 (a source
+    # faster than target_fps) each timeline frame maps to the nearest source frame.
+    source_count = frame_count
+    if frame_step > 1.0:
+        frame_count = max(int(source_count / frame_step), 1)
+    starts = list(range(0, max(frame_count - window_size_frames + 1, 1), stride_frames))
+    tail_start = max(frame_count - window_size_frames, 0)
+    if not starts:
+        starts = [0]
+    elif starts[-1] != tail_start:
+        starts.append(tail_start)
+
+    step = aligned_sample_step(window_size_frames, num_frames)
+    plans: list[WindowPlan] = []
+    for start in starts:
+        end = min(start + window_size_frames, frame_count)
+        if align_to_stride:
+            indices = aligned_sample_indices(start, end, num_frames, step=step)
+        else:
+            indices = window_sample_indices(start, end, num_frames)
+        if frame_step > 1.0:
+            plans.append(_source_plan(start, end, indices, frame_step=frame_step, source_count=source_count))
+        else:
+            plans.append(WindowPlan(start_frame=start, end_frame=end, indices=indices))
+    return plans
+
+
+def _source_plan(start: int, end: int, indices: list[int], *, frame_step: float, source_count: int) -> WindowPlan:
+    last = source_count - 1
+    source_start = min(round(start * frame_step), last)
+    source_end = min(max(round(end * frame_step), source_start + 1), source_count)
+    return WindowPlan(
+        start_frame=source_start,
+        end_frame=source_end,
+        indices=[min(round(index * frame_step), last) for index in indices],
+    )
+
+
+def needed_frame_indices(plans: list[WindowPlan]) -> list[int]:
+    return sorted({index for plan in plans for index in plan.indices})
+
+
+def resolve_frame_decode_mode(mode: str, plans: list[WindowPlan], *, max_gap_frames: int) -> str:
+    normalized = mode.strip().lower()
+    if normalized in {"sequential", "seek"}:
+        return normalized
+    needed = needed_frame_indices(plans)
+    if len(needed) < 2:
+        return "sequential"
+    # Forward decoding pays for every frame up to the last needed one; seeking pays a
+    # keyframe-to-target decode per sampled frame. Only sparse scans favour seeking.
+    mean_gap = (needed[-1] - needed[0]) / (len(needed) - 1)
+    return "seek" if mean_gap > max_gap_frames else "sequential"
+
+
+class PreprocessedFrameCache:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.bytes_held = 0
+        self.peak_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._frames: OrderedDict[int, Any] = OrderedDict()
+        self._lock = Lock()
+
+    def get_or_compute(self, index: int, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            cached = self._frames.get(index)
+            if cached is not None:
+                self._frames.move_to_end(index)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        frame = compute()
+        size = int(getattr(frame, "nbytes", 0))
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return frame
+
+        with self._lock:
+            if index not in self._frames:
+                self._frames[index] = frame
+                self.bytes_held += size
+            while self.bytes_held > self.max_bytes and len(self._frames) > 1:
+                _, evicted = self._frames.popitem(last=False)
+                self.bytes_held -= int(getattr(evicted, "nbytes", 0))
+            self.peak_bytes = max(self.peak_bytes, self.bytes_held)
+        return frame
+
+    def discard_before(self, index: int) -> None:
+        # Windows are consumed in start order, so frames before the current start are dead.
+        with self._lock:
+            stale = [key for key in self._frames if key < index]
+            for key in stale:
+                self.bytes_held -= int(getattr(self._frames.pop(key), "nbytes", 0))
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def iter_window_frames(
+    capture,
+    plans: list[WindowPlan],
+    *,
+    mode: str,
+    stats: FrameDecodeStats | None = None,
+    start_frame: int = 0,
+) -> Iterator[tuple[WindowPlan, list[tuple[int, Any]]]]:
+    # start_frame > 0 seeks there before a sequential read, for plans that begin mid-video.
+    stats = stats if stats is not None else FrameDecodeStats()
+    if mode == "seek":
+        return _iter_seek_window_frames(capture, plans, stats)
+    return _iter_sequential_window_frames(capture, plans, stats, start_frame=start_frame)
+
+
+def _iter_seek_window_frames(
+    capture,
+    plans: list[WindowPlan],
+    stats: FrameDecodeStats,
+) -> Iterator[tuple[WindowPlan, list[tuple[int, Any]]]]:
+    import cv2  # type: ignore[import-untyped]
+
+    for plan in plans:
+        raw_frames = []
+        for index in plan.indices:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, float(index))
+            ok, frame = capture.read()
+            stats.grabbed += 1
+            stats.retrieved += 1
+            if ok and frame is not None:
+                raw_frames.append((index, frame))
+        yield plan, raw_frames
+
+
+def _iter_sequential_window_frames(
+    capture,
+    plans: list[WindowPlan],
+    stats: FrameDecodeStats,
+    *,
+    start_frame: int = 0,
+) -> Iterator[tuple[WindowPlan, list[tuple[int, Any]]]]:
+    # Reads the stream once, front to back. Frames no window samples are only grab()-ed
+    # (demuxed and decoded, never converted); sampled frames are retrieve()-d into a sliding
+    # buffer and dropped as soon as the last window that samples them has been assembled.
+    last_user: dict[int, int] = {}
+    for ordinal, plan in enumerate(plans):
+        for index in plan.indices:
+            last_user[index] = ordinal
+
+    buffer: dict[int, Any] = {}
+    position = 0
+    if start_frame > 0:
+        import cv2  # type: ignore[import-untyped]
+
+        if not capture.set(cv2.CAP_PROP_POS_FRAMES, float(start_frame)):
+            raise RuntimeError("video_seek_failed")
+        position = start_frame
+    exhausted = False
+    for ordinal, plan in enumerate(plans):
+        target = max(plan.indices)
+        while not exhausted and position <= target:
+            if not capture.grab():
+                exhausted = True
+                break
+            stats.grabbed += 1
+            if position in last_user:
+                ok, frame = capture.retrieve()
+                stats.retrieved += 1
+                if ok and frame is not None:
+                    buffer[position] = frame
+            position += 1
+
+        raw_frames = [(index, buffer[index]) for index in plan.indices if index in buffer]
+        yield plan, raw_frames
+
+        for index in plan.indices:
+            if last_user.get(index) == ordinal:
+                buffer.pop(index, None)
@@ -0,0 +1,222 @@
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from app.providers.probabilities import argmax_rows, top_k_rows
+from app.providers.segment_decoders import WindowPrediction
+
+WINDOW_STORE_DTYPES = {"float32", "float16"}
+WINDOW_STORE_FORMAT = 1
+
+
+class WindowBatch:
+    # Columnar store for per-window predictions: window metadata lives in parallel 1-D arrays
+    # and probability vectors in one [N, classes] matrix, or as top-k (index, prob) pairs per
+    # row when top_k > 0. class_index/confidence are taken from the full-precision row before
+    # it is cast or sparsified, so decoding does not depend on the storage mode.
+    __slots__ = (
+        "dtype",
+        "top_k",
+        "num_classes",
+        "_size",
+        "_start_sec",
+        "_end_sec",
+        "_class_index",
+        "_confidence",
+        "_probabilities",
+        "_top_indices",
+    )
+
+    def __init__(self, *, dtype: str = "float32", top_k: int = 0, capacity: int = 256) -> None:
+        import numpy as np
+
+        if dtype not in WINDOW_STORE_DTYPES:
+            raise RuntimeError(f"unsupported_window_store_dtype:{dtype}")
+        capacity = max(capacity, 1)
+        self.dtype = dtype
+        self.top_k = max(top_k, 0)
+        self.num_classes: int | None = None
+        self._size = 0
+        self._start_sec = np.empty(capacity, dtype=np.float64)
+        self._end_sec = np.empty(capacity, dtype=np.float64)
+        self._class_index = np.empty(capacity, dtype=np.int32)
+        self._confidence = np.empty(capacity, dtype=np.float64)
+        self._probabilities: Any = None
+        self._top_indices: Any = None
+
+    @classmethod
+    def from_windows(
+        cls,
+        windows: Iterable[WindowPrediction],
+        *,
+        dtype: str = "float32",
+        top_k: int = 0,
+    ) -> "WindowBatch":
+        import numpy as np
+
+        batch = cls(dtype=dtype, top_k=top_k)
+        for window in windows:
+            batch.append(
+                start_sec=[window.start_sec],
+                end_sec=[window.end_sec],
+                probabilities=np.asarray(window.probabilities, dtype=np.float32).reshape(1, -1),
+                class_index=[window.class_index],
+                confidence=[window.confidence],
+            )
+        return batch
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def sparse(self) -> bool:
+        return self._top_indices is not None
+
+    @property
+    def nbytes(self) -> int:
+        total = sum(array.nbytes for array in (self._start_sec, self._end_sec, self._class_index, self._confidence))
+        for array in (self._probabilities, self._top_indices):
+            if array is not None:
+                total += array.nbytes
+        return int(total)
+
+    def append(
+        self,
+        *,
+        start_sec,
+        end_sec,
+        probabilities,
+        class_index=None,
+        confidence=None,
+    ) -> None:
+        # probabilities: [B, classes] for B windows; class_index/confidence default to the row argmax.
+        rows = probabilities.shape[0]
+        if rows == 0:
+            return
+        if self.num_classes is None:
+            self._init_probabilities(probabilities.shape[1])
+        elif probabilities.shape[1] != self.num_classes:
+            raise RuntimeError(f"window_store_class_mismatch:{probabilities.shape[1]}!={self.num_classes}")
+        self._reserve(self._size + rows)
+
+        if class_index is None or confidence is None:
+            class_index, confidence = argmax_rows(probabilities)
+
+        target = slice(self._size, self._size + rows)
+        self._start_sec[target] = start_sec
+        self._end_sec[target] = end_sec
+        self._class_index[target] = class_index
+        self._confidence[target] = confidence
+        if self._top_indices is None:
+            self._probabilities[target] = probabilities
+        else:
+            self._top_indices[target], self._probabilities[target] = top_k_rows(probabilities, self.top_k)
+        self._size += rows
+
+    def arrays(self):
+        # Views in the order the array decoders take them.
+        size = self._size
+        return self._class_index[:size], self._confidence[:size], self._start_sec[:size], self._end_sec[:size]
+
+    def probability_row(self, index: int):
+        import numpy as np
+
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        if self._probabilities is None:
+            raise RuntimeError("window_store_probabilities_not_loaded")
+        if self._top_indices is None:
+            return self._probabilities[index].astype(np.float32)
+        # Sparse rows are expanded with zeros outside the kept top-k classes.
+        row = np.zeros(self.num_classes or 0, dtype=np.float32)
+        row[self._top_indices[index]] = self._probabilities[index]
+        return row
+
+    def window(self, index: int) -> WindowPrediction:
+        return WindowPrediction(
+            start_sec=float(self._start_sec[index]),
+            end_sec=float(self._end_sec[index]),
+            class_index=int(self._class_index[index]),
+            confidence=float(self._confidence[index]),
+            probabilities=self.probability_row(index),
+        )
+
+    def __iter__(self) -> Iterator[WindowPrediction]:
+        for index in range(self._size):
+            yield self.window(index)
+
+    def save(self, path: Path, *, duration_sec: float) -> None:
+        # Uncompressed .npz: probabilities keep the store dtype, and np.load reads members
+        # lazily, so a re-decode only touches the 1-D columns it needs.
+        import numpy as np
+
+        size = self._size
+        columns = {
+            "format": np.asarray(WINDOW_STORE_FORMAT),
+            "duration_sec": np.asarray(duration_sec, dtype=np.float64),
+            "num_classes": np.asarray(self.num_classes or 0),
+            "start_sec": self._start_sec[:size],
+            "end_sec": self._end_sec[:size],
+            "class_index": self._class_index[:size],
+            "confidence": self._confidence[:size],
+        }
+        if self._probabilities is not None:
+            columns["probabilities"] = self._probabilities[:size]
+        if self._top_indices is not None:
+            columns["top_indices"] = self._top_indices[:size]
+        with Path(path).open("wb") as handle:
+            np.savez(handle, **columns)
+
+    @classmethod
+    def load(cls, path: Path, *, with_probabilities: bool = True) -> tuple["WindowBatch", float]:
+        import numpy as np
+
+        with np.load(Path(path), allow_pickle=False) as stored:
+            if int(stored["format"]) != WINDOW_STORE_FORMAT:
+                raise RuntimeError(f"unsupported_window_store_format:{int(stored['format'])}")
+            probabilities = stored["probabilities"] if with_probabilities and "probabilities" in stored else None
+            top_indices = stored["top_indices"] if "top_indices" in stored else None
+            dtype = str(probabilities.dtype) if probabilities is not None else "float32"
+            batch = cls(
+                dtype=dtype if dtype in WINDOW_STORE_DTYPES else "float32",
+                top_k=int(top_indices.shape[1]) if top_indices is not None else 0,
+                capacity=int(stored["class_index"].shape[0]),
+            )
+            size = int(stored["class_index"].shape[0])
+            batch._start_sec[:size] = stored["start_sec"]
+            batch._end_sec[:size] = stored["end_sec"]
+            batch._class_index[:size] = stored["class_index"]
+            batch._confidence[:size] = stored["confidence"]
+            batch._size = size
+            batch.num_classes = int(stored["num_classes"]) or None
+            if probabilities is not None:
+                batch._probabilities = probabilities
+                batch._top_indices = top_indices
+            duration_sec = float(stored["duration_sec"])
+        return batch, duration_sec
+
+    def _init_probabilities(self, num_classes: int) -> None:
+        import numpy as np
+
+        capacity = self._start_sec.shape[0]
+        self.num_classes = num_classes
+        if 0 < self.top_k < num_classes:
+            self._top_indices = np.empty((capacity, self.top_k), dtype=np.int32)
+            self._probabilities = np.empty((capacity, self.top_k), dtype=self.dtype)
+        else:
+            self._probabilities = np.empty((capacity, num_classes), dtype=self.dtype)
+
+    def _reserve(self, needed: int) -> None:
+        import numpy as np
+
+        capacity = self._start_sec.shape[0]
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name in ("_start_sec", "_end_sec", "_class_index", "_confidence", "_probabilities", "_top_indices"):
+            current = getattr(self, name)
+            if current is None:
+                continue
+            grown = np.empty((capacity, *current.shape[1:]), dtype=current.dtype)
+            grown[: self._size] = current[: self._size]
+            setattr(self, name, grown)
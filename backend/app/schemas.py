@@ -117,6 +117,19 @@ class RegenerateRequest(BaseModel):
     style_hint: str | None = None
 
 
+class RedecodeRequest(BaseModel):
+    # Decoder settings applied on top of the model's runtime_config.json; unset fields keep it.
+    decoder_mode: Literal["auto", "realtime", "ctc"] | None = None
+    long_video_threshold_sec: float | None = Field(default=None, ge=1.0, le=3600.0)
+    realtime_min_confidence: float | None = Field(default=None, ge=0.01, le=1.0)
+    realtime_min_duration_sec: float | None = Field(default=None, ge=0.0, le=30.0)
+    realtime_max_gap_sec: float | None = Field(default=None, ge=0.0, le=5.0)
+    ctc_blank_threshold: float | None = Field(default=None, ge=0.0, le=1.0)
+    ctc_min_token_confidence: float | None = Field(default=None, ge=0.01, le=1.0)
+    ctc_min_duration_sec: float | None = Field(default=None, ge=0.0, le=30.0)
+    top_k: int | None = Field(default=None, ge=1, le=10)
+
+
 class ExportCreateRequest(BaseModel):
     format: Literal["SRT", "VTT", "TXT", "AUDIO", "VIDEO"]
 
@@ -1,15 +1,22 @@
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from time import perf_counter
-from typing import Literal
+from typing import Any, Literal
 
-from sqlalchemy import delete
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
 
 from app.db import SessionLocal
 from app.metrics import observe_job_processing
 from app.models import Job, JobStatus, ModelVersion, SessionStatus, TranscriptSegment
+from app.providers.base import ProviderSegment
+from app.providers.hf import HuggingFaceProvider
 from app.providers.registry import get_model_provider
+from app.providers.runtime_classifier import decode_window_batch
+from app.providers.window_batch import WindowBatch
 from app.services.model_artifacts import ensure_model_artifacts
 from app.services.sessions import utc_now
+from app.storage import download_object_file, make_window_store_object_key
 
 JobProcessResult = Literal["done", "failed", "expired", "not_found"]
 
@@ -77,6 +84,7 @@ def process_job_by_id(job_id: str) -> JobProcessResult:
                 session.video_object_key,
                 options={
                     "session_id": session.id,
+                    "job_id": job.id,
                     "model_id": job.model_version_id,
                     "model_name": model_name,
                     "hf_repo": model_repo,
@@ -94,19 +102,7 @@ def process_job_by_id(job_id: str) -> JobProcessResult:
             db.commit()
             return _finish("failed")
 
-        db.execute(delete(TranscriptSegment).where(TranscriptSegment.job_id == job.id))
-        for item in generated:
-            db.add(
-                TranscriptSegment(
-                    job_id=job.id,
-                    order_index=item.order_index,
-                    start_sec=item.start_sec,
-                    end_sec=item.end_sec,
-                    text=item.text,
-                    confidence=item.confidence,
-                    version=1,
-                )
-            )
+        _replace_job_segments(db, job, generated)
 
         job.status = JobStatus.DONE
         job.progress = 100
@@ -114,3 +110,77 @@ def process_job_by_id(job_id: str) -> JobProcessResult:
         session.last_activity_at = utc_now()
         db.commit()
         return _finish("done")
+
+
+def redecode_job_segments(db: Session, job: Job, *, runtime_config_overrides: dict[str, Any]) -> None:
+    # Rebuilds the job's segments from its persisted window store with different decoder
+    # settings; no video download, frame decode or model forward pass is involved.
+    model = db.get(ModelVersion, job.model_version_id) if job.model_version_id else None
+    if not model or not model.artifact_path or not Path(model.artifact_path).exists():
+        raise RuntimeError("runtime_artifacts_missing")
+
+    with TemporaryDirectory(prefix="signflow-redecode-") as tmp_dir:
+        store_path = Path(tmp_dir) / "windows.npz"
+        try:
+            download_object_file(make_window_store_object_key(job.id), str(store_path))
+        except Exception as exc:
+            raise RuntimeError("window_store_not_found") from exc
+        batch, duration_sec = WindowBatch.load(store_path, with_probabilities=False)
+
+    predictions = decode_window_batch(
+        batch,
+        artifact_path=model.artifact_path,
+        duration_sec=duration_sec,
+        runtime_config_overrides=runtime_config_overrides,
+    )
+    generated = HuggingFaceProvider().segments_from_runtime_predictions(
+        predictions,
+        options={"model_id": job.model_version_id, "framework": model.framework},
+    )
+    _revise_job_segments(db, job, generated)
+    job.updated_at = utc_now()
+    db.commit()
+
+
+def _revise_job_segments(db: Session, job: Job, generated: list[ProviderSegment]) -> None:
+    # Like regenerate: existing rows keep their ids and get a version bump instead of being
+    # recreated at version 1; rows beyond the new segment count are dropped, extra ones added.
+    stmt = select(TranscriptSegment).where(TranscriptSegment.job_id == job.id).order_by(TranscriptSegment.order_index.asc())
+    existing = db.scalars(stmt).all()
+    for segment, item in zip(existing, generated, strict=False):
+        segment.order_index = item.order_index
+        segment.start_sec = item.start_sec
+        segment.end_sec = item.end_sec
+        segment.text = item.text
+        segment.confidence = item.confidence
+        segment.version += 1
+    for segment in existing[len(generated) :]:
+        db.delete(segment)
+    for item in generated[len(existing) :]:
+        db.add(
+            TranscriptSegment(
+                job_id=job.id,
+                order_index=item.order_index,
+                start_sec=item.start_sec,
+                end_sec=item.end_sec,
+                text=item.text,
+                confidence=item.confidence,
+                version=1,
+            )
+        )
+
+
+def _replace_job_segments(db: Session, job: Job, generated: list[ProviderSegment]) -> None:
+    db.execute(delete(TranscriptSegment).where(TranscriptSegment.job_id == job.id))
+    for item in generated:
+        db.add(
+            TranscriptSegment(
+                job_id=job.id,
+                order_index=item.order_index,
+                start_sec=item.start_sec,
+                end_sec=item.end_sec,
+                text=item.text,
+                confidence=item.confidence,
+                version=1,
+            )
+        )
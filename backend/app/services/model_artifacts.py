@@ -6,6 +6,8 @@ from urllib.parse import urlparse
 from urllib.request import urlopen
 
 from app.config import settings
+from app.providers.artifact_index import ensure_artifact_index, has_indexed_model
+from app.providers.runtime_spec import invalidate_runtime_spec
 
 
 def _safe_folder_name(value: str) -> str:
@@ -116,18 +118,25 @@ def upsert_runtime_assets(
             json.dumps(runtime_config, ensure_ascii=True, indent=2),
             encoding="utf-8",
         )
+    invalidate_runtime_spec(root)
 
     return str(root)
 
 
 def ensure_model_artifacts(model_id: str, hf_repo: str, hf_revision: str) -> str:
+    artifact_path = _ensure_model_files(model_id, hf_repo, hf_revision)
+    # Record resolved model/labels/config files so inference validates them by stat instead of globbing.
+    ensure_artifact_index(Path(artifact_path))
+    return artifact_path
+
+
+def _ensure_model_files(model_id: str, hf_repo: str, hf_revision: str) -> str:
     model_dir = _local_model_dir(model_id, hf_repo, hf_revision)
 
     # Direct model URL support for non-HF registries/object storage.
     if _is_direct_url(hf_repo):
         if settings.hf_offline:
-            cached = _find_cached_runtime_model(model_dir)
-            if cached:
+            if has_indexed_model(model_dir) or _find_cached_runtime_model(model_dir):
                 return str(model_dir)
             raise RuntimeError("hf_offline_without_cached_artifacts")
         _download_model_and_companions(hf_repo, model_dir)
@@ -1,10 +1,17 @@
+import logging
+from pathlib import Path
+
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models import ModelVersion, ModelVersionStatus
+from app.providers.artifact_index import build_artifact_index
+from app.providers.runtime_classifier import ensure_input_layout_manifest
 from app.services.model_artifacts import ensure_model_artifacts
 from app.services.sessions import utc_now
 
+logger = logging.getLogger(__name__)
+
 
 def ensure_default_model_version(db: Session) -> ModelVersion:
     active = db.scalars(select(ModelVersion).where(ModelVersion.is_active.is_(True))).first()
@@ -51,6 +58,13 @@ def activate_model_version(db: Session, model: ModelVersion) -> ModelVersion:
 def sync_model_version_artifacts(db: Session, model: ModelVersion) -> ModelVersion:
     now = utc_now()
     path = ensure_model_artifacts(model.id, model.hf_repo, model.hf_revision)
+    # An explicit sync always rescans, so newly added files win over a still-valid index entry.
+    build_artifact_index(Path(path))
+    try:
+        # Detect the model input layout once here so inference never probes shapes.
+        ensure_input_layout_manifest(path, model.framework)
+    except Exception as exc:
+        logger.warning("input layout detection failed: model_id=%s error=%s", model.id, exc)
     model.artifact_path = path
     model.downloaded_at = now
     model.last_sync_error = None
@@ -74,6 +74,10 @@ def make_export_object_key(job_id: str, export_format: str) -> str:
     return f"jobs/{job_id}/exports/result.{ext}"
 
 
+def make_window_store_object_key(job_id: str) -> str:
+    return f"jobs/{job_id}/runtime/windows.npz"
+
+
 def create_upload_url(object_key: str, content_type: str) -> str:
     client = _presign_client()
     return client.generate_presigned_url(
@@ -108,6 +112,20 @@ def object_exists(object_key: str) -> bool:
         return False
 
 
+def object_etag(object_key: str) -> str | None:
+    # ETag plus size identifies the stored bytes without downloading them; multipart ETags are
+    # not plain MD5s but are still stable for a given upload.
+    client = _s3_client()
+    try:
+        head = client.head_object(Bucket=settings.s3_bucket, Key=object_key)
+    except Exception:
+        return None
+    etag = str(head.get("ETag") or "").strip('"')
+    if not etag:
+        return None
+    return f"etag:{etag}:{int(head.get('ContentLength') or 0)}"
+
+
 def put_text_object(object_key: str, content: str, content_type: str) -> None:
     client = _s3_client()
     client.put_object(
@@ -121,3 +139,21 @@ def put_text_object(object_key: str, content: str, content_type: str) -> None:
 def download_object_file(object_key: str, destination_path: str) -> None:
     client = _s3_client()
     client.download_file(settings.s3_bucket, object_key, destination_path)
+
+
+def upload_object_file(object_key: str, source_path: str, content_type: str = "application/octet-stream") -> None:
+    client = _s3_client()
+    client.upload_file(source_path, settings.s3_bucket, object_key, ExtraArgs={"ContentType": content_type})
+
+
+def copy_object(source_key: str, destination_key: str) -> bool:
+    client = _s3_client()
+    try:
+        client.copy_object(
+            Bucket=settings.s3_bucket,
+            Key=destination_key,
+            CopySource={"Bucket": settings.s3_bucket, "Key": source_key},
+        )
+        return True
+    except ClientError:
+        return False
@@ -0,0 +1,119 @@
+"""Harness: dense vs coarse-to-fine adaptive window scanning.
+
+Runs the same video through ``scan_mode=dense`` and ``scan_mode=adaptive`` and reports model
+invocations, wall time and how far the adaptive segments drift from the dense ones. Without
+``--video``/``--artifact`` a synthetic video with long stable spans and a tiny TorchScript
+classifier are generated (needs torch). Run from ``backend/``::
+
+    python -m benchmarks.adaptive_scan --seconds 60 --span-seconds 6
+    python -m benchmarks.adaptive_scan --video clip.mp4 --artifact /models/mvit --framework onnx
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from app.providers.runner_cache import runner_cache
+from app.providers.runtime_classifier import InferenceReport, infer_gesture_labels_from_file
+from benchmarks.synthetic import colour_classifier, write_artifact, write_synthetic_video
+
+
+def _scan(video: Path, artifact: Path, framework: str, scan_mode: str, overrides: dict) -> dict:
+    runner_cache.clear()
+    report = InferenceReport()
+    started = time.perf_counter()
+    predictions = infer_gesture_labels_from_file(
+        video_path=str(video),
+        artifact_path=str(artifact),
+        framework=framework,
+        runtime_config_overrides={**overrides, "scan_mode": scan_mode},
+        report=report,
+    )
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "windows": report.windows,
+        "windows_refined": report.windows_refined,
+        "segments": [
+            {"label": item.label, "start_sec": item.start_sec, "end_sec": item.end_sec, "confidence": item.confidence}
+            for item in predictions
+        ],
+    }
+
+
+def compare(dense: list[dict], adaptive: list[dict]) -> dict:
+    same_labels = [item["label"] for item in dense] == [item["label"] for item in adaptive]
+    drift = None
+    if same_labels and dense:
+        drift = max(
+            max(abs(left["start_sec"] - right["start_sec"]), abs(left["end_sec"] - right["end_sec"]))
+            for left, right in zip(dense, adaptive, strict=True)
+        )
+    return {"same_labels": same_labels, "max_boundary_drift_sec": drift}
+
+
+def run(
+    *,
+    video: str | None,
+    artifact: str | None,
+    framework: str,
+    seconds: float,
+    span_seconds: float,
+    fps: float,
+    overrides: dict,
+) -> dict:
+    with tempfile.TemporaryDirectory(prefix="adaptive-scan-") as tmp:
+        workdir = Path(tmp)
+        video_path = Path(video) if video else write_synthetic_video(
+            workdir / "input.mp4",
+            seconds=seconds,
+            span_seconds=span_seconds,
+            fps=fps,
+        )
+        if artifact:
+            artifact_path = Path(artifact)
+        else:
+            framework = "torchscript"
+            artifact_path = write_artifact(
+                workdir / "artifact",
+                colour_classifier(),
+                framework,
+                labels=["red", "green", "blue", "idle"],
+                runtime_config={"num_frames": 8, "window_size_frames": 32, "stride_frames": 8, "input_size": 112},
+            )
+        dense = _scan(video_path, artifact_path, framework, "dense", overrides)
+        adaptive = _scan(video_path, artifact_path, framework, "adaptive", overrides)
+    return {
+        "dense": {key: value for key, value in dense.items() if key != "segments"},
+        "adaptive": {key: value for key, value in adaptive.items() if key != "segments"},
+        "invocation_ratio": round(dense["windows"] / max(adaptive["windows"], 1), 2),
+        "segments": {"dense": len(dense["segments"]), "adaptive": len(adaptive["segments"])},
+        **compare(dense["segments"], adaptive["segments"]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", default=None)
+    parser.add_argument("--artifact", default=None)
+    parser.add_argument("--framework", default="onnx")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--span-seconds", type=float, default=6.0)
+    parser.add_argument("--fps", type=float, default=24.0)
+    parser.add_argument("--overrides", default="{}", help="JSON runtime_config overrides applied to both scans")
+    args = parser.parse_args()
+    report = run(
+        video=args.video,
+        artifact=args.artifact,
+        framework=args.framework,
+        seconds=args.seconds,
+        span_seconds=args.span_seconds,
+        fps=args.fps,
+        overrides=json.loads(args.overrides),
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark: ONNX Runtime session settings and bound IO vs cold start time and windows/sec.
+
+Each configuration is measured twice: a cold session build from the source model and a
+build from the cached optimized graph. Without ``--model`` a small Conv3d classifier is
+exported to a temporary directory (needs torch). Run from ``backend/``::
+
+    python -m benchmarks.onnx_session --batch 4 --frames 16 --input-size 112 --repeat 10
+    python -m benchmarks.onnx_session --model /path/to/model.onnx --configs '[{"onnx_intra_op_threads": 1}]'
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.providers.onnx_session import OPTIMIZED_MODEL_DIR, OnnxIoBinding, create_onnx_session, onnx_session_options
+from benchmarks.synthetic import conv_classifier, export_onnx
+
+DEFAULT_CONFIGS = [
+    {"onnx_graph_optimization_level": "disable"},
+    {"onnx_graph_optimization_level": "basic"},
+    {"onnx_graph_optimization_level": "all"},
+    {"onnx_graph_optimization_level": "all", "onnx_intra_op_threads": 1},
+    {"onnx_graph_optimization_level": "all", "onnx_execution_mode": "parallel", "onnx_inter_op_threads": 2},
+    {"onnx_graph_optimization_level": "all", "onnx_enable_cpu_mem_arena": False, "onnx_enable_mem_pattern": False},
+    {"onnx_graph_optimization_level": "all", "onnx_io_binding": True},
+]
+
+
+def _measure_config(model_path: Path, cache_dir: Path, config: dict, clips, repeat: int) -> dict:
+    options = onnx_session_options(config)
+    shutil.rmtree(cache_dir / OPTIMIZED_MODEL_DIR, ignore_errors=True)
+
+    started = time.perf_counter()
+    session, cold_source = create_onnx_session(model_path, options, cache_dir=cache_dir)
+    cold_ms = (time.perf_counter() - started) * 1000.0
+    started = time.perf_counter()
+    _, warm_source = create_onnx_session(model_path, options, cache_dir=cache_dir)
+    warm_ms = (time.perf_counter() - started) * 1000.0
+
+    if options.io_binding:
+        bound = OnnxIoBinding(session, layout="ncthw")
+
+        def infer():
+            return bound(clips)
+    else:
+        feed = {session.get_inputs()[0].name: clips}
+
+        def infer():
+            return session.run(None, feed)
+
+    infer()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        infer()
+    elapsed = time.perf_counter() - started
+    return {
+        "config": config,
+        "cold_start_ms": round(cold_ms, 2),
+        "cached_start_ms": round(warm_ms, 2),
+        "cold_source": cold_source,
+        "cached_source": warm_source,
+        "windows_per_sec": round(clips.shape[0] * repeat / elapsed, 2),
+    }
+
+
+def run(*, model: str | None, configs: list[dict], batch: int, frames: int, input_size: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="onnx-session-bench-") as tmp:
+        workdir = Path(tmp)
+        if model:
+            model_path = workdir / Path(model).name
+            shutil.copy2(model, model_path)
+        else:
+            model_path = export_onnx(
+                conv_classifier(100, channels=(16, 32), batch_norm=True),
+                workdir / "model.onnx",
+                num_frames=16,
+                input_size=112,
+                dynamic_clip=True,
+            )
+        clips = np.random.default_rng(0).random((batch, 3, frames, input_size, input_size), dtype=np.float32)
+        results = [_measure_config(model_path, workdir, config, clips, repeat) for config in configs]
+    return {
+        "batch": batch,
+        "clip_shape": [3, frames, input_size, input_size],
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=None, help="ONNX model taking [N, C, T, H, W] clips")
+    parser.add_argument("--configs", default=None, help="JSON list of runtime_config.json onnx_* overrides")
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=16)
+    parser.add_argument("--input-size", type=int, default=112)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    configs = json.loads(args.configs) if args.configs else DEFAULT_CONFIGS
+    report = run(
+        model=args.model,
+        configs=configs,
+        batch=args.batch,
+        frames=args.frames,
+        input_size=args.input_size,
+        repeat=args.repeat,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
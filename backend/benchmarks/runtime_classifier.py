@@ -0,0 +1,180 @@
+"""Benchmark: end-to-end ``infer_gesture_labels_from_file`` throughput on synthetic inputs.
+
+Generates deterministic MP4s (fixed seed, configurable length, fps and resolution) and tiny
+Conv3d classifiers exported to TorchScript and ONNX (needs torch), then reports decode fps,
+preprocess fps, windows/sec, per-stage latency percentiles over ``--repeat`` runs and peak
+RSS. Every case runs in a fresh process so RSS and runner caches do not leak between cases.
+Run from ``backend/``::
+
+    python -m benchmarks.runtime_classifier --seconds 20 --resolutions 320x240,1280x720 --repeat 5
+    python -m benchmarks.runtime_classifier --frameworks onnx --overrides '{"pipelined_inference": false}' \\
+        --output before.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from app.providers.runtime_classifier import InferenceReport, infer_gesture_labels_from_file
+from benchmarks.synthetic import conv_classifier, write_artifact, write_synthetic_video
+
+STAGES = ("decode", "preprocess", "inference", "total")
+PERCENTILES = (50, 90, 99)
+DEFAULT_RUNTIME_CONFIG = {"num_frames": 16, "window_size_frames": 32, "stride_frames": 8, "input_size": 112}
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    result = {}
+    for percentile in PERCENTILES:
+        # Nearest rank: with a handful of repeats, interpolation would invent values.
+        rank = max(int(np.ceil(percentile / 100 * len(ordered))), 1)
+        result[f"p{percentile}_ms"] = round(ordered[rank - 1] * 1000.0, 2)
+    return result
+
+
+def _run_once(video: Path, artifact: Path, framework: str, overrides: dict) -> tuple[InferenceReport, float]:
+    report = InferenceReport()
+    started = time.perf_counter()
+    infer_gesture_labels_from_file(
+        video_path=str(video),
+        artifact_path=str(artifact),
+        framework=framework,
+        runtime_config_overrides=overrides,
+        report=report,
+    )
+    return report, time.perf_counter() - started
+
+
+def measure_case(video: str, artifact: str, framework: str, overrides: dict, repeat: int) -> dict:
+    # First run loads the runner (and ONNX optimized graph); it is reported but not sampled.
+    _, warmup_sec = _run_once(Path(video), Path(artifact), framework, overrides)
+    samples: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    reports: list[InferenceReport] = []
+    for _ in range(repeat):
+        report, total_sec = _run_once(Path(video), Path(artifact), framework, overrides)
+        reports.append(report)
+        samples["decode"].append(report.decode_sec)
+        samples["preprocess"].append(report.preprocess_sec)
+        samples["inference"].append(report.inference_sec)
+        samples["total"].append(total_sec)
+
+    decode_sec = sum(samples["decode"])
+    preprocess_sec = sum(samples["preprocess"])
+    total_sec = sum(samples["total"])
+    last = reports[-1]
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "windows": last.windows,
+        "frames_grabbed": last.frames_grabbed,
+        "frames_preprocessed": last.frames_preprocessed,
+        "pipelined": last.pipelined,
+        "warmup_sec": round(warmup_sec, 3),
+        "decode_fps": round(sum(item.frames_grabbed for item in reports) / decode_sec, 1) if decode_sec else None,
+        "preprocess_fps": (
+            round(sum(item.frames_preprocessed for item in reports) / preprocess_sec, 1) if preprocess_sec else None
+        ),
+        "windows_per_sec": round(sum(item.windows for item in reports) / total_sec, 2) if total_sec else None,
+        "stages": {stage: percentiles(values) for stage, values in samples.items()},
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+    }
+
+
+def parse_resolutions(value: str) -> list[tuple[int, int]]:
+    resolutions = []
+    for item in value.split(","):
+        width, height = item.lower().split("x")
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+
+def run(
+    *,
+    seconds: float,
+    fps: float,
+    resolutions: list[tuple[int, int]],
+    frameworks: list[str],
+    classes: int,
+    repeat: int,
+    runtime_config: dict,
+    overrides: dict,
+) -> dict:
+    cases = []
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="runtime-classifier-bench-") as tmp:
+        workdir = Path(tmp)
+        artifacts = {
+            framework: write_artifact(
+                workdir / f"artifact-{framework}",
+                conv_classifier(classes),
+                framework,
+                labels=[f"sign_{index}" for index in range(classes)],
+                runtime_config=runtime_config,
+            )
+            for framework in frameworks
+        }
+        for width, height in resolutions:
+            video = write_synthetic_video(
+                workdir / f"synthetic-{width}x{height}.mp4",
+                seconds=seconds,
+                fps=fps,
+                width=width,
+                height=height,
+                noise_seed=0,
+            )
+            for framework in frameworks:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(
+                        measure_case, str(video), str(artifacts[framework]), framework, overrides, repeat
+                    ).result()
+                cases.append({"framework": framework, "resolution": f"{width}x{height}", **result})
+    return {
+        "video": {"seconds": seconds, "fps": fps},
+        "runtime_config": runtime_config,
+        "overrides": overrides,
+        "classes": classes,
+        "repeat": repeat,
+        "cases": cases,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--fps", type=float, default=24.0)
+    parser.add_argument("--resolutions", default="320x240,640x480")
+    parser.add_argument("--frameworks", default="onnx,torchscript")
+    parser.add_argument("--classes", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--runtime-config", default=None, help="JSON runtime_config.json for the tiny models")
+    parser.add_argument("--overrides", default="{}", help="JSON runtime_config overrides applied to every run")
+    parser.add_argument("--output", default=None, help="also write the JSON report to this path")
+    args = parser.parse_args()
+
+    report = run(
+        seconds=args.seconds,
+        fps=args.fps,
+        resolutions=parse_resolutions(args.resolutions),
+        frameworks=[item.strip() for item in args.frameworks.split(",") if item.strip()],
+        classes=args.classes,
+        repeat=max(args.repeat, 1),
+        runtime_config=json.loads(args.runtime_config) if args.runtime_config else DEFAULT_RUNTIME_CONFIG,
+        overrides=json.loads(args.overrides),
+    )
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(encoded + "\n", encoding="utf-8")
+    print(encoded)
+
+
+if __name__ == "__main__":
+    main()
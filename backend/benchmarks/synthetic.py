@@ -0,0 +1,116 @@
+"""Synthetic inputs shared by the benchmarks: deterministic MP4s and tiny classifier artifacts.
+
+The classifiers need torch; they are only built when a benchmark has no real model to run.
+"""
+
+import json
+from pathlib import Path
+
+import cv2  # type: ignore[import-untyped]
+import numpy as np
+
+
+def write_synthetic_video(
+    path: Path,
+    *,
+    seconds: float,
+    fps: float,
+    width: int = 160,
+    height: int = 120,
+    span_seconds: float = 2.0,
+    noise_seed: int | None = None,
+) -> Path:
+    # Dominant colour changes every span and a square moves across the frame, so frames are
+    # never identical; optional fixed-seed noise makes the codec do real work. Identical
+    # arguments give identical bytes.
+    background = np.zeros((height, width, 3), dtype=np.uint8)
+    if noise_seed is not None:
+        background = np.random.default_rng(noise_seed).integers(0, 32, size=(height, width, 3), dtype=np.uint8)
+    span = max(int(span_seconds * fps), 1)
+    side = max(min(width, height) // 8, 4)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for index in range(max(int(seconds * fps), 1)):
+        frame = background.copy()
+        frame[:, :, (index // span) % 3] += 200
+        x = (index * 4) % max(width - side, 1)
+        cv2.rectangle(frame, (x, height // 4), (x + side, height // 4 + side), (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def conv_classifier(classes: int, *, channels: tuple[int, int] = (8, 16), batch_norm: bool = False):
+    import torch
+
+    class _ConvClassifier(torch.nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            first, second = channels
+            layers: list[torch.nn.Module] = [torch.nn.Conv3d(3, first, kernel_size=3, stride=(1, 2, 2), padding=1)]
+            if batch_norm:
+                layers.append(torch.nn.BatchNorm3d(first))
+            layers += [torch.nn.ReLU(), torch.nn.Conv3d(first, second, kernel_size=3, stride=2, padding=1)]
+            if batch_norm:
+                layers.append(torch.nn.BatchNorm3d(second))
+            layers.append(torch.nn.ReLU())
+            self.features = torch.nn.Sequential(*layers)
+            self.head = torch.nn.Linear(second, classes)
+
+        def forward(self, clip):
+            return self.head(self.features(clip).mean(dim=(2, 3, 4)))
+
+    torch.manual_seed(0)
+    return _ConvClassifier().eval()
+
+
+def colour_classifier():
+    # Four classes: red, green, blue and an "idle" class that never wins on a coloured frame.
+    import torch
+
+    class _ColourClassifier(torch.nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.fc = torch.nn.Linear(3, 4)
+            with torch.no_grad():
+                self.fc.weight.copy_(
+                    torch.tensor([[4.0, 0.0, 0.0], [0.0, 4.0, 0.0], [0.0, 0.0, 4.0], [-2.0, -2.0, -2.0]])
+                )
+                self.fc.bias.zero_()
+
+        def forward(self, clip):
+            return self.fc(clip.mean(dim=(2, 3, 4)))
+
+    return _ColourClassifier().eval()
+
+
+def export_onnx(model, path: Path, *, num_frames: int, input_size: int, dynamic_clip: bool = False) -> Path:
+    import torch
+
+    clip_axes = {0: "batch", 2: "frames", 3: "height", 4: "width"} if dynamic_clip else {0: "batch"}
+    torch.onnx.export(
+        model,
+        torch.zeros(1, 3, num_frames, input_size, input_size),
+        str(path),
+        input_names=["clip"],
+        output_names=["logits"],
+        dynamic_axes={"clip": clip_axes, "logits": {0: "batch"}},
+    )
+    return path
+
+
+def write_artifact(root: Path, model, framework: str, *, labels: list[str], runtime_config: dict) -> Path:
+    import torch
+
+    root.mkdir(parents=True, exist_ok=True)
+    if framework == "onnx":
+        export_onnx(
+            model,
+            root / "model.onnx",
+            num_frames=int(runtime_config["num_frames"]),
+            input_size=int(runtime_config["input_size"]),
+        )
+    else:
+        torch.jit.script(model).save(str(root / "model.pt"))
+    (root / "labels.json").write_text(json.dumps(labels), encoding="utf-8")
+    (root / "runtime_config.json").write_text(json.dumps(runtime_config), encoding="utf-8")
+    return root
@@ -0,0 +1,80 @@
+"""Micro-benchmark: per-window softmax/argmax vs batched softmax_rows/argmax_rows.
+
+Run from ``backend/``::
+
+    python -m benchmarks.window_softmax --windows 1000,10000,100000 --classes 100
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.providers.probabilities import argmax_rows, softmax_rows
+
+
+def legacy_softmax(logits):
+    # Pre-batching path: one softmax per window with a Python-float denominator.
+    shifted = logits - np.max(logits)
+    exponent = np.exp(shifted)
+    denominator = float(np.sum(exponent))
+    if denominator <= 0:
+        return np.ones_like(logits, dtype=np.float32) / max(len(logits), 1)
+    return exponent / denominator
+
+
+def legacy_windows(logits) -> list[tuple[int, float]]:
+    result = []
+    for row in logits:
+        probabilities = legacy_softmax(row)
+        class_index = int(np.argmax(probabilities))
+        result.append((class_index, float(probabilities[class_index])))
+    return result
+
+
+def batched_windows(logits) -> list[tuple[int, float]]:
+    class_index, confidence = argmax_rows(softmax_rows(logits))
+    return list(zip(class_index.tolist(), confidence.tolist()))
+
+
+def _measure(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - started) / repeat * 1000.0, 3)
+
+
+def run(*, windows: list[int], classes: int, repeat: int) -> dict:
+    rng = np.random.default_rng(0)
+    results = []
+    for count in windows:
+        logits = (rng.normal(size=(count, classes)) * 4.0).astype(np.float32)
+        if legacy_windows(logits[:256]) != batched_windows(logits[:256]):
+            raise RuntimeError("batched_softmax_mismatch")
+        legacy_ms = _measure(lambda: legacy_windows(logits), repeat)
+        batched_ms = _measure(lambda: batched_windows(logits), repeat)
+        results.append(
+            {
+                "windows": count,
+                "legacy_ms": legacy_ms,
+                "batched_ms": batched_ms,
+                "speedup": round(legacy_ms / max(batched_ms, 1e-9), 2),
+            }
+        )
+    return {"classes": classes, "repeat": repeat, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--windows", default="1000,10000,100000", help="comma-separated window counts")
+    parser.add_argument("--classes", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    windows = [int(item) for item in args.windows.split(",") if item.strip()]
+    print(json.dumps(run(windows=windows, classes=args.classes, repeat=args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
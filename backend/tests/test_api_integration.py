@@ -269,12 +269,14 @@ def test_live_predict_uses_runtime_classifier(client, monkeypatch):
         framework: str,
         top_k_override: int | None = None,
         runtime_config_overrides: dict | None = None,
+        model_version_id: str | None = None,
     ):
         assert video_path
         assert artifact_path
         assert framework == "torchscript"
         assert top_k_override == 2
         assert runtime_config_overrides == {"decoder_mode": "realtime"}
+        assert model_version_id
         return [_Prediction(label="hello", confidence=0.91, start_sec=0.0, end_sec=0.7)]
 
     monkeypatch.setattr("app.api.infer_gesture_labels_from_file", fake_runtime_predict)
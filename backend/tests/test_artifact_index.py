@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.providers import artifact_index
+from app.providers.artifact_index import (
+    ARTIFACT_INDEX_NAME,
+    clear_artifact_index_memo,
+    ensure_artifact_index,
+    resolve_model_path,
+)
+from app.services.model_artifacts import ensure_model_artifacts
+
+
+@pytest.fixture(autouse=True)
+def _clear_memo():
+    clear_artifact_index_memo()
+    yield
+    clear_artifact_index_memo()
+
+
+def _snapshot(tmp_path: Path) -> Path:
+    root = tmp_path / "snapshot"
+    (root / "nested" / "deeper").mkdir(parents=True)
+    (root / "nested" / "deeper" / "classifier.onnx").write_bytes(b"onnx")
+    (root / "weights.pt").write_bytes(b"torch")
+    (root / "labels.json").write_text(json.dumps(["a", "b"]), encoding="utf-8")
+    return root
+
+
+def test_indexed_lookup_skips_recursive_scan(tmp_path, monkeypatch):
+    root = _snapshot(tmp_path)
+    ensure_artifact_index(root)
+    index = json.loads((root / ARTIFACT_INDEX_NAME).read_text(encoding="utf-8"))
+    assert index["models"]["onnx"]["path"] == "nested/deeper/classifier.onnx"
+    assert set(index) == {"version", "models"}
+
+    clear_artifact_index_memo()
+    monkeypatch.setattr(artifact_index, "find_model_file", lambda *_: pytest.fail("recursive scan on hot path"))
+    assert resolve_model_path(root, "onnx") == root / "nested" / "deeper" / "classifier.onnx"
+    assert resolve_model_path(root, "torch") == root / "weights.pt"
+
+
+def test_stale_index_entry_falls_back_to_scan_and_refreshes(tmp_path):
+    root = _snapshot(tmp_path)
+    ensure_artifact_index(root)
+    (root / "nested" / "deeper" / "classifier.onnx").unlink()
+    (root / "model.onnx").write_bytes(b"replacement")
+
+    assert resolve_model_path(root, "onnx") == root / "model.onnx"
+    index = json.loads((root / ARTIFACT_INDEX_NAME).read_text(encoding="utf-8"))
+    assert index["models"]["onnx"]["path"] == "model.onnx"
+
+    with pytest.raises(RuntimeError, match="unsupported_framework"):
+        resolve_model_path(root, "tflite")
+
+
+def test_ensure_model_artifacts_writes_index(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.model_artifacts.settings.hf_cache_dir", str(tmp_path))
+    artifact_path = Path(ensure_model_artifacts("model-1", "local/demo", "main"))
+
+    index = json.loads((artifact_path / ARTIFACT_INDEX_NAME).read_text(encoding="utf-8"))
+    assert index["models"] == {}
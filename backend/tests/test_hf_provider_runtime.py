@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import pytest
+from prometheus_client import REGISTRY
 
 from app.config import settings
 from app.providers.hf import HuggingFaceProvider
@@ -15,11 +16,18 @@ def test_hf_provider_prefers_runtime_predictions_when_enabled(monkeypatch, tmp_p
     previous_runtime_enabled = settings.hf_runtime_enabled
     settings.hf_runtime_enabled = True
     try:
-        def fake_infer(video_object_key: str, artifact_path: str, framework: str, top_k_override: int | None = None):
+        def fake_infer(
+            video_object_key: str,
+            artifact_path: str,
+            framework: str,
+            top_k_override: int | None = None,
+            model_version_id: str | None = None,
+        ):
             assert video_object_key == "sessions/demo/uploads/demo.mp4"
             assert Path(artifact_path) == model_dir
             assert framework == "onnx"
             assert top_k_override is None
+            assert model_version_id is None
             return [
                 RuntimePrediction(label="hello", confidence=0.94, start_sec=0.0, end_sec=0.7),
                 RuntimePrediction(label="thanks", confidence=0.87, start_sec=0.7, end_sec=1.6),
@@ -121,3 +129,32 @@ def test_hf_provider_runtime_failure_fallback_when_non_strict(monkeypatch, tmp_p
     finally:
         settings.hf_runtime_enabled = previous_runtime_enabled
         settings.hf_runtime_strict = previous_runtime_strict
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_hf_provider_records_transcribe_and_grammar_stage_metrics(monkeypatch, tmp_path, enabled):
+    model_dir = tmp_path / "runtime-model"
+    model_dir.mkdir(parents=True, exist_ok=True)
+    model_version = f"metrics-model-{enabled}"
+    monkeypatch.setattr(settings, "hf_runtime_enabled", True)
+    monkeypatch.setattr(settings, "hf_grammar_enabled", True)
+    monkeypatch.setattr(settings, "runtime_stage_metrics_enabled", enabled)
+    monkeypatch.setattr(
+        "app.providers.hf.infer_gesture_labels",
+        lambda **_kwargs: [RuntimePrediction(label="привет", confidence=0.9, start_sec=0.0, end_sec=0.5)],
+    )
+    monkeypatch.setattr("app.providers.hf.correct_russian_tokens", lambda tokens: tokens)
+
+    def count(stage: str):
+        labels = {"stage": stage, "model_version": model_version, "framework": "torchscript"}
+        return REGISTRY.get_sample_value("signflow_runtime_stage_seconds_count", labels)
+
+    segments = HuggingFaceProvider().transcribe(
+        "sessions/demo/uploads/demo.mp4",
+        options={"artifact_path": str(model_dir), "framework": "torch", "model_id": model_version},
+    )
+
+    assert segments[0].text == "Predicted gesture: привет"
+    expected = 1.0 if enabled else None
+    assert count("transcribe") == expected
+    assert count("grammar") == expected
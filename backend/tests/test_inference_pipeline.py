@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from app.providers.inference_pipeline import PipelineStats, iter_pipelined
+
+
+def test_pipelined_results_keep_source_order():
+    def prepare(item: int) -> int:
+        # Later items finish first; results must still come back in source order.
+        time.sleep(0.001 * (10 - item))
+        return item * item
+
+    stats = PipelineStats()
+    results = list(iter_pipelined(range(10), prepare, queue_depth=3, workers=4, stats=stats))
+
+    assert results == [(item, item * item) for item in range(10)]
+    assert stats.queue_samples == 11
+    assert stats.queue_max_depth <= 3
+
+
+def test_pipelined_queue_depth_bounds_decode_read_ahead():
+    produced: list[int] = []
+
+    def source():
+        for item in range(50):
+            produced.append(item)
+            yield item
+
+    stats = PipelineStats()
+    stream = iter_pipelined(source(), lambda item: item, queue_depth=2, workers=1, stats=stats)
+    assert next(stream) == (0, 0)
+    time.sleep(0.2)
+    # One item consumed, at most queue_depth queued, one blocked in put().
+    assert len(produced) <= 4
+    stream.close()
+    assert stats.decode_blocked_sec > 0.0
+
+
+def test_pipelined_propagates_source_and_prepare_errors():
+    def broken_source():
+        yield 1
+        raise RuntimeError("video_decode_failed")
+
+    with pytest.raises(RuntimeError, match="video_decode_failed"):
+        list(iter_pipelined(broken_source(), lambda item: item, queue_depth=2, workers=1, stats=PipelineStats()))
+
+    def broken_prepare(item: int) -> int:
+        if item == 3:
+            raise ValueError("bad_frame")
+        return item
+
+    with pytest.raises(ValueError, match="bad_frame"):
+        list(iter_pipelined(range(6), broken_prepare, queue_depth=2, workers=2, stats=PipelineStats()))
+
+
+def test_closing_pipeline_stops_decode_thread():
+    before = {thread.name for thread in threading.enumerate()}
+    stream = iter_pipelined(iter(range(1000)), lambda item: item, queue_depth=1, workers=1, stats=PipelineStats())
+    next(stream)
+    stream.close()
+    assert not [thread for thread in threading.enumerate() if thread.name == "signflow-decode"]
+    assert {thread.name for thread in threading.enumerate()} <= before | {"MainThread"}
@@ -0,0 +1,142 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.config import settings  # noqa: E402
+from app.services import jobs  # noqa: E402
+from app.providers.window_batch import WindowBatch  # noqa: E402
+
+
+class _FakeDb:
+    def __init__(self, model, segments: list | None = None) -> None:
+        self.model = model
+        self.segments = list(segments or [])
+        self.deleted: list = []
+        self.commits = 0
+
+    def get(self, _entity, _identity):
+        return self.model
+
+    def scalars(self, _statement):
+        return SimpleNamespace(all=lambda: sorted(self.segments, key=lambda row: row.order_index))
+
+    def add(self, row) -> None:
+        self.segments.append(row)
+
+    def delete(self, row) -> None:
+        self.segments.remove(row)
+        self.deleted.append(row)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def texts(self) -> list[str]:
+        return [row.text for row in sorted(self.segments, key=lambda row: row.order_index)]
+
+
+def _segment(order_index: int, text: str, version: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=f"seg-{order_index}",
+        order_index=order_index,
+        start_sec=0.0,
+        end_sec=0.5,
+        text=text,
+        confidence=0.5,
+        version=version,
+    )
+
+
+def _artifact(root: Path) -> Path:
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "labels.json").write_text('["hello", "thanks"]', encoding="utf-8")
+    (root / "runtime_config.json").write_text('{"decoder_mode": "realtime"}', encoding="utf-8")
+    return root
+
+
+def _store(path: Path) -> Path:
+    # 12 windows of 0.25 s: "hello" at 0.9, then "thanks" at a weaker 0.6.
+    probabilities = np.zeros((12, 2), dtype=np.float32)
+    probabilities[:6] = [0.9, 0.1]
+    probabilities[6:] = [0.4, 0.6]
+    starts = [index * 0.25 for index in range(12)]
+    batch = WindowBatch(dtype="float16")
+    batch.append(start_sec=starts, end_sec=[start + 0.5 for start in starts], probabilities=probabilities)
+    batch.save(path, duration_sec=3.25)
+    return path
+
+
+def test_redecode_rebuilds_segments_from_the_window_store(tmp_path, monkeypatch):
+    root = _artifact(tmp_path / "artifact")
+    store = _store(tmp_path / "stored.npz")
+    downloads: list[str] = []
+
+    def fake_download(object_key: str, destination_path: str) -> None:
+        downloads.append(object_key)
+        Path(destination_path).write_bytes(store.read_bytes())
+
+    monkeypatch.setattr(jobs, "download_object_file", fake_download)
+    db = _FakeDb(SimpleNamespace(artifact_path=str(root), framework="onnx"))
+    job = SimpleNamespace(id="job-1", model_version_id="model-1", updated_at=None)
+
+    jobs.redecode_job_segments(db, job, runtime_config_overrides={"realtime_min_confidence": 0.2})
+    assert downloads == ["jobs/job-1/runtime/windows.npz"]
+    assert db.texts() == ["Predicted gesture: hello", "Predicted gesture: thanks"]
+    assert db.commits == 1 and job.updated_at is not None
+
+    jobs.redecode_job_segments(db, job, runtime_config_overrides={"realtime_min_confidence": 0.7})
+    assert db.texts() == ["Predicted gesture: hello"]
+    assert [row.order_index for row in db.segments] == [0]
+    assert [row.text for row in db.deleted] == ["Predicted gesture: thanks"]
+
+
+def test_redecode_bumps_versions_of_edited_segments(tmp_path, monkeypatch):
+    root = _artifact(tmp_path / "artifact")
+    store = _store(tmp_path / "stored.npz")
+    monkeypatch.setattr(jobs, "download_object_file", lambda _key, path: Path(path).write_bytes(store.read_bytes()))
+    edited = _segment(0, "user edited text", version=3)
+    db = _FakeDb(SimpleNamespace(artifact_path=str(root), framework="onnx"), segments=[edited])
+    job = SimpleNamespace(id="job-1", model_version_id="model-1", updated_at=None)
+
+    jobs.redecode_job_segments(db, job, runtime_config_overrides={"realtime_min_confidence": 0.2})
+
+    assert db.segments[0] is edited
+    assert edited.text == "Predicted gesture: hello" and edited.version == 4
+    assert db.segments[1].text == "Predicted gesture: thanks" and db.segments[1].version == 1
+
+
+def test_redecode_applies_grammar_like_the_job_pipeline(tmp_path, monkeypatch):
+    root = _artifact(tmp_path / "artifact")
+    store = _store(tmp_path / "stored.npz")
+    grammar_calls: list[list[str]] = []
+
+    def fake_grammar(tokens: list[str]) -> list[str]:
+        grammar_calls.append(tokens)
+        return [token.upper() for token in tokens]
+
+    monkeypatch.setattr(jobs, "download_object_file", lambda _key, path: Path(path).write_bytes(store.read_bytes()))
+    monkeypatch.setattr("app.providers.hf.correct_russian_tokens", fake_grammar)
+    monkeypatch.setattr(settings, "hf_grammar_enabled", True)
+    db = _FakeDb(SimpleNamespace(artifact_path=str(root), framework="onnx"))
+    job = SimpleNamespace(id="job-1", model_version_id="model-1", updated_at=None)
+
+    jobs.redecode_job_segments(db, job, runtime_config_overrides={"realtime_min_confidence": 0.2})
+
+    assert grammar_calls == [["hello", "thanks"]]
+    assert db.texts() == ["Predicted gesture: HELLO", "Predicted gesture: THANKS"]
+
+
+def test_redecode_requires_artifacts_and_a_window_store(tmp_path, monkeypatch):
+    job = SimpleNamespace(id="job-1", model_version_id="model-1", updated_at=None)
+    with pytest.raises(RuntimeError, match="runtime_artifacts_missing"):
+        jobs.redecode_job_segments(_FakeDb(None), job, runtime_config_overrides={})
+
+    def missing(_object_key: str, _destination_path: str) -> None:
+        raise FileNotFoundError("404")
+
+    monkeypatch.setattr(jobs, "download_object_file", missing)
+    db = _FakeDb(SimpleNamespace(artifact_path=str(_artifact(tmp_path / "artifact"))))
+    with pytest.raises(RuntimeError, match="window_store_not_found"):
+        jobs.redecode_job_segments(db, job, runtime_config_overrides={})
@@ -0,0 +1,300 @@
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+ort = pytest.importorskip("onnxruntime")
+torch = pytest.importorskip("torch")
+
+from app.providers.onnx_session import (  # noqa: E402
+    OPTIMIZED_MODEL_DIR,
+    OnnxIoBinding,
+    OnnxSessionOptions,
+    build_session_options,
+    create_onnx_session,
+    onnx_session_options,
+)
+from app.providers import runtime_classifier  # noqa: E402
+from app.providers.runner_cache import runner_cache  # noqa: E402
+from app.providers.runtime_classifier import (  # noqa: E402
+    _create_onnx_runner,
+    _get_model_runner,
+    infer_gesture_labels_from_file,
+)
+from app.providers.runtime_spec import invalidate_runtime_spec  # noqa: E402
+
+
+class _MeanPoolClassifier(torch.nn.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        self.fc = torch.nn.Linear(3, 4)
+
+    def forward(self, clip):
+        return self.fc(clip.mean(dim=(2, 3, 4)))
+
+
+class _NtchwMeanPoolClassifier(_MeanPoolClassifier):
+    def forward(self, clip):
+        return self.fc(clip.mean(dim=(1, 3, 4)))
+
+
+def _export_model(path: Path, *, ntchw: bool = False, dynamic_size: bool = False) -> Path:
+    torch.manual_seed(0)
+    clip_axes = {0: "batch", 3: "height", 4: "width"} if dynamic_size else {0: "batch"}
+    torch.onnx.export(
+        (_NtchwMeanPoolClassifier() if ntchw else _MeanPoolClassifier()).eval(),
+        torch.zeros(1, 4, 3, 8, 8) if ntchw else torch.zeros(1, 3, 4, 8, 8),
+        str(path),
+        input_names=["clip"],
+        output_names=["logits"],
+        dynamic_axes={"clip": clip_axes, "logits": {0: "batch"}},
+    )
+    return path
+
+
+def test_onnx_session_options_parse_and_clamp() -> None:
+    assert onnx_session_options({}) == OnnxSessionOptions()
+    options = onnx_session_options(
+        {
+            "onnx_intra_op_threads": "2",
+            "onnx_inter_op_threads": 9999,
+            "onnx_execution_mode": "PARALLEL",
+            "onnx_graph_optimization_level": "bogus",
+            "onnx_enable_cpu_mem_arena": False,
+            "onnx_cache_optimized_model": False,
+        }
+    )
+    assert options.intra_op_threads == 2
+    assert options.inter_op_threads == 256
+    assert options.execution_mode == "parallel"
+    assert options.graph_optimization_level == "all"
+    assert options.enable_cpu_mem_arena is False
+    assert options.enable_mem_pattern is True
+    assert options.cache_optimized_model is False
+
+    session_options = build_session_options(options)
+    assert session_options.intra_op_num_threads == 2
+    assert session_options.execution_mode == ort.ExecutionMode.ORT_PARALLEL
+    assert session_options.enable_cpu_mem_arena is False
+
+
+def test_optimized_model_is_cached_and_reused(tmp_path: Path) -> None:
+    model_path = _export_model(tmp_path / "model.onnx")
+    options = OnnxSessionOptions(graph_optimization_level="extended")
+    clips = np.random.default_rng(0).random((2, 3, 4, 8, 8), dtype=np.float32)
+
+    first, source = create_onnx_session(model_path, options, cache_dir=tmp_path)
+    assert source == "optimized"
+    cached_files = list((tmp_path / OPTIMIZED_MODEL_DIR).iterdir())
+    assert len(cached_files) == 1 and "-extended-" in cached_files[0].name
+
+    second, source = create_onnx_session(model_path, options, cache_dir=tmp_path)
+    assert source == "cached"
+    expected = first.run(None, {"clip": clips})[0]
+    np.testing.assert_allclose(second.run(None, {"clip": clips})[0], expected, rtol=1e-5, atol=1e-6)
+
+    # A different optimization level replaces the stale file instead of accumulating copies.
+    basic = OnnxSessionOptions(graph_optimization_level="basic")
+    _, source = create_onnx_session(model_path, basic, cache_dir=tmp_path)
+    assert source == "optimized"
+    assert [path.name for path in (tmp_path / OPTIMIZED_MODEL_DIR).iterdir()] != [cached_files[0].name]
+    assert len(list((tmp_path / OPTIMIZED_MODEL_DIR).iterdir())) == 1
+
+    _, source = create_onnx_session(model_path, OnnxSessionOptions(cache_optimized_model=False), cache_dir=tmp_path)
+    assert source == "model"
+
+
+def test_enable_all_graph_is_cached_at_extended_level(tmp_path: Path) -> None:
+    model_path = _export_model(tmp_path / "model.onnx")
+    options = OnnxSessionOptions()
+    assert options.graph_optimization_level == "all"
+    clips = np.random.default_rng(3).random((2, 3, 4, 8, 8), dtype=np.float32)
+    expected = create_onnx_session(model_path, OnnxSessionOptions(cache_optimized_model=False))[0].run(
+        None, {"clip": clips}
+    )[0]
+
+    first, source = create_onnx_session(model_path, options, cache_dir=tmp_path)
+    assert source == "optimized"
+    cached_files = list((tmp_path / OPTIMIZED_MODEL_DIR).iterdir())
+    assert len(cached_files) == 1 and "-extended-" in cached_files[0].name
+    # "extended" requests share the same host-independent file.
+    _, source = create_onnx_session(model_path, OnnxSessionOptions(graph_optimization_level="extended"), cache_dir=tmp_path)
+    assert source == "cached"
+
+    second, source = create_onnx_session(model_path, options, cache_dir=tmp_path)
+    assert source == "cached"
+    for session in (first, second):
+        np.testing.assert_allclose(session.run(None, {"clip": clips})[0], expected, rtol=1e-5, atol=1e-6)
+
+
+def test_onnx_runner_reads_session_settings_from_runtime_config(tmp_path: Path) -> None:
+    runner_cache.clear()
+    model_path = _export_model(tmp_path / "model.onnx")
+    (tmp_path / "runtime_config.json").write_text(
+        json.dumps({"onnx_intra_op_threads": 1, "onnx_cache_optimized_model": False}),
+        encoding="utf-8",
+    )
+
+    runner = _create_onnx_runner(model_path, artifact_root=tmp_path)
+    logits = runner(np.zeros((3, 3, 4, 8, 8), dtype=np.float32))
+    assert logits.shape == (3, 4)
+    assert not (tmp_path / OPTIMIZED_MODEL_DIR).exists()
+
+
+def test_changed_session_options_build_a_new_cached_runner(tmp_path: Path, monkeypatch) -> None:
+    runner_cache.clear()
+    model_path = _export_model(tmp_path / "model.onnx")
+    built: list[OnnxSessionOptions] = []
+
+    def counting_create(path, options, **kwargs):
+        built.append(options)
+        return create_onnx_session(path, options, **kwargs)
+
+    def write_config(config: dict) -> None:
+        # What upsert_runtime_assets does: rewrite runtime_config.json and drop the cached spec.
+        (tmp_path / "runtime_config.json").write_text(json.dumps(config), encoding="utf-8")
+        invalidate_runtime_spec(tmp_path)
+
+    monkeypatch.setattr(runtime_classifier, "create_onnx_session", counting_create)
+    write_config({"onnx_cache_optimized_model": False})
+    first = _get_model_runner(model_path, "onnx", artifact_root=tmp_path)
+    assert _get_model_runner(model_path, "onnx", artifact_root=tmp_path) is first
+    assert len(built) == 1 and first.clip_buffer(2, (3, 4, 8, 8)) is None
+
+    write_config({"onnx_cache_optimized_model": False, "onnx_io_binding": True, "onnx_intra_op_threads": 1})
+    second = _get_model_runner(model_path, "onnx", artifact_root=tmp_path)
+    assert second is not first and second.clip_buffer(2, (3, 4, 8, 8)) is not None
+    assert len(built) == 2 and built[1].intra_op_threads == 1
+    assert runner_cache.stats()["models"] == 1
+    runner_cache.clear()
+
+
+@pytest.mark.parametrize("ntchw", [False, True])
+def test_io_binding_reuses_buffers_and_matches_plain_run(tmp_path: Path, ntchw: bool) -> None:
+    model_path = _export_model(tmp_path / "model.onnx", ntchw=ntchw)
+    session, _ = create_onnx_session(model_path, OnnxSessionOptions(cache_optimized_model=False))
+    layout = "ntchw" if ntchw else "ncthw"
+    bound = OnnxIoBinding(session, layout=layout)
+    rng = np.random.default_rng(1)
+    previous = None
+
+    for _ in range(3):
+        clips = rng.random((2, 3, 4, 8, 8), dtype=np.float32)
+        feed = np.ascontiguousarray(clips.transpose(0, 2, 1, 3, 4)) if ntchw else clips
+        expected = session.run(None, {"clip": feed})[0]
+
+        buffer = bound.clip_buffer(2, (3, 4, 8, 8))
+        assert previous is None or buffer is previous
+        previous = buffer
+        buffer[...] = clips
+        np.testing.assert_allclose(bound(buffer), expected, rtol=1e-5, atol=1e-6)
+        # Arrays that are not the bound buffer are copied into it.
+        np.testing.assert_allclose(bound(clips.copy()), expected, rtol=1e-5, atol=1e-6)
+
+    first = bound(clips)
+    assert not np.shares_memory(first, bound(clips))
+
+
+def test_io_binding_pool_stays_bounded_across_threads(tmp_path: Path) -> None:
+    model_path = _export_model(tmp_path / "model.onnx")
+    session, _ = create_onnx_session(model_path, OnnxSessionOptions(cache_optimized_model=False))
+    one_set = 4 * 3 * 4 * 8 * 8 * 4
+    bound = OnnxIoBinding(session, layout="ncthw", max_bytes=3 * one_set)
+    clips = np.random.default_rng(4).random((4, 3, 4, 8, 8), dtype=np.float32)
+    expected = session.run(None, {"clip": clips})[0]
+    start = threading.Barrier(8)
+    failures: list[BaseException] = []
+
+    def work(seed: int) -> None:
+        start.wait()
+        try:
+            for step in range(20):
+                rows = 1 + (seed + step) % 4
+                if step % 2:
+                    buffer = bound.clip_buffer(rows, (3, 4, 8, 8))
+                    buffer[...] = clips[:rows]
+                    logits = bound(buffer)
+                else:
+                    logits = bound(clips[:rows])
+                np.testing.assert_allclose(logits, expected[:rows], rtol=1e-5, atol=1e-6)
+        except BaseException as exc:
+            failures.append(exc)
+
+    threads = [threading.Thread(target=work, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not failures
+    # Eight threads used up to eight sets per shape; only the byte cap's worth is kept.
+    assert 0 < bound.retained_bytes <= 3 * one_set
+
+
+def test_bound_runner_does_not_alias_chunked_outputs(tmp_path: Path) -> None:
+    runner_cache.clear()
+    model_path = _export_model(tmp_path / "model.onnx")
+    clips = np.random.default_rng(2).random((5, 3, 4, 8, 8), dtype=np.float32)
+    (tmp_path / "runtime_config.json").write_text(json.dumps({"onnx_cache_optimized_model": False}), encoding="utf-8")
+    expected = _create_onnx_runner(model_path, artifact_root=tmp_path)(clips).copy()
+
+    (tmp_path / "runtime_config.json").write_text(
+        json.dumps({"onnx_cache_optimized_model": False, "onnx_io_binding": True}),
+        encoding="utf-8",
+    )
+    runner = _create_onnx_runner(model_path, artifact_root=tmp_path)
+    runner.max_batch_size = 2
+    np.testing.assert_allclose(runner(clips), expected, rtol=1e-5, atol=1e-6)
+    assert runner.clip_buffer(3, (3, 4, 8, 8)) is None
+    assert runner.clip_buffer(2, (3, 4, 8, 8)).shape == (2, 3, 4, 8, 8)
+
+
+def test_serial_scan_assembles_full_batches_in_the_bound_input(tmp_path: Path, monkeypatch) -> None:
+    cv2 = pytest.importorskip("cv2")
+    runner_cache.clear()
+    video_path = tmp_path / "input.mp4"
+    writer = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*"mp4v"), 24.0, (32, 32))
+    for index in range(40):
+        frame = np.zeros((32, 32, 3), dtype=np.uint8)
+        frame[:, :, (index // 10) % 3] = 200
+        writer.write(frame)
+    writer.release()
+    _export_model(tmp_path / "model.onnx", dynamic_size=True)
+    (tmp_path / "labels.json").write_text(json.dumps(["a", "b", "c", "d"]), encoding="utf-8")
+    config = {
+        "num_frames": 4,
+        "input_size": 112,
+        "window_size_frames": 8,
+        "stride_frames": 4,
+        "inference_batch_size": 3,
+        "pipelined_inference": False,
+        "onnx_cache_optimized_model": False,
+    }
+    bindings: list[OnnxIoBinding] = []
+    calls: list[bool] = []
+
+    class _SpyBinding(OnnxIoBinding):
+        def __init__(self, *args, **kwargs) -> None:
+            super().__init__(*args, **kwargs)
+            bindings.append(self)
+
+        def __call__(self, clips):
+            calls.append(id(clips) in self._kept)
+            return super().__call__(clips)
+
+    monkeypatch.setattr(runtime_classifier, "OnnxIoBinding", _SpyBinding)
+    results = []
+    for io_binding in (False, True):
+        (tmp_path / "runtime_config.json").write_text(json.dumps({**config, "onnx_io_binding": io_binding}))
+        invalidate_runtime_spec(tmp_path)
+        results.append(
+            infer_gesture_labels_from_file(video_path=str(video_path), artifact_path=str(tmp_path), framework="onnx")
+        )
+
+    assert results[0] == results[1]
+    # Every full batch ran straight from the kept buffer; only a short tail batch is copied.
+    assert sum(calls) >= len(calls) - 1 >= 1
+    assert len(bindings) == 1 and not bindings[0]._kept
+    runner_cache.clear()
@@ -0,0 +1,37 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.providers.probabilities import argmax_rows, log_softmax_rows, softmax_rows, top_k_rows  # noqa: E402
+
+
+def _reference_softmax(row):
+    shifted = row - np.max(row)
+    exponent = np.exp(shifted)
+    return exponent / float(np.sum(exponent))
+
+
+def test_softmax_rows_matches_per_row_softmax_and_is_stable():
+    rng = np.random.default_rng(0)
+    logits = (rng.normal(size=(64, 30)) * 20.0).astype(np.float32)
+    logits[0] = 1e4
+
+    probabilities = softmax_rows(logits)
+
+    assert probabilities.dtype == np.float32
+    assert np.array_equal(probabilities[1:], np.stack([_reference_softmax(row) for row in logits[1:]]))
+    assert np.all(np.isfinite(probabilities))
+    assert probabilities.sum(axis=1) == pytest.approx(np.ones(64), abs=1e-5)
+    assert np.exp(log_softmax_rows(logits)) == pytest.approx(probabilities, abs=1e-6)
+
+
+def test_argmax_and_top_k_rows():
+    probabilities = np.asarray([[0.1, 0.6, 0.3], [0.5, 0.2, 0.3]], dtype=np.float32)
+
+    class_index, confidence = argmax_rows(probabilities)
+    indices, values = top_k_rows(probabilities, 2)
+
+    assert class_index.tolist() == [1, 0]
+    assert confidence.tolist() == pytest.approx([0.6, 0.5])
+    assert indices.tolist() == [[1, 2], [0, 2]]
+    assert values == pytest.approx(np.asarray([[0.6, 0.3], [0.5, 0.3]]))
@@ -0,0 +1,225 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.providers import result_cache, runtime_classifier
+from app.providers.result_cache import (
+    DiskResultStore,
+    LocalResultIndex,
+    RedisResultIndex,
+    ResultCache,
+    inference_cache_key,
+)
+from app.providers.segment_decoders import RuntimePrediction
+
+
+def _artifact(root: Path, config: dict | None = None) -> Path:
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "model.onnx").write_bytes(b"fake")
+    (root / "labels.json").write_text(json.dumps(["hello", "thanks"]), encoding="utf-8")
+    (root / "runtime_config.json").write_text(json.dumps(config or {"num_frames": 8}), encoding="utf-8")
+    return root
+
+
+def _predictions(label: str) -> list[RuntimePrediction]:
+    return [RuntimePrediction(label=label, confidence=0.9, start_sec=0.0, end_sec=1.25)]
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, int] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+    def get(self, name):
+        return self.values.get(name)
+
+    def set(self, name, value):
+        self.values[name] = int(value)
+
+    def incrby(self, name, amount):
+        self.values[name] = self.values.get(name, 0) + int(amount)
+
+    def decrby(self, name, amount):
+        self.incrby(name, -int(amount))
+
+    def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = str(value)
+
+    def hdel(self, name, key):
+        return int(self.hashes.get(name, {}).pop(key, None) is not None)
+
+    def zadd(self, name, mapping, xx=False):
+        zset = self.zsets.setdefault(name, {})
+        for key, score in mapping.items():
+            if not xx or key in zset:
+                zset[key] = score
+
+    def zrem(self, name, key):
+        return int(self.zsets.get(name, {}).pop(key, None) is not None)
+
+    def zrange(self, name, start, end):
+        ordered = sorted(self.zsets.get(name, {}).items(), key=lambda item: item[1])
+        return [key for key, _ in ordered[start : end + 1]]
+
+
+class _FakePipeline:
+    def __init__(self, client: _FakeRedis) -> None:
+        self.client = client
+        self.calls: list = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+def test_cache_key_tracks_effective_spec_model_and_video(tmp_path):
+    root = _artifact(tmp_path / "artifact")
+    base = inference_cache_key(video_id="etag:abc:10", artifact_path=str(root), framework="onnx")
+
+    assert inference_cache_key(video_id="etag:abc:10", artifact_path=str(root), framework="onnx") == base
+    # Keys the runtime ignores, or values clamped to the same effective setting, share an entry.
+    for overrides in ({"unused_note": "x"}, {"num_frames": 8}):
+        key = inference_cache_key(
+            video_id="etag:abc:10",
+            artifact_path=str(root),
+            framework="onnx",
+            runtime_config_overrides=overrides,
+        )
+        assert key == base
+    changed = [
+        inference_cache_key(video_id="etag:def:10", artifact_path=str(root), framework="onnx"),
+        inference_cache_key(video_id="etag:abc:10", artifact_path=str(root), framework="onnx", model_version_id="m2"),
+        inference_cache_key(video_id="etag:abc:10", artifact_path=str(root), framework="onnx", top_k_override=1),
+        inference_cache_key(
+            video_id="etag:abc:10",
+            artifact_path=str(root),
+            framework="onnx",
+            runtime_config_overrides={"stride_frames": 4},
+        ),
+    ]
+    assert base not in changed and len(set(changed)) == len(changed)
+
+
+@pytest.mark.parametrize("index_kind", ["local", "redis"])
+def test_result_cache_round_trip_and_lru_eviction_by_bytes(tmp_path, index_kind):
+    store = DiskResultStore(tmp_path / "cache")
+    index = LocalResultIndex(store) if index_kind == "local" else RedisResultIndex(_FakeRedis(), prefix="test")
+    probe = ResultCache(store=store, index=index, max_bytes=10_000)
+    probe.put("aa" * 32, _predictions("x"))
+    entry_bytes = store.path("aa" * 32).stat().st_size
+    store.delete("aa" * 32)
+    index.discard("aa" * 32)
+
+    cache = ResultCache(store=store, index=index, max_bytes=entry_bytes * 2 + 64)
+    keys = [f"{ordinal:02d}" * 32 for ordinal in range(3)]
+    assert cache.get(keys[0]) is None
+    cache.put(keys[0], _predictions("a"))
+    cache.put(keys[1], _predictions("b"))
+    assert cache.get(keys[0]).predictions == _predictions("a")
+    cache.put(keys[2], _predictions("c"), windows_object_key="jobs/c/runtime/windows.npz")
+
+    # keys[1] was least recently used, so it makes room for keys[2].
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]).predictions == _predictions("a")
+    assert cache.get(keys[2]).predictions == _predictions("c")
+    assert cache.get(keys[2]).windows_object_key == "jobs/c/runtime/windows.npz"
+    assert sorted(path.stem for path in store.root.glob("*/*.json")) == sorted([keys[0], keys[2]])
+
+
+def test_local_index_is_rebuilt_from_disk(tmp_path):
+    store = DiskResultStore(tmp_path / "cache")
+    ResultCache(store=store, index=LocalResultIndex(store), max_bytes=10_000).put("ab" * 32, _predictions("a"))
+
+    index = LocalResultIndex(store)
+    assert index.total_bytes == store.path("ab" * 32).stat().st_size
+    assert ResultCache(store=store, index=index, max_bytes=10_000).get("ab" * 32).predictions == _predictions("a")
+
+    store.path("ab" * 32).write_text("{not json", encoding="utf-8")
+    assert ResultCache(store=store, index=index, max_bytes=10_000).get("ab" * 32) is None
+
+
+@pytest.mark.parametrize("etag", ["etag:abc:4", None])
+def test_infer_gesture_labels_short_circuits_on_cache_hit(tmp_path, monkeypatch, etag):
+    root = _artifact(tmp_path / "artifact")
+    downloads: list[str] = []
+    inferences: list[str] = []
+
+    def fake_download(object_key: str, destination_path: str) -> None:
+        downloads.append(object_key)
+        Path(destination_path).write_bytes(b"same-video-bytes")
+
+    def fake_infer(**kwargs):
+        inferences.append(kwargs["video_path"])
+        return _predictions("hello")
+
+    monkeypatch.setattr(runtime_classifier, "object_etag", lambda _key: etag)
+    monkeypatch.setattr(runtime_classifier, "download_object_file", fake_download)
+    monkeypatch.setattr(runtime_classifier, "infer_gesture_labels_from_file", fake_infer)
+    monkeypatch.setattr(settings, "result_cache_enabled", True)
+    monkeypatch.setattr(settings, "result_cache_dir", str(tmp_path / "results"))
+    monkeypatch.setattr(settings, "result_cache_index", "local")
+    result_cache.reset_result_cache()
+    try:
+        for object_key in ("sessions/a/uploads/v.mp4", "sessions/b/uploads/v.mp4"):
+            predictions = runtime_classifier.infer_gesture_labels(
+                video_object_key=object_key,
+                artifact_path=str(root),
+                framework="onnx",
+                model_version_id="model-1",
+            )
+            assert predictions == _predictions("hello")
+    finally:
+        result_cache.reset_result_cache()
+
+    assert len(inferences) == 1
+    # With an ETag the hit needs no download; without one the content hash still matches.
+    assert len(downloads) == (1 if etag else 2)
+
+
+@pytest.mark.parametrize("copy_succeeds", [True, False])
+def test_cache_hit_copies_window_store_of_the_producing_job(tmp_path, monkeypatch, copy_succeeds):
+    root = _artifact(tmp_path / "artifact")
+    inferred: list[str] = []
+    copies: list[tuple[str, str]] = []
+
+    def fake_store(**kwargs):
+        inferred.append(kwargs["window_store_key"])
+        return _predictions("hello"), True
+
+    def fake_copy(source_key: str, destination_key: str) -> bool:
+        copies.append((source_key, destination_key))
+        return copy_succeeds
+
+    monkeypatch.setattr(runtime_classifier, "object_etag", lambda _key: "etag:abc:4")
+    monkeypatch.setattr(runtime_classifier, "download_object_file", lambda _key, path: Path(path).write_bytes(b"v"))
+    monkeypatch.setattr(runtime_classifier, "_infer_and_store_windows", fake_store)
+    monkeypatch.setattr(runtime_classifier, "copy_object", fake_copy)
+    monkeypatch.setattr(settings, "result_cache_enabled", True)
+    monkeypatch.setattr(settings, "result_cache_dir", str(tmp_path / "results"))
+    monkeypatch.setattr(settings, "result_cache_index", "local")
+    result_cache.reset_result_cache()
+    try:
+        for job_id in ("job-1", "job-2"):
+            runtime_classifier.infer_gesture_labels(
+                video_object_key="sessions/a/uploads/v.mp4",
+                artifact_path=str(root),
+                framework="onnx",
+                window_store_key=f"jobs/{job_id}/runtime/windows.npz",
+            )
+    finally:
+        result_cache.reset_result_cache()
+
+    assert copies == [("jobs/job-1/runtime/windows.npz", "jobs/job-2/runtime/windows.npz")]
+    expected = ["jobs/job-1/runtime/windows.npz"] + ([] if copy_succeeds else ["jobs/job-2/runtime/windows.npz"])
+    assert inferred == expected
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+import pytest
+
+from app.providers.runner_cache import ModelRunnerCache
+
+
+def _model_file(tmp_path, name: str, size: int = 16):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return path
+
+
+def test_runner_cache_reuses_loaded_runner(tmp_path):
+    cache = ModelRunnerCache(max_models=2, max_bytes=0)
+    model_path = _model_file(tmp_path, "model.onnx")
+    loads: list[str] = []
+
+    def loader():
+        loads.append("load")
+        return object()
+
+    first = cache.get_or_load(model_path, "onnx", loader)
+    second = cache.get_or_load(model_path, "onnx", loader)
+    assert first is second
+    assert loads == ["load"]
+
+
+def test_runner_cache_evicts_least_recently_used_by_count(tmp_path):
+    cache = ModelRunnerCache(max_models=2, max_bytes=0)
+    paths = [_model_file(tmp_path, f"model-{idx}.onnx") for idx in range(3)]
+    runners = [cache.get_or_load(path, "onnx", object) for path in paths[:2]]
+    cache.get_or_load(paths[0], "onnx", object)
+    cache.get_or_load(paths[2], "onnx", object)
+
+    assert cache.stats()["models"] == 2
+    assert cache.get_or_load(paths[0], "onnx", object) is runners[0]
+    assert cache.get_or_load(paths[1], "onnx", object) is not runners[1]
+
+
+def test_runner_cache_evicts_by_memory_budget_but_keeps_newest(tmp_path):
+    cache = ModelRunnerCache(max_models=10, max_bytes=100)
+    small = _model_file(tmp_path, "small.pt", size=60)
+    large = _model_file(tmp_path, "large.pt", size=150)
+    cache.get_or_load(small, "torchscript", object)
+    runner = cache.get_or_load(large, "torch", object)
+
+    stats = cache.stats()
+    assert stats["models"] == 1
+    assert stats["bytes"] == 150
+    assert cache.get_or_load(large, "torchscript", object) is runner
+
+
+def test_runner_cache_reloads_when_model_file_changes(tmp_path):
+    cache = ModelRunnerCache(max_models=2, max_bytes=0)
+    model_path = _model_file(tmp_path, "model.onnx")
+    first = cache.get_or_load(model_path, "onnx", object)
+
+    model_path.write_bytes(b"y" * 32)
+    stat = model_path.stat()
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = cache.get_or_load(model_path, "onnx", object)
+    assert second is not first
+    assert cache.stats()["models"] == 1
+
+
+def test_runner_cache_single_flight_loading(tmp_path):
+    cache = ModelRunnerCache(max_models=2, max_bytes=0)
+    model_path = _model_file(tmp_path, "model.onnx")
+    load_count = 0
+    count_lock = threading.Lock()
+
+    def slow_loader():
+        nonlocal load_count
+        with count_lock:
+            load_count += 1
+        time.sleep(0.1)
+        return object()
+
+    results: list[object] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load(model_path, "onnx", slow_loader)))
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert load_count == 1
+    assert len(results) == 6
+    assert all(item is results[0] for item in results)
+
+
+def test_runner_cache_propagates_load_errors_and_retries(tmp_path):
+    cache = ModelRunnerCache(max_models=2, max_bytes=0)
+    model_path = _model_file(tmp_path, "model.onnx")
+
+    def failing_loader():
+        raise RuntimeError("onnx_input_not_found")
+
+    with pytest.raises(RuntimeError, match="onnx_input_not_found"):
+        cache.get_or_load(model_path, "onnx", failing_loader)
+
+    runner = cache.get_or_load(model_path, "onnx", object)
+    assert cache.get_or_load(model_path, "onnx", object) is runner
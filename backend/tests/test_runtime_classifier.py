@@ -0,0 +1,738 @@
+import json
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+torch = pytest.importorskip("torch")
+
+from app.config import settings  # noqa: E402
+from app.providers import frame_store, runtime_classifier, shard_pool  # noqa: E402
+from app.providers.runner_cache import runner_cache  # noqa: E402
+from app.providers.input_layout import LAYOUT_MANIFEST_NAME  # noqa: E402
+from app.providers.window_batch import WindowBatch  # noqa: E402
+from app.providers.runtime_classifier import (  # noqa: E402
+    InferenceReport,
+    ModelRunner,
+    collect_window_batch,
+    decode_window_batch,
+    ensure_input_layout_manifest,
+    infer_gesture_labels_from_file,
+    iter_gesture_labels_from_file,
+    iter_window_predictions,
+)
+
+NUM_CLASSES = 4
+
+
+class _TinyClassifier(torch.nn.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        self.fc = torch.nn.Linear(3, NUM_CLASSES)
+        with torch.no_grad():
+            self.fc.weight.copy_(torch.tensor([[4.0, 0.0, 0.0], [0.0, 4.0, 0.0], [0.0, 0.0, 4.0], [-2.0, -2.0, -2.0]]))
+            self.fc.bias.zero_()
+
+    def forward(self, clip):
+        return self.fc(clip.mean(dim=(2, 3, 4)))
+
+
+class _FixedBatchClassifier(_TinyClassifier):
+    def forward(self, clip):
+        if clip.shape[0] != 1:
+            raise RuntimeError("fixed batch dimension")
+        return self.fc(clip.mean(dim=(2, 3, 4)))
+
+
+class _NtchwClassifier(_TinyClassifier):
+    def forward(self, clip):
+        if clip.shape[2] != 3:
+            raise RuntimeError("expected [N, T, C, H, W]")
+        return self.fc(clip.mean(dim=(1, 3, 4)))
+
+
+def _write_video(
+    path: Path,
+    *,
+    frames: int = 48,
+    fps: float = 24.0,
+    size: tuple[int, int] = (128, 96),
+    still_frames: int = 0,
+    span_frames: int = 16,
+) -> Path:
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    width, height = size
+    still = np.zeros((height, width, 3), dtype=np.uint8)
+    still[:, :, 0] = 120
+    for _ in range(still_frames):
+        writer.write(still)
+    for index in range(frames):
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        # Cycle dominant BGR channel every span_frames frames so windows disagree on the class.
+        frame[:, :, (index // span_frames) % 3] = 200
+        cv2.rectangle(frame, (index % width, 10), ((index % width) + 12, 40), (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def _artifact_dir(tmp_path: Path, module: torch.nn.Module, runtime_config: dict | None = None) -> Path:
+    root = tmp_path / "artifact"
+    root.mkdir(parents=True, exist_ok=True)
+    torch.jit.script(module.eval()).save(str(root / "model.pt"))
+    (root / "labels.json").write_text(json.dumps(["red", "green", "blue", "idle"]), encoding="utf-8")
+    config = {"num_frames": 8, "window_size_frames": 16, "stride_frames": 4, "input_size": 112}
+    config.update(runtime_config or {})
+    (root / "runtime_config.json").write_text(json.dumps(config), encoding="utf-8")
+    return root
+
+
+@pytest.fixture(autouse=True)
+def _clear_runner_cache():
+    runner_cache.clear()
+    yield
+    runner_cache.clear()
+
+
+def test_model_runner_splits_batches_above_max_batch_size():
+    calls: list[int] = []
+
+    def run(clips):
+        calls.append(int(clips.shape[0]))
+        return np.zeros((clips.shape[0], NUM_CLASSES), dtype=np.float32)
+
+    runner = ModelRunner(run, max_batch_size=2)
+    logits = runner(np.zeros((5, 3, 4, 8, 8), dtype=np.float32))
+    assert logits.shape == (5, NUM_CLASSES)
+    assert calls == [2, 2, 1]
+
+
+def test_batched_inference_matches_single_window_inference(tmp_path):
+    video_path = _write_video(tmp_path / "input.mp4")
+    root = _artifact_dir(tmp_path, _TinyClassifier())
+
+    batched = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+        runtime_config_overrides={"inference_batch_size": 8},
+    )
+    runner_cache.clear()
+    single = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+        runtime_config_overrides={"inference_batch_size": 1},
+    )
+
+    assert batched
+    assert [item.label for item in batched] == [item.label for item in single]
+    for left, right in zip(batched, single, strict=True):
+        assert left.confidence == pytest.approx(right.confidence, abs=1e-4)
+        assert left.start_sec == right.start_sec
+        assert left.end_sec == right.end_sec
+
+
+def test_fixed_batch_model_falls_back_to_batch_size_one(tmp_path, monkeypatch):
+    video_path = _write_video(tmp_path / "input.mp4")
+    root = _artifact_dir(tmp_path, _FixedBatchClassifier(), {"inference_batch_size": 4})
+    created: list[ModelRunner] = []
+    original = runtime_classifier._create_model_runner
+
+    def tracking_create(model_path, framework, artifact_root=None):
+        runner = original(model_path=model_path, framework=framework, artifact_root=artifact_root)
+        created.append(runner)
+        return runner
+
+    monkeypatch.setattr(runtime_classifier, "_create_model_runner", tracking_create)
+    predictions = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+    )
+
+    assert predictions
+    assert len(created) == 1
+    assert created[0].max_batch_size == 1
+
+
+def test_transient_batch_error_does_not_pin_batch_size():
+    calls: list[int] = []
+
+    def flaky(clips):
+        calls.append(int(clips.shape[0]))
+        if len(calls) == 1:
+            raise RuntimeError("onnxruntime: out of memory")
+        return np.zeros((clips.shape[0], 2), dtype=np.float32)
+
+    runner = ModelRunner(flaky)
+    clips = np.zeros((4, 3, 2, 8, 8), dtype=np.float32)
+    with pytest.raises(RuntimeError, match="out of memory"):
+        runner(clips)
+    assert runner.max_batch_size is None
+    assert runner(clips).shape == (4, 2)
+    assert calls == [4, 4]
+
+
+def test_batch_shape_error_downgrade_is_logged(caplog):
+    def fixed_batch(clips):
+        if clips.shape[0] != 1:
+            raise RuntimeError("fixed batch dimension")
+        return np.ones((1, 2), dtype=np.float32)
+
+    runner = ModelRunner(fixed_batch)
+    with caplog.at_level("WARNING", logger=runtime_classifier.__name__):
+        assert runner(np.zeros((3, 3, 2, 8, 8), dtype=np.float32)).shape == (3, 2)
+    assert runner.max_batch_size == 1
+    assert any("falling back to batch size 1" in record.message for record in caplog.records)
+
+
+def test_sequential_decode_matches_seek_decode_on_real_video(tmp_path):
+    video_path = _write_video(tmp_path / "input.mp4", frames=60)
+    root = _artifact_dir(tmp_path, _TinyClassifier())
+
+    results = {}
+    for mode in ("sequential", "seek"):
+        results[mode] = infer_gesture_labels_from_file(
+            video_path=str(video_path),
+            artifact_path=str(root),
+            framework="torchscript",
+            runtime_config_overrides={"frame_decode_mode": mode},
+        )
+
+    assert results["sequential"]
+    assert [item.label for item in results["sequential"]] == [item.label for item in results["seek"]]
+    for left, right in zip(results["sequential"], results["seek"], strict=True):
+        assert left.confidence == pytest.approx(right.confidence, abs=1e-4)
+
+
+def test_target_fps_resamples_high_fps_source_to_model_timeline(tmp_path):
+    base_path = _write_video(tmp_path / "base.mp4", frames=72)
+    # Every frame written twice at twice the rate: same content on a 48 fps timeline.
+    fast_path = tmp_path / "fast.mp4"
+    capture = cv2.VideoCapture(str(base_path))
+    writer = cv2.VideoWriter(str(fast_path), cv2.VideoWriter_fourcc(*"mp4v"), 48.0, (128, 96))
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        writer.write(frame)
+        writer.write(frame)
+    writer.release()
+    capture.release()
+    root = _artifact_dir(tmp_path, _TinyClassifier())
+
+    def run(path: Path, overrides: dict) -> tuple[list, InferenceReport]:
+        report = InferenceReport()
+        predictions = infer_gesture_labels_from_file(
+            video_path=str(path),
+            artifact_path=str(root),
+            framework="torchscript",
+            runtime_config_overrides={"frame_decode_mode": "sequential", **overrides},
+            report=report,
+        )
+        return predictions, report
+
+    base, base_report = run(base_path, {})
+    fast, fast_report = run(fast_path, {"target_fps": 24})
+    assert base
+    assert [item.label for item in fast] == [item.label for item in base]
+    for left, right in zip(fast, base, strict=True):
+        assert left.start_sec == pytest.approx(right.start_sec, abs=0.05)
+        assert left.end_sec == pytest.approx(right.end_sec, abs=0.05)
+    assert fast_report.windows == base_report.windows
+    assert fast_report.frames_retrieved == base_report.frames_retrieved
+    assert fast_report.frames_grabbed > fast_report.frames_retrieved
+
+    _, native_report = run(fast_path, {})
+    assert native_report.windows > fast_report.windows
+
+
+def test_preprocessed_frame_cache_reuses_frames_without_changing_output(tmp_path):
+    video_path = _write_video(tmp_path / "input.mp4", frames=60)
+    root = _artifact_dir(tmp_path, _TinyClassifier(), {"align_sampling_to_stride": True})
+
+    cached_report = InferenceReport()
+    cached = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+        report=cached_report,
+    )
+    uncached_report = InferenceReport()
+    uncached = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+        runtime_config_overrides={"preprocessed_frame_cache_mb": 0},
+        report=uncached_report,
+    )
+
+    assert cached == uncached
+    assert cached_report.frame_cache_reuse_ratio > 0.5
+    assert cached_report.frame_cache_peak_bytes > 0
+    assert uncached_report.frame_cache_hits == 0
+
+
+@pytest.mark.parametrize("decode_mode", ["sequential", "seek"])
+def test_frame_store_matches_direct_decode_and_is_reused(tmp_path, monkeypatch, decode_mode):
+    video_path = _write_video(tmp_path / "input.mp4", frames=60)
+    root = _artifact_dir(tmp_path, _TinyClassifier())
+
+    def run(use_frame_store: bool = True) -> list:
+        return infer_gesture_labels_from_file(
+            video_path=str(video_path),
+            artifact_path=str(root),
+            framework="torchscript",
+            runtime_config_overrides={"frame_decode_mode": decode_mode},
+            use_frame_store=use_frame_store,
+        )
+
+    direct = run()
+    monkeypatch.setattr(settings, "frame_store_enabled", True)
+    monkeypatch.setattr(settings, "frame_store_dir", str(tmp_path / "frames"))
+    frame_store.reset_frame_store()
+    try:
+        # The live path (no use_frame_store) decodes directly and leaves the store alone.
+        assert run(use_frame_store=False) == direct
+        assert not list((tmp_path / "frames").glob("*.npy"))
+        assert run() == direct
+        stores = list((tmp_path / "frames").glob("*.npy"))
+        assert len(stores) == 1
+        built_at = stores[0].stat().st_mtime_ns
+
+        monkeypatch.setattr(
+            frame_store.FrameStore,
+            "_build",
+            lambda *_args, **_kwargs: pytest.fail("frame store rebuilt on a hit"),
+        )
+        assert run() == direct
+        assert stores[0].stat().st_mtime_ns >= built_at
+    finally:
+        frame_store.reset_frame_store()
+
+
+def test_frame_store_evicts_least_recently_opened_and_skips_oversized(tmp_path):
+    videos = [_write_video(tmp_path / f"v{ordinal}.mp4", frames=24, span_frames=8 + ordinal) for ordinal in range(3)]
+    store_bytes = 24 * 32 * 32 * 3
+    store = frame_store.FrameStore(tmp_path / "frames", max_bytes=store_bytes * 2 + 1024)
+
+    first = store.open(videos[0], input_size=32)
+    assert first is not None and first.get(cv2.CAP_PROP_FRAME_COUNT) == 24
+    ok, frame = first.read()
+    assert ok and frame.shape == (32, 32, 3)
+    store.open(videos[1], input_size=32)
+    store.open(videos[0], input_size=32)
+    store.open(videos[2], input_size=32)
+
+    remaining = sorted(path.name for path in (tmp_path / "frames").glob("*.npy"))
+    expected = sorted(f"{frame_store.file_sha256(videos[i])}-32.npy" for i in (0, 2))
+    assert remaining == expected
+    assert frame_store.FrameStore(tmp_path / "small", max_bytes=store_bytes - 1).open(videos[0], input_size=32) is None
+
+
+def test_infer_gesture_labels_records_stage_metrics_per_model_version(tmp_path, monkeypatch):
+    video_path = _write_video(tmp_path / "input.mp4", frames=48)
+    root = _artifact_dir(tmp_path, _TinyClassifier())
+    monkeypatch.setattr(
+        runtime_classifier,
+        "download_object_file",
+        lambda _key, destination: Path(destination).write_bytes(video_path.read_bytes()),
+    )
+    labels = {"model_version": "metrics-model", "framework": "torchscript"}
+
+    def sample(name: str, **extra):
+        return REGISTRY.get_sample_value(name, {**labels, **extra}) or 0.0
+
+    before_frames = sample("signflow_runtime_frames_decoded_total")
+    before_windows = sample("signflow_runtime_windows_inferred_total")
+    report = InferenceReport()
+    predictions = runtime_classifier.infer_gesture_labels(
+        video_object_key="sessions/a/uploads/v.mp4",
+        artifact_path=str(root),
+        framework="torch",
+        model_version_id="metrics-model",
+        report=report,
+    )
+
+    assert predictions
+    for stage in ("download", "decode", "preprocess", "inference", "segment_decode"):
+        assert sample("signflow_runtime_stage_seconds_count", stage=stage) >= 1
+    assert sample("signflow_runtime_stage_seconds_sum", stage="inference") >= report.inference_sec > 0
+    assert sample("signflow_runtime_frames_decoded_total") - before_frames == report.frames_grabbed > 0
+    assert sample("signflow_runtime_windows_inferred_total") - before_windows == report.windows > 0
+
+
+
+def test_live_file_inference_records_stage_metrics(tmp_path):
+    video_path = _write_video(tmp_path / "input.mp4", frames=48)
+    root = _artifact_dir(tmp_path, _TinyClassifier())
+    labels = {"model_version": "live-model", "framework": "torchscript"}
+
+    def sample(name: str, **extra):
+        return REGISTRY.get_sample_value(name, {**labels, **extra}) or 0.0
+
+    before = {stage: sample("signflow_runtime_stage_seconds_count", stage=stage) for stage in ("decode", "inference")}
+    before_windows = sample("signflow_runtime_windows_inferred_total")
+    report = InferenceReport()
+    predictions = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torch",
+        report=report,
+        model_version_id="live-model",
+    )
+
+    assert predictions
+    for stage, count in before.items():
+        assert sample("signflow_runtime_stage_seconds_count", stage=stage) == count + 1
+    assert sample("signflow_runtime_windows_inferred_total") - before_windows == report.windows > 0
+
+
+@pytest.fixture(scope="module")
+def _shard_pool_teardown():
+    yield
+    shard_pool.shutdown_shard_pool()
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"frame_decode_mode": "sequential"},
+        {"frame_decode_mode": "seek", "inference_batch_size": 3},
+        {"scan_mode": "adaptive", "adaptive_stride_factor": 2},
+    ],
+)
+def test_sharded_inference_matches_single_process(tmp_path, monkeypatch, _shard_pool_teardown, overrides):
+    video_path = _write_video(tmp_path / "input.mp4", frames=120)
+    root = _artifact_dir(tmp_path, _TinyClassifier(), {"shard_seconds": 1.0})
+
+    def run() -> tuple[list, InferenceReport, WindowBatch]:
+        report = InferenceReport()
+        predictions = infer_gesture_labels_from_file(
+            video_path=str(video_path),
+            artifact_path=str(root),
+            framework="torchscript",
+            runtime_config_overrides=overrides,
+            report=report,
+        )
+        batch, _ = collect_window_batch(
+            video_path=str(video_path),
+            artifact_path=str(root),
+            framework="torchscript",
+            runtime_config_overrides=overrides,
+        )
+        return predictions, report, batch
+
+    single, single_report, single_batch = run()
+    monkeypatch.setattr(settings, "runtime_shard_workers", 2)
+    sharded, sharded_report, sharded_batch = run()
+
+    assert single and sharded == single
+    assert sharded_report.shards > 1 and single_report.shards == 0
+    assert sharded_report.windows == single_report.windows
+    for left, right in zip(sharded_batch.arrays(), single_batch.arrays(), strict=True):
+        np.testing.assert_array_equal(np.asarray(left), np.asarray(right))
+
+
+
+def test_shard_workers_split_cores_and_export_run_metrics(tmp_path, monkeypatch, _shard_pool_teardown):
+    video_path = _write_video(tmp_path / "input.mp4", frames=120, still_frames=24)
+    root = _artifact_dir(tmp_path, _TinyClassifier(), {"shard_seconds": 1.0})
+    monkeypatch.setattr(settings, "runtime_shard_workers", 2)
+    pool = shard_pool.get_shard_pool(2)
+    assert pool.submit(shard_pool.worker_thread_limit).result() == shard_pool.threads_per_worker(2)
+    assert shard_pool.worker_thread_limit() == 0
+
+    def count(name: str, **labels) -> float:
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    before_queue = count("signflow_runtime_pipeline_queue_max_depth_count")
+    before_gate = count("signflow_runtime_skipped_window_ratio_count")
+    report = InferenceReport()
+    infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+        runtime_config_overrides={"pipelined_inference": True, "motion_gate_enabled": True},
+        report=report,
+    )
+
+    # Workers record into their own registries; the parent observes one run per shard.
+    assert report.shards > 1 and report.windows_gated == report.windows
+    assert count("signflow_runtime_pipeline_queue_max_depth_count") - before_queue == report.shards
+    assert count("signflow_runtime_skipped_window_ratio_count") - before_gate == report.shards
+
+def test_windows_per_shard_aligns_to_batches():
+    assert shard_pool.windows_per_shard(shard_seconds=1.0, fps=24.0, stride_frames=4, frame_step=1.0, batch_size=4) == 8
+    assert shard_pool.windows_per_shard(shard_seconds=0.01, fps=24.0, stride_frames=4, frame_step=2.0, batch_size=3) == 3
+    assert shard_pool.shard_ranges(10, shard_size=4) == [(0, 4), (4, 8), (8, 10)]
+
+
+def test_pipelined_inference_matches_serial_inference(tmp_path):
+    video_path = _write_video(tmp_path / "input.mp4", frames=72)
+    root = _artifact_dir(tmp_path, _TinyClassifier(), {"inference_batch_size": 2})
+
+    serial = infer_gesture_labels_from_file(video_path=str(video_path), artifact_path=str(root), framework="torchscript")
+    report = InferenceReport()
+    pipelined = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+        runtime_config_overrides={"pipelined_inference": True, "pipeline_queue_depth": 2, "preprocess_workers": 2},
+        report=report,
+    )
+
+    assert serial
+    assert pipelined == serial
+    assert report.pipelined is True
+    assert report.windows > 0
+    assert 0 <= report.pipeline_queue_max_depth <= 2
+    assert report.decode_sec > 0.0
+    assert report.inference_sec > 0.0
+
+
+def test_streaming_predictions_match_batch_predictions(tmp_path):
+    video_path = _write_video(tmp_path / "input.mp4", frames=72)
+    root = _artifact_dir(tmp_path, _TinyClassifier())
+
+    batch = infer_gesture_labels_from_file(video_path=str(video_path), artifact_path=str(root), framework="torchscript")
+    streamed = list(iter_gesture_labels_from_file(video_path=str(video_path), artifact_path=str(root), framework="torchscript"))
+
+    assert batch
+    assert streamed == batch
+
+
+def test_window_batch_decoding_matches_streaming_decoding(tmp_path):
+    video_path = _write_video(tmp_path / "input.mp4", frames=72)
+    root = _artifact_dir(tmp_path, _TinyClassifier(), {"window_store_dtype": "float16", "window_store_top_k": 2})
+
+    streamed = infer_gesture_labels_from_file(video_path=str(video_path), artifact_path=str(root), framework="torchscript")
+    batch, metadata = collect_window_batch(video_path=str(video_path), artifact_path=str(root), framework="torchscript")
+
+    assert batch.sparse
+    assert len(batch) == len(list(iter_window_predictions(str(video_path), str(root), "torchscript")))
+    assert decode_window_batch(batch, artifact_path=str(root), duration_sec=metadata.duration_sec) == streamed
+
+
+def test_window_store_is_persisted_and_redecodes_without_the_model(tmp_path, monkeypatch):
+    video_path = _write_video(tmp_path / "input.mp4", frames=72)
+    root = _artifact_dir(tmp_path, _TinyClassifier())
+    uploads: dict[str, bytes] = {}
+
+    def fake_download(_object_key: str, destination_path: str) -> None:
+        Path(destination_path).write_bytes(video_path.read_bytes())
+
+    def fake_upload(object_key: str, source_path: str) -> None:
+        uploads[object_key] = Path(source_path).read_bytes()
+
+    monkeypatch.setattr(runtime_classifier, "object_etag", lambda _key: None)
+    monkeypatch.setattr(runtime_classifier, "download_object_file", fake_download)
+    monkeypatch.setattr(runtime_classifier, "upload_object_file", fake_upload)
+
+    streamed = infer_gesture_labels_from_file(video_path=str(video_path), artifact_path=str(root), framework="torchscript")
+    stored = runtime_classifier.infer_gesture_labels(
+        video_object_key="sessions/s/uploads/input.mp4",
+        artifact_path=str(root),
+        framework="torchscript",
+        window_store_key="jobs/j/runtime/windows.npz",
+    )
+    assert stored == streamed
+
+    store_path = tmp_path / "windows.npz"
+    store_path.write_bytes(uploads["jobs/j/runtime/windows.npz"])
+    batch, duration_sec = WindowBatch.load(store_path, with_probabilities=False)
+    full, _ = WindowBatch.load(store_path)
+    assert full.dtype == "float16" and full.num_classes == NUM_CLASSES
+
+    def redecode(overrides):
+        return decode_window_batch(
+            batch,
+            artifact_path=str(root),
+            duration_sec=duration_sec,
+            runtime_config_overrides=overrides,
+        )
+
+    # Re-decoding with unchanged settings reproduces the job; stricter settings change it.
+    assert redecode(None) == streamed
+    assert len(redecode({"realtime_min_duration_sec": 10.0})) <= 3
+    assert redecode({"realtime_min_duration_sec": 10.0}) != streamed
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_motion_gate_skips_still_span_as_blank_windows(tmp_path, pipelined):
+    video_path = _write_video(tmp_path / "input.mp4", frames=48, still_frames=48)
+    root = _artifact_dir(
+        tmp_path,
+        _TinyClassifier(),
+        {"inference_batch_size": 3, "motion_gate_threshold": 1.0, "pipelined_inference": pipelined},
+    )
+
+    ungated = list(iter_window_predictions(str(video_path), str(root), "torchscript"))
+    report = InferenceReport()
+    gated = list(
+        iter_window_predictions(
+            str(video_path),
+            str(root),
+            "torchscript",
+            runtime_config_overrides={"motion_gate_enabled": True},
+            report=report,
+        )
+    )
+
+    assert [window.start_sec for window in gated] == [window.start_sec for window in ungated]
+    skipped = [window for window in gated if window.class_index == -1]
+    assert skipped and all(window.end_sec <= 2.0 + 1e-6 and window.confidence == 0.0 for window in skipped)
+    assert report.windows_skipped == len(skipped) < len(gated)
+    assert report.skipped_window_ratio == round(len(skipped) / len(gated), 4)
+    for left, right in zip(gated, ungated, strict=True):
+        if left.class_index != -1:
+            assert left.class_index == right.class_index
+            assert left.confidence == pytest.approx(right.confidence, abs=1e-5)
+
+    streamed = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+        runtime_config_overrides={"motion_gate_enabled": True},
+    )
+    batch, metadata = collect_window_batch(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+        runtime_config_overrides={"motion_gate_enabled": True},
+    )
+    assert streamed
+    assert decode_window_batch(batch, artifact_path=str(root), duration_sec=metadata.duration_sec) == streamed
+
+
+def test_refine_window_ids_densifies_class_changes_and_near_threshold_pairs():
+    coarse_ids = [0, 4, 8, 12, 13]
+    class_index = np.array([0, 0, 1, 1, 1])
+    confidence = np.array([0.9, 0.9, 0.9, 0.25, 0.9])
+
+    refined = runtime_classifier._refine_window_ids(
+        coarse_ids,
+        class_index,
+        confidence,
+        confidence_margin=0.1,
+        thresholds=(0.2,),
+    )
+
+    assert refined == [5, 6, 7, 9, 10, 11]
+
+
+def test_adaptive_scan_matches_dense_segments_with_fewer_windows(tmp_path):
+    video_path = _write_video(tmp_path / "input.mp4", frames=192, span_frames=64)
+    root = _artifact_dir(tmp_path, _TinyClassifier(), {"inference_batch_size": 4, "decoder_mode": "realtime"})
+
+    dense_report = InferenceReport()
+    dense = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+        report=dense_report,
+    )
+    adaptive_report = InferenceReport()
+    adaptive = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+        runtime_config_overrides={"scan_mode": "adaptive"},
+        report=adaptive_report,
+    )
+
+    assert len(dense) >= 3
+    assert [(item.label, item.start_sec, item.end_sec) for item in adaptive] == [
+        (item.label, item.start_sec, item.end_sec) for item in dense
+    ]
+    assert adaptive_report.scan_mode == "adaptive"
+    assert 0 < adaptive_report.windows_refined
+    assert adaptive_report.windows * 2 < dense_report.windows
+
+
+def test_window_stream_stops_decoding_when_consumer_closes_early(tmp_path):
+    video_path = _write_video(tmp_path / "input.mp4", frames=96)
+    root = _artifact_dir(tmp_path, _TinyClassifier(), {"inference_batch_size": 2, "pipelined_inference": True})
+
+    full_report = InferenceReport()
+    all_windows = list(
+        iter_window_predictions(video_path=str(video_path), artifact_path=str(root), framework="torchscript", report=full_report)
+    )
+    partial_report = InferenceReport()
+    stream = iter_window_predictions(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+        report=partial_report,
+    )
+    first = next(stream)
+    stream.close()
+
+    assert first.start_sec == all_windows[0].start_sec
+    assert full_report.windows == len(all_windows)
+    assert partial_report.windows == 2 < len(all_windows)
+
+
+def test_layout_manifest_is_persisted_and_reused_by_cold_runner(tmp_path):
+    video_path = _write_video(tmp_path / "input.mp4")
+    root = _artifact_dir(tmp_path, _NtchwClassifier())
+
+    first = infer_gesture_labels_from_file(video_path=str(video_path), artifact_path=str(root), framework="torchscript")
+    manifest = json.loads((root / LAYOUT_MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert manifest["torchscript"]["layout"] == "ntchw"
+    assert manifest["torchscript"]["model_file"] == "model.pt"
+
+    runner_cache.clear()
+    cold_runner = runtime_classifier._create_model_runner(root / "model.pt", "torchscript", artifact_root=root)
+    assert cold_runner.input_layout == "ntchw"
+
+    second = infer_gesture_labels_from_file(video_path=str(video_path), artifact_path=str(root), framework="torchscript")
+    assert first == second
+
+
+def test_ensure_input_layout_manifest_probes_without_video(tmp_path):
+    root = _artifact_dir(tmp_path, _NtchwClassifier())
+    assert ensure_input_layout_manifest(str(root), "torch") == "ntchw"
+    assert (root / LAYOUT_MANIFEST_NAME).exists()
+
+
+def test_stale_layout_manifest_is_ignored(tmp_path):
+    root = _artifact_dir(tmp_path, _TinyClassifier())
+    (root / LAYOUT_MANIFEST_NAME).write_text(
+        json.dumps({"torchscript": {"model_file": "model.pt", "mtime_ns": 1, "size": 1, "layout": "ntchw"}}),
+        encoding="utf-8",
+    )
+    assert ensure_input_layout_manifest(str(root), "torchscript") == "ncthw"
+
+
+def test_onnx_runner_uses_layout_from_input_shape(tmp_path):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    video_path = _write_video(tmp_path / "input.mp4")
+    root = _artifact_dir(tmp_path, _TinyClassifier())
+    torch.onnx.export(
+        _NtchwClassifier().eval(),
+        torch.zeros(1, 8, 3, 112, 112),
+        str(root / "model.onnx"),
+        input_names=["clip"],
+        output_names=["logits"],
+        dynamic_axes={"clip": {0: "batch"}},
+    )
+
+    onnx_predictions = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="onnx",
+    )
+    manifest = json.loads((root / LAYOUT_MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert manifest["onnx"]["layout"] == "ntchw"
+
+    torch_predictions = infer_gesture_labels_from_file(
+        video_path=str(video_path),
+        artifact_path=str(root),
+        framework="torchscript",
+    )
+    assert [item.label for item in onnx_predictions] == [item.label for item in torch_predictions]
@@ -0,0 +1,90 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from app.providers import runtime_spec
+from app.providers.runtime_spec import RuntimeSpecCache
+from app.services.model_artifacts import upsert_runtime_assets
+
+
+def _write_assets(root, config: dict, labels) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "runtime_config.json").write_text(json.dumps(config), encoding="utf-8")
+    (root / "labels.json").write_text(json.dumps(labels), encoding="utf-8")
+
+
+def _bump_mtime(path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_spec_is_compiled_once_per_file_signature(tmp_path, monkeypatch):
+    _write_assets(tmp_path, {"num_frames": 8, "top_k": 99}, {"1": "b", "0": "a", "10": "c"})
+    cache = RuntimeSpecCache()
+    loads: list[str] = []
+    original = runtime_spec.load_labels
+    monkeypatch.setattr(runtime_spec, "load_labels", lambda root: loads.append("labels") or original(root))
+
+    first = cache.get(tmp_path)
+    assert cache.get(tmp_path) is first
+    assert loads == ["labels"]
+    assert first.labels == ("a", "b", "c")
+    assert first.num_frames == 8
+    assert first.top_k == 10
+    with pytest.raises(AttributeError):
+        first.num_frames = 16  # type: ignore[misc]
+
+    (tmp_path / "runtime_config.json").write_text(json.dumps({"num_frames": 12}), encoding="utf-8")
+    _bump_mtime(tmp_path / "runtime_config.json")
+    assert cache.get(tmp_path).num_frames == 12
+    assert loads == ["labels", "labels"]
+
+
+def test_overrides_are_applied_as_overlay_without_touching_cached_spec(tmp_path):
+    _write_assets(tmp_path, {"decoder_mode": "realtime", "window_size_frames": 16}, ["hello", "<blank>"])
+    cache = RuntimeSpecCache()
+    base = cache.get(tmp_path)
+
+    overridden = base.with_overrides({"decoder_mode": "ctc"})
+
+    assert base.with_overrides(None) is base
+    assert overridden.decoder_mode == "ctc"
+    assert overridden.window_size_frames == 16
+    assert overridden.ctc_blank_index == 1
+    assert overridden.labels is base.labels
+    assert cache.get(tmp_path).decoder_mode == "realtime"
+
+
+
+def test_override_overlay_reuses_untouched_fields_and_matches_full_compile(tmp_path):
+    config = {"num_frames": 16, "mean": [0.5, 0.5, 0.5], "onnx_io_binding": True}
+    labels = tuple(f"sign_{index}" for index in range(2000)) + ("<blank>",)
+    base = runtime_spec.compile_runtime_spec(config, labels)
+
+    overridden = base.with_overrides({"decoder_mode": "ctc"})
+    assert overridden.onnx_session is base.onnx_session
+    assert overridden.ctc_blank_index == base.ctc_blank_index == 2000
+    assert overridden.mean is base.mean
+
+    for overrides in (
+        {"num_frames": 8},
+        {"window_size_frames": 64, "stride_frames": "bad"},
+        {"mean": [120.0, 110.0, 100.0]},
+        {"ctc_blank_index": 3},
+        {"onnx_intra_op_threads": 2, "onnx_io_binding": False},
+        {"scan_mode": "ADAPTIVE", "window_store_dtype": "nope", "preprocessed_frame_cache_mb": 0},
+        {"unknown_key": 1},
+    ):
+        assert base.with_overrides(overrides) == runtime_spec.compile_runtime_spec({**config, **overrides}, labels)
+
+def test_upsert_runtime_assets_invalidates_cached_spec(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.model_artifacts.settings.hf_cache_dir", str(tmp_path))
+    artifact_path = upsert_runtime_assets("model-1", "local/demo", "main", labels=["a"], runtime_config={"top_k": 2})
+    root = Path(artifact_path)
+    assert runtime_spec.load_runtime_spec(root).top_k == 2
+
+    # Same size and (on coarse-mtime filesystems) possibly the same mtime: only invalidation catches it.
+    upsert_runtime_assets("model-1", "local/demo", "main", runtime_config={"top_k": 5})
+    assert runtime_spec.load_runtime_spec(root).top_k == 5
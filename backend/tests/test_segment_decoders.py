@@ -0,0 +1,195 @@
+import random
+
+import pytest
+
+from app.providers.segment_decoders import (
+    CtcTokenDecoder,
+    RealtimeSegmentDecoder,
+    TopWindowTracker,
+    WindowPrediction,
+    top_window_predictions,
+)
+
+LABELS = ["hello", "thanks", "<blank>"]
+
+
+def _window(start: float, class_index: int, confidence: float) -> WindowPrediction:
+    return WindowPrediction(
+        start_sec=start,
+        end_sec=start + 0.5,
+        class_index=class_index,
+        confidence=confidence,
+        probabilities=None,
+    )
+
+
+def test_realtime_decoder_emits_segment_when_class_changes():
+    decoder = RealtimeSegmentDecoder(labels=LABELS, min_confidence=0.2, min_duration_sec=0.15, max_gap_sec=0.35)
+
+    assert decoder.push(_window(0.0, 0, 0.9)) == []
+    assert decoder.push(_window(0.25, 0, 0.7)) == []
+    closed = decoder.push(_window(0.5, 1, 0.8))
+
+    assert [(item.label, item.confidence, item.start_sec, item.end_sec) for item in closed] == [
+        ("hello", 0.8, 0.0, 0.75)
+    ]
+    assert [item.label for item in decoder.flush()] == ["thanks"]
+    assert decoder.flush() == []
+
+
+def test_realtime_decoder_closes_segment_on_low_confidence_window():
+    decoder = RealtimeSegmentDecoder(labels=LABELS, min_confidence=0.2, min_duration_sec=0.15, max_gap_sec=0.35)
+    decoder.push(_window(0.0, 0, 0.9))
+    assert [item.label for item in decoder.push(_window(0.25, 0, 0.1))] == ["hello"]
+
+
+def test_ctc_decoder_collapses_repeats_and_splits_on_blank():
+    decoder = CtcTokenDecoder(
+        labels=LABELS,
+        blank_index=2,
+        blank_threshold=0.12,
+        min_token_confidence=0.16,
+        min_duration_sec=0.12,
+    )
+    emitted = []
+    for window in [
+        _window(0.0, 0, 0.9),
+        _window(0.25, 0, 0.8),
+        _window(0.5, 2, 0.9),
+        _window(0.75, 0, 0.7),
+        _window(1.0, 1, 0.05),
+    ]:
+        emitted.extend(decoder.push(window))
+    emitted.extend(decoder.flush())
+
+    assert [(item.label, item.start_sec, item.end_sec) for item in emitted] == [
+        ("hello", 0.0, 0.75),
+        ("hello", 0.75, 1.25),
+    ]
+
+
+def test_top_window_tracker_keeps_best_window_per_class():
+    tracker = TopWindowTracker(labels=LABELS, top_k=2)
+    for window in [_window(0.0, 0, 0.4), _window(0.5, 1, 0.6), _window(1.0, 0, 0.6), _window(1.5, 1, 0.5)]:
+        tracker.push(window)
+
+    assert [(item.label, item.start_sec) for item in tracker.results()] == [("thanks", 0.5), ("hello", 1.0)]
+
+
+def test_skipped_windows_act_as_blanks():
+    skipped = _window(0.5, -1, 0.0)
+    realtime = RealtimeSegmentDecoder(labels=LABELS, min_confidence=0.2, min_duration_sec=0.15, max_gap_sec=0.35)
+    ctc = CtcTokenDecoder(
+        labels=LABELS,
+        blank_index=None,
+        blank_threshold=0.0,
+        min_token_confidence=0.0,
+        min_duration_sec=0.0,
+    )
+    windows = [_window(0.0, 0, 0.9), _window(0.25, 0, 0.9), skipped, _window(0.75, 0, 0.9)]
+
+    assert [(item.start_sec, item.end_sec) for item in _incremental(realtime, windows)] == [(0.0, 0.75), (0.75, 1.25)]
+    assert [(item.start_sec, item.end_sec) for item in _incremental(ctc, windows)] == [(0.0, 0.75), (0.75, 1.25)]
+
+    tracker = TopWindowTracker(labels=LABELS, top_k=3)
+    tracker.push(skipped)
+    assert tracker.results() == []
+    assert top_window_predictions(*_arrays([skipped]), labels=LABELS, top_k=3) == []
+
+
+def _random_windows(seed: int) -> list[WindowPrediction]:
+    rng = random.Random(seed)
+    windows = []
+    cursor = 0.0
+    for _ in range(rng.randint(0, 200)):
+        start = round(cursor, 3)
+        windows.append(
+            WindowPrediction(
+                start_sec=start,
+                end_sec=round(start + rng.choice([0.1, 0.3, 0.6]), 3),
+                class_index=rng.choice([0, 0, 1, 2, 3, -1]),
+                confidence=rng.random(),
+                probabilities=None,
+            )
+        )
+        cursor += rng.choice([0.05, 0.2, 0.5, 0.9])
+    return windows
+
+
+def _arrays(windows: list[WindowPrediction]):
+    np = pytest.importorskip("numpy")
+    return (
+        np.asarray([window.class_index for window in windows], dtype=np.int32),
+        np.asarray([window.confidence for window in windows], dtype=np.float64),
+        np.asarray([window.start_sec for window in windows], dtype=np.float64),
+        np.asarray([window.end_sec for window in windows], dtype=np.float64),
+    )
+
+
+def _incremental(decoder, windows: list[WindowPrediction]):
+    emitted = []
+    for window in windows:
+        emitted.extend(decoder.push(window))
+    return emitted + decoder.flush()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_array_decoders_match_incremental_decoders(seed):
+    windows = _random_windows(seed)
+    arrays = _arrays(windows)
+
+    def realtime():
+        return RealtimeSegmentDecoder(labels=LABELS, min_confidence=0.3, min_duration_sec=0.15, max_gap_sec=0.35)
+
+    def ctc():
+        return CtcTokenDecoder(
+            labels=LABELS,
+            blank_index=2,
+            blank_threshold=0.2,
+            min_token_confidence=0.16,
+            min_duration_sec=0.12,
+        )
+
+    assert realtime().decode_arrays(*arrays) == _incremental(realtime(), windows)
+    assert ctc().decode_arrays(*arrays) == _incremental(ctc(), windows)
+
+
+def test_array_decoders_match_incremental_decoders_exactly_on_long_runs():
+    # Few classes and 5-decimal confidences give long runs whose means sit on round(, 4)
+    # boundaries, where any summation order other than the push decoders' shows up.
+    for seed in range(3000):
+        rng = random.Random(seed)
+        windows = []
+        class_index = 0
+        for step in range(rng.randint(1, 60)):
+            if rng.random() < 0.15:
+                class_index = rng.choice([0, 1, 2, -1])
+            windows.append(
+                WindowPrediction(
+                    start_sec=round(step * 0.25, 3),
+                    end_sec=round(step * 0.25 + 0.5, 3),
+                    class_index=class_index,
+                    confidence=rng.randint(20000, 100000) / 100000,
+                    probabilities=None,
+                )
+            )
+        arrays = _arrays(windows)
+        realtime = RealtimeSegmentDecoder(labels=LABELS, min_confidence=0.3, min_duration_sec=0.15, max_gap_sec=0.35)
+        ctc = CtcTokenDecoder(
+            labels=LABELS,
+            blank_index=2,
+            blank_threshold=0.25,
+            min_token_confidence=0.16,
+            min_duration_sec=0.12,
+        )
+        assert realtime.decode_arrays(*arrays) == _incremental(realtime, windows), seed
+        assert ctc.decode_arrays(*arrays) == _incremental(ctc, windows), seed
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_array_top_windows_match_tracker(seed):
+    windows = _random_windows(seed)
+    tracker = TopWindowTracker(labels=LABELS, top_k=3)
+    for window in windows:
+        tracker.push(window)
+    assert top_window_predictions(*_arrays(windows), labels=LABELS, top_k=3) == tracker.results()
@@ -0,0 +1,135 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.providers.video_frames import (  # noqa: E402
+    FrameDecodeStats,
+    PreprocessedFrameCache,
+    iter_window_frames,
+    needed_frame_indices,
+    plan_windows,
+    resolve_frame_decode_mode,
+    timeline_frame_step,
+    window_sample_indices,
+)
+
+
+class _FakeCapture:
+    def __init__(self, frame_count: int) -> None:
+        self.frame_count = frame_count
+        self.position = 0
+        self.grabs = 0
+        self.retrieved: list[int] = []
+        self.seeks = 0
+
+    def grab(self) -> bool:
+        if self.position >= self.frame_count:
+            return False
+        self.position += 1
+        self.grabs += 1
+        return True
+
+    def retrieve(self):
+        index = self.position - 1
+        self.retrieved.append(index)
+        return True, f"frame-{index}"
+
+    def set(self, _prop, value) -> bool:
+        self.seeks += 1
+        self.position = int(value)
+        return True
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+
+def test_plan_windows_appends_tail_window():
+    plans = plan_windows(frame_count=50, window_size_frames=16, stride_frames=8, num_frames=4)
+    assert [plan.start_frame for plan in plans] == [0, 8, 16, 24, 32, 34]
+    assert plans[-1].end_frame == 50
+    assert plans[0].indices == window_sample_indices(0, 16, 4)
+
+
+def test_sequential_decoder_reads_each_sampled_frame_once():
+    plans = plan_windows(frame_count=64, window_size_frames=16, stride_frames=4, num_frames=8)
+    capture = _FakeCapture(frame_count=64)
+
+    results = [(plan, frames) for plan, frames in iter_window_frames(capture, plans, mode="sequential")]
+
+    needed = sorted({index for plan in plans for index in plan.indices})
+    assert capture.seeks == 0
+    assert capture.retrieved == needed
+    assert capture.grabs == max(needed) + 1
+    for plan, frames in results:
+        assert frames == [(index, f"frame-{index}") for index in plan.indices]
+
+
+def test_target_fps_plans_on_resampled_timeline_and_retrieves_only_needed_frames():
+    assert timeline_frame_step(60.0, 0.0) == 1.0
+    assert timeline_frame_step(24.0, 30.0) == 1.0
+    assert timeline_frame_step(60.0, 30.0) == 2.0
+
+    timeline = plan_windows(frame_count=60, window_size_frames=16, stride_frames=4, num_frames=8)
+    resampled = plan_windows(frame_count=120, window_size_frames=16, stride_frames=4, num_frames=8, frame_step=2.0)
+    assert [plan.start_frame for plan in resampled] == [plan.start_frame * 2 for plan in timeline]
+    assert [plan.end_frame for plan in resampled] == [plan.end_frame * 2 for plan in timeline]
+    assert [plan.indices for plan in resampled] == [[index * 2 for index in plan.indices] for plan in timeline]
+
+    capture = _FakeCapture(frame_count=120)
+    stats = FrameDecodeStats()
+    list(iter_window_frames(capture, resampled, mode="sequential", stats=stats))
+    needed = needed_frame_indices(resampled)
+    assert capture.retrieved == needed
+    assert stats.retrieved == len(needed) == len(needed_frame_indices(timeline))
+    assert stats.grabbed == capture.grabs == max(needed) + 1
+
+
+def test_sequential_and_seek_decoders_yield_same_frames():
+    plans = plan_windows(frame_count=40, window_size_frames=12, stride_frames=3, num_frames=6)
+    sequential = [frames for _, frames in iter_window_frames(_FakeCapture(40), plans, mode="sequential")]
+    seek_capture = _FakeCapture(40)
+    seek = [frames for _, frames in iter_window_frames(seek_capture, plans, mode="seek")]
+    assert sequential == seek
+    assert seek_capture.seeks == sum(len(plan.indices) for plan in plans)
+
+
+def test_sequential_decoder_stops_at_truncated_stream():
+    plans = plan_windows(frame_count=32, window_size_frames=16, stride_frames=8, num_frames=4)
+    capture = _FakeCapture(frame_count=20)
+    results = list(iter_window_frames(capture, plans, mode="sequential"))
+    assert len(results) == len(plans)
+    assert all(index < 20 for _, frames in results for index, _ in frames)
+
+
+def test_auto_decode_mode_prefers_seek_only_for_sparse_scans():
+    dense = plan_windows(frame_count=300, window_size_frames=32, stride_frames=8, num_frames=16)
+    sparse = plan_windows(frame_count=3000, window_size_frames=32, stride_frames=32, num_frames=4)
+    assert resolve_frame_decode_mode("auto", dense, max_gap_frames=4) == "sequential"
+    assert resolve_frame_decode_mode("auto", sparse, max_gap_frames=4) == "seek"
+    assert resolve_frame_decode_mode("seek", dense, max_gap_frames=4) == "seek"
+
+
+def test_aligned_sampling_shares_frame_indices_between_overlapping_windows():
+    plans = plan_windows(frame_count=96, window_size_frames=32, stride_frames=8, num_frames=8, align_to_stride=True)
+    for current, following in zip(plans, plans[1:]):
+        overlap = [index for index in current.indices if index >= following.start_frame]
+        assert overlap == following.indices[: len(overlap)]
+    assert all(plan.start_frame <= min(plan.indices) and max(plan.indices) < plan.end_frame for plan in plans)
+
+
+def test_preprocessed_frame_cache_respects_memory_bound():
+    np = pytest.importorskip("numpy")
+    cache = PreprocessedFrameCache(max_bytes=3 * 400)
+
+    for index in range(5):
+        cache.get_or_compute(index, lambda: np.zeros(100, dtype=np.float32))
+    assert cache.bytes_held <= 3 * 400
+    assert cache.misses == 5
+
+    cache.get_or_compute(4, lambda: pytest.fail("cached frame recomputed"))
+    assert cache.hits == 1
+    cache.discard_before(4)
+    assert cache.bytes_held == 400
+    assert cache.reuse_ratio == pytest.approx(1 / 6)
@@ -0,0 +1,86 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.providers.segment_decoders import RealtimeSegmentDecoder, WindowPrediction  # noqa: E402
+from app.providers.window_batch import WindowBatch  # noqa: E402
+
+LABELS = [f"sign_{index}" for index in range(50)]
+
+
+def _probabilities(rows: int, classes: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    logits = rng.normal(size=(rows, classes)).astype(np.float32) * 3.0
+    exponent = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return (exponent / exponent.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def _fill(batch: WindowBatch, probabilities) -> WindowBatch:
+    for offset in range(0, probabilities.shape[0], 7):
+        block = probabilities[offset : offset + 7]
+        starts = [round((offset + row) * 0.25, 3) for row in range(block.shape[0])]
+        batch.append(start_sec=starts, end_sec=[start + 0.5 for start in starts], probabilities=block)
+    return batch
+
+
+def test_window_batch_grows_and_round_trips_windows():
+    probabilities = _probabilities(300, 50)
+    batch = _fill(WindowBatch(capacity=4), probabilities)
+
+    assert len(batch) == 300
+    class_index, confidence, start_sec, _ = batch.arrays()
+    assert class_index.tolist() == np.argmax(probabilities, axis=1).tolist()
+    assert confidence == pytest.approx(probabilities.max(axis=1))
+    assert start_sec[10] == 2.5
+
+    window = batch.window(42)
+    assert isinstance(window, WindowPrediction)
+    assert np.array_equal(window.probabilities, probabilities[42])
+    assert sum(1 for _ in batch) == 300
+
+
+def test_sparse_float16_store_is_smaller_and_decodes_identically():
+    probabilities = _probabilities(400, 50, seed=3)
+    dense = _fill(WindowBatch(), probabilities)
+    sparse = _fill(WindowBatch(dtype="float16", top_k=3), probabilities)
+
+    assert sparse.sparse and not dense.sparse
+    assert sparse.nbytes < dense.nbytes / 3
+
+    def decode(batch):
+        decoder = RealtimeSegmentDecoder(labels=LABELS, min_confidence=0.2, min_duration_sec=0.15, max_gap_sec=0.35)
+        return decoder.decode_arrays(*batch.arrays())
+
+    assert decode(sparse) == decode(dense)
+
+    row = sparse.probability_row(5)
+    top = np.argsort(-probabilities[5])[:3]
+    assert np.count_nonzero(row) == 3
+    assert row[top] == pytest.approx(probabilities[5][top], abs=1e-3)
+
+
+def test_window_batch_rejects_class_count_change():
+    batch = WindowBatch()
+    batch.append(start_sec=[0.0], end_sec=[0.5], probabilities=_probabilities(1, 4))
+    with pytest.raises(RuntimeError, match="window_store_class_mismatch"):
+        batch.append(start_sec=[0.5], end_sec=[1.0], probabilities=_probabilities(1, 5))
+
+
+@pytest.mark.parametrize("top_k", [0, 3])
+def test_window_batch_save_and_load_round_trip(tmp_path, top_k):
+    probabilities = _probabilities(40, 50, seed=5)
+    batch = _fill(WindowBatch(dtype="float16", top_k=top_k), probabilities)
+    path = tmp_path / "windows.npz"
+    batch.save(path, duration_sec=12.5)
+
+    loaded, duration_sec = WindowBatch.load(path)
+    assert duration_sec == 12.5
+    assert len(loaded) == len(batch) and loaded.sparse == batch.sparse
+    for left, right in zip(loaded.arrays(), batch.arrays(), strict=True):
+        np.testing.assert_array_equal(left, right)
+    np.testing.assert_array_equal(loaded.probability_row(7), batch.probability_row(7))
+
+    columns_only, _ = WindowBatch.load(path, with_probabilities=False)
+    np.testing.assert_array_equal(columns_only.arrays()[0], batch.arrays()[0])
+    with pytest.raises(RuntimeError, match="window_store_probabilities_not_loaded"):
+        columns_only.probability_row(0)